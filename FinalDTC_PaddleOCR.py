@@ -66,14 +66,21 @@ import time
 import tkinter as tk
 from tkinter import ttk, filedialog
 import threading
+from collections import OrderedDict, deque, namedtuple
+import multiprocessing
+import queue
+import atexit
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from PIL import Image, ImageTk
 import re
 import csv
+import json
 import sys
 import os
 import time
 from datetime import datetime
-from paddleocr import PaddleOCR
+from paddle_ocr_worker import (create_simple_test_image, paddle_rec_batch, ocr_worker_main,
+                               pack_images_to_shared_memory)
 
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
@@ -91,6 +98,38 @@ SPN_MAX = 524287  # Il valore massimo per SPN è 524287 (2^19-1)
 FMI_MIN = 0       # Il valore minimo per FMI è 0
 FMI_MAX = 31      # Il valore massimo per FMI è 31
 
+# Layout del mosaico per l'inferenza batch PaddleOCR
+PADDLE_MOSAIC_COLUMNS = 4   # Una colonna per variante di preprocessing
+PADDLE_MOSAIC_GAP = 16      # Spazio (px) tra le celle del mosaico
+PADDLE_DET_LIMIT_SIDE_LEN = 960  # Lato massimo della detection PaddleOCR (oltre viene ridimensionato)
+PADDLE_MOSAIC_VERIFY_TOLERANCE = 4  # Scarto massimo (px) dei box mosaico vs chiamate singole in verifica
+PADDLE_REC_DEFAULT_HEIGHT = 48  # Altezza input del recognizer PP-OCRv3/v4 se non leggibile dal modello
+
+# Varianti di preprocessing PaddleOCR (ordine storico) e ordine di costo per la cascata
+PADDLE_VARIANTS = ("original_scaled", "denoised", "binary_otsu", "adaptive_thresh")
+PADDLE_CASCADE_ORDER = ("original_scaled", "binary_otsu", "adaptive_thresh", "denoised")
+
+# Griglia del dHash per la cache dei risultati OCR (larghezza x altezza = bit dell'hash)
+OCR_CACHE_HASH_GRID = (48, 12)
+
+# Riconoscitore a template delle cifre (fast path prima di PaddleOCR)
+DIGIT_TEMPLATES_DIR = "digit_templates"
+DIGIT_GLYPH_SIZE = (16, 24)          # Larghezza x altezza del glifo normalizzato
+DIGIT_MIN_COMPONENT_AREA = 12        # Componenti più piccole sono rumore
+DIGIT_MIN_SAMPLES_PER_DIGIT = 5      # Campioni richiesti per OGNI cifra 0-9 prima di attivare il fast path
+DIGIT_MARGIN_SAFETY = 0.02           # Margine aggiunto alla soglia calibrata sui campioni (leave-one-out)
+
+# Stato lampade: finestra temporale, isteresi e lampeggio
+LAMP_WINDOW_SECONDS = 2.0         # Storico per lampada usato per rilevare il lampeggio
+LAMP_HYSTERESIS = 5               # Luminanza sotto la soglia necessaria per tornare OFF
+LAMP_BLINK_MIN_TRANSITIONS = 2    # Transizioni ON/OFF nella finestra per dichiarare BLINKING
+
+# Enumerazione webcam: indici/risoluzioni da sondare e cache su disco delle capacità
+CAMERA_CAPABILITIES_FILE = "camera_capabilities.json"
+CAMERA_PROBE_INDICES = 4
+CAMERA_PROBE_TIMEOUT = 8.0  # Secondi massimi per l'intera enumerazione
+CAMERA_PROBE_RESOLUTIONS = ("640x480", "800x600", "1024x768", "1280x720", "1600x1200", "1920x1080")
+
 # Set Tesseract path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/cython_modules')
 paddle_ocr = None
@@ -382,50 +421,98 @@ def execute_dtc_acquisition_with_screenshot(expected_index):
         if not app.running or not app.dm1_thread_running:
             log_message("Acquisition skipped - test not running anymore")
             return
-            
-        # Verifica che la webcam sia disponibile
-        if app.cap is not None and app.cap.isOpened():
-            # Warm up webcam
-            for _ in range(3):
-                app.cap.read()
-                
-            ret, frame = app.cap.read()
-            
-            if ret:
-                # IMPORTANTE: Salva una copia del frame PRIMA del riconoscimento
-                original_frame = frame.copy()
-                
-                # Riconoscimento con verifica
-                log_message("Starting image recognition...")
-                recognized_values, lamp_brightness_status = process_frame(frame.copy(), verify_expected=True)
-                
-                # Ottieni lo stato della lampada
-                lamp_status = "NONE"
-                if lamp_brightness_status and len(lamp_brightness_status) > 0:
-                    if lamp_brightness_status[0]:
-                        lamp_status = "AMBER"
-                    elif len(lamp_brightness_status) > 1 and lamp_brightness_status[1]:
-                        lamp_status = "RED"
-                
-                # Prepara i valori riconosciuti
-                recognized_dtc = {
-                    "SPN": recognized_values.get('SPN', 0) if recognized_values.get('SPN') is not None else 0,
-                    "FMI": recognized_values.get('FMI', 0) if recognized_values.get('FMI') is not None else 0,
-                    "LAMP": lamp_status
-                }
-                
-                # Verifica i valori con screenshot support
-                if expected_index < len(app.csv_data):
-                    current_dtc = app.csv_data[expected_index]
-                    verify_ff99_response(current_dtc, recognized_dtc, original_frame)
-                
+        
+        # Riconoscimento con verifica su un burst di frame
+        recognized_dtc, original_frame = recognize_displayed_dtc(verify_expected=True)
+        
+        # Verifica i valori con screenshot support
+        if recognized_dtc is not None and expected_index < len(app.csv_data):
+            current_dtc = app.csv_data[expected_index]
+            verify_ff99_response(current_dtc, recognized_dtc, original_frame)
+    except Exception as e:
+        log_message(f"Error during acquisition: {str(e)}")
 
-            else:
-                log_message("Error: unable to capture frame from webcam")
-        else:
-            log_message("Error: webcam not initialized or closed")
+def recognize_displayed_dtc(verify_expected=True):
+    """
+    Riconosce SPN, FMI e lampada mostrati dal cruscotto con un burst di frame.
+    
+    Returns:
+        tuple: (recognized_dtc, frame) - (None, None) se la webcam non è disponibile
+    """
+    # Verifica che la webcam sia disponibile
+    if app.cap is None or not app.cap.isOpened():
+        log_message("Error: webcam not initialized or closed")
+        return None, None
+    
+    log_message("Starting image recognition...")
+    recognized_values, lamp_brightness_status, original_frame = recognize_burst(verify_expected=verify_expected)
+    
+    if recognized_values is None:
+        log_message("Error: unable to capture frame from webcam")
+        return None, None
+    
+    # Ottieni lo stato della lampada
+    lamp_status = "NONE"
+    if lamp_brightness_status and len(lamp_brightness_status) > 0:
+        if lamp_brightness_status[0]:
+            lamp_status = "AMBER"
+        elif len(lamp_brightness_status) > 1 and lamp_brightness_status[1]:
+            lamp_status = "RED"
+    
+    # Prepara i valori riconosciuti
+    recognized_dtc = {
+        "SPN": recognized_values.get('SPN', 0) if recognized_values.get('SPN') is not None else 0,
+        "FMI": recognized_values.get('FMI', 0) if recognized_values.get('FMI') is not None else 0,
+        "LAMP": lamp_status
+    }
+    return recognized_dtc, original_frame
+
+def execute_dtc_group_acquisition(indices, verified, done_event):
+    """
+    Acquisizione per un DM1 con più DTC: il cruscotto mostra i guasti attivi a pagine,
+    quindi il riconoscimento viene ripetuto e ogni lettura viene assegnata al DTC del
+    gruppo con stesso SPN/FMI. Dopo una pagina per DTC (app.dm1_group_page_time) i DTC
+    mai visualizzati vengono verificati con l'ultima lettura (mismatch + screenshot).
+    Gli indici verificati vengono aggiunti a verified; done_event segnala la fine.
+    """
+    log_message(f"Executing acquisition for DTC {indices[0]+1}-{indices[-1]+1} after 60s countdown")
+    
+    pending = list(indices)
+    last_dtc, last_frame = None, None
+    deadline = time.time() + app.dm1_group_page_time * len(indices)
+    
+    try:
+        while pending and time.time() < deadline:
+            if not app.running or not app.dm1_thread_running:
+                log_message("Acquisition skipped - test not running anymore")
+                return
+            
+            # Le pagine del cruscotto cambiano: niente salvataggio ROI sul DTC "atteso"
+            recognized_dtc, frame = recognize_displayed_dtc(verify_expected=False)
+            if recognized_dtc is None:
+                time.sleep(0.5)
+                continue
+            last_dtc, last_frame = recognized_dtc, frame
+            
+            for idx in pending:
+                expected_dtc = app.csv_data[idx]
+                if (expected_dtc['SPN'] == recognized_dtc['SPN'] and
+                        expected_dtc['FMI'] == recognized_dtc['FMI']):
+                    verify_ff99_response(expected_dtc, recognized_dtc, frame, dtc_index=idx + 1)
+                    verified.add(idx)
+                    pending.remove(idx)
+                    log_message(f"DTC group: {len(indices) - len(pending)}/{len(indices)} DTCs recognized")
+                    break
+        
+        if pending and last_dtc is not None:
+            log_message(f"DTC group: {len(pending)} DTC(s) never displayed, verifying with last reading")
+            for idx in pending:
+                verify_ff99_response(app.csv_data[idx], last_dtc, last_frame, dtc_index=idx + 1)
+                verified.add(idx)
     except Exception as e:
         log_message(f"Error during acquisition: {str(e)}")
+    finally:
+        done_event.set()
 
 def preprocess_image_for_ocr(roi, threshold=240):
     """Prepara la ROI per l'OCR applicando grigio, blur, denoise e threshold adattivo."""
@@ -561,10 +648,9 @@ def save_paddle_debug_for_mismatch(expected_dtc, screenshot_folder):
 
 def recognize_number_from_roi(roi, threshold=240, area_type="Number", slot_number=1):
     """Riconoscimento numeri con PaddleOCR standard - versione finale"""
-    if not app.paddle_ocr or not app.paddle_initialized:
-        if not initialize_paddle_ocr():
-            log_message("❌ CRITICAL: PaddleOCR not available!")
-            return None
+    if not ensure_paddle_ocr_ready():
+        log_message("❌ CRITICAL: PaddleOCR not available!")
+        return None
     
     try:
         result = recognize_with_paddle_ocr(roi, area_type, slot_number)
@@ -575,6 +661,19 @@ def recognize_number_from_roi(roi, threshold=240, area_type="Number", slot_numbe
         log_message(f"❌ {area_name} ERROR: {str(e)}")
         return None
 
+def recognize_numbers_from_rois(rois, threshold=240, area_type="Number", fresh=False):
+    """Riconoscimento di tutte le aree numeriche con PaddleOCR (batch se abilitato)"""
+    if not ensure_paddle_ocr_ready():
+        log_message("❌ CRITICAL: PaddleOCR not available!")
+        return {slot_number: None for slot_number in rois}
+    
+    try:
+        return recognize_number_areas(rois, area_type, fresh)
+        
+    except Exception as e:
+        log_message(f"❌ NUMBER AREAS ERROR: {str(e)}")
+        return {slot_number: None for slot_number in rois}
+
 
 def start_recognition():
     """Starts the process of waiting for the CAN message"""
@@ -622,13 +721,24 @@ def start_recognition():
     # Aggiorna la visualizzazione delle aree per disabilitare i pulsanti di rimozione
     update_area_display()
         
-    # Inizializza la webcam con la funzione delayed
-    if not initialize_webcam_delayed(app):
+    # Inizializza la webcam in background; l'avvio prosegue nella callback
+    camera_controller.open(on_recognition_webcam_ready)
+
+def on_recognition_webcam_ready(success):
+    """Completa start_recognition() quando la webcam è pronta"""
+    if not success:
         log_message("Errore: impossibile inizializzare la webcam")
         app.running = False
         update_button_states('initial')
         return
     
+    # Il riconoscimento potrebbe essere stato fermato durante l'apertura
+    if not app.running:
+        return
+    
+    # Warm-up OCR sulle aree correnti (no-op se le forme sono già state scaldate)
+    schedule_paddle_warmup()
+    
     # Check if already waiting for a CAN message
     if not app.waiting_for_can:
         app.waiting_for_can = True  # Set flag to True before starting the thread
@@ -912,52 +1022,92 @@ def comprehensive_paddle_debug():
     
     return simple_success
 
-def preprocess_for_paddle(roi, area_type, slot_number):
-    """Preprocessing ottimizzato per PaddleOCR standard"""
-    processed_images = []
+class PaddlePreprocessor:
+    """
+    Preprocessing PaddleOCR con buffer preallocati per area: tutte le chiamate OpenCV
+    scrivono in-place (dst=) negli stessi array finché la dimensione della ROI non cambia.
+    Le immagini restituite restano valide fino alla chiamata successiva per la stessa area
+    (il riconoscimento è serializzato da app.ocr_lock).
+    """
     
-    try:
-        # Converti in scala di grigi se necessario
-        if roi.ndim == 3:
-            gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = roi.copy()
-        
-        height, width = gray.shape
-        
-        # 1. Immagine originale ridimensionata (metodo principale)
+    def __init__(self):
+        self.roi_shape = None
+        self.gray = None
+        self.resized = None
+        self.work = {}
+        self.outputs = {}
+    
+    def _allocate(self, roi_shape):
+        height, width = roi_shape[:2]
         scale_factor = max(4.0, 100 / min(height, width))
-        resized = cv2.resize(gray, None, fx=scale_factor, fy=scale_factor, 
-                           interpolation=cv2.INTER_CUBIC)
-        processed_images.append((cv2.cvtColor(resized, cv2.COLOR_GRAY2BGR), "original_scaled"))
-        
-        # 2. Con riduzione rumore
-        try:
-            denoised = cv2.fastNlMeansDenoising(resized, h=10)
-            processed_images.append((cv2.cvtColor(denoised, cv2.COLOR_GRAY2BGR), "denoised"))
-        except:
-            pass
-        
-        # 3. Con threshold binario
-        try:
-            _, binary = cv2.threshold(resized, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            processed_images.append((cv2.cvtColor(binary, cv2.COLOR_GRAY2BGR), "binary_otsu"))
-        except:
-            pass
-        
-        # 4. Threshold adattivo
-        try:
-            adaptive = cv2.adaptiveThreshold(resized, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                           cv2.THRESH_BINARY, 15, 10)
-            processed_images.append((cv2.cvtColor(adaptive, cv2.COLOR_GRAY2BGR), "adaptive_thresh"))
-        except:
-            pass
+        scaled_size = (int(round(width * scale_factor)), int(round(height * scale_factor)))
+        
+        self.roi_shape = roi_shape
+        self.scaled_size = scaled_size
+        self.gray = np.empty((height, width), dtype=np.uint8)
+        self.resized = np.empty(scaled_size[::-1], dtype=np.uint8)
+        self.work = {variant: np.empty_like(self.resized) for variant in PADDLE_VARIANTS
+                     if variant != "original_scaled"}
+        self.outputs = {variant: np.empty(scaled_size[::-1] + (3,), dtype=np.uint8)
+                        for variant in PADDLE_VARIANTS}
+    
+    def prepare(self, roi):
+        """Scala di grigi + upscaling della ROI nei buffer dell'area"""
+        if roi.shape != self.roi_shape:
+            self._allocate(roi.shape)
         
+        if roi.ndim == 3:
+            gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        else:
+            gray = roi
+        cv2.resize(gray, self.scaled_size, dst=self.resized, interpolation=cv2.INTER_CUBIC)
+    
+    def variant(self, variant):
+        """Genera la variante richiesta (BGR) dalla base preparata con prepare()"""
+        if variant == "original_scaled":
+            processed = self.resized
+        elif variant == "denoised":
+            processed = cv2.fastNlMeansDenoising(self.resized, dst=self.work[variant], h=10)
+        elif variant == "binary_otsu":
+            _, processed = cv2.threshold(self.resized, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU,
+                                         dst=self.work[variant])
+        elif variant == "adaptive_thresh":
+            processed = cv2.adaptiveThreshold(self.resized, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                              cv2.THRESH_BINARY, 15, 10, dst=self.work[variant])
+        else:
+            raise ValueError(f"Unknown preprocessing variant: {variant}")
+        return cv2.cvtColor(processed, cv2.COLOR_GRAY2BGR, dst=self.outputs[variant])
+    
+    def process(self, roi, variants=PADDLE_VARIANTS):
+        """Varianti di preprocessing della ROI senza allocazioni: lista di (immagine, descrizione)"""
+        self.prepare(roi)
+        processed_images = []
+        for variant in variants:
+            try:
+                processed_images.append((self.variant(variant), variant))
+            except Exception:
+                if variant == "original_scaled":
+                    raise
+        return processed_images
+
+def get_paddle_preprocessor(slot_number):
+    """Preprocessor con buffer dedicati per l'area indicata"""
+    if slot_number not in app.paddle_preprocessors:
+        app.paddle_preprocessors[slot_number] = PaddlePreprocessor()
+    return app.paddle_preprocessors[slot_number]
+
+def preprocess_for_paddle(roi, area_type, slot_number, variants=PADDLE_VARIANTS):
+    """
+    Preprocessing PaddleOCR con la stessa implementazione del riconoscimento
+    (PaddlePreprocessor), ma con buffer propri: le immagini restano valide anche
+    mentre un riconoscimento usa i buffer dell'area (es. durante il warm-up).
+    """
+    try:
+        processed_images = PaddlePreprocessor().process(roi, variants)
         if not processed_images:
             # Fallback
             fallback = cv2.cvtColor(roi, cv2.COLOR_GRAY2BGR) if roi.ndim == 2 else roi
             processed_images.append((fallback, "fallback"))
-        
         return processed_images
         
     except Exception as e:
@@ -974,108 +1124,577 @@ def safe_paddle_ocr_call(image):
             return None
         
         # PaddleOCR standard - chiamata semplice senza parametri extra
-        result = app.paddle_ocr.ocr(image)
+        with app.paddle_lock:
+            result = app.paddle_ocr.ocr(image)
         return result
             
     except Exception as e:
         log_message(f"❌ PaddleOCR call failed: {str(e)}")
         return None
 
-def recognize_with_paddle_ocr(roi, area_type, slot_number):
-    """Riconoscimento con PaddleOCR standard - versione finale con debug condizionale"""
-    if not app.paddle_ocr:
-        if not initialize_paddle_ocr():
-            log_message("❌ PaddleOCR not available")
-            return None
+def paddle_mosaic_layout(images):
+    """
+    Griglia del mosaico che non supera PADDLE_DET_LIMIT_SIDE_LEN su nessun lato
+    (la detection non ridimensiona quindi il mosaico rispetto alle chiamate singole).
+    
+    Returns:
+        tuple: (colonne, righe, larghezza cella, altezza cella) oppure None se nessuna griglia entra nel limite
+    """
+    cell_height = max(img.shape[0] for img in images) + PADDLE_MOSAIC_GAP
+    cell_width = max(img.shape[1] for img in images) + PADDLE_MOSAIC_GAP
+    
+    for cols in range(min(len(images), PADDLE_MOSAIC_COLUMNS), 0, -1):
+        rows = (len(images) + cols - 1) // cols
+        if max(rows * cell_height, cols * cell_width) <= PADDLE_DET_LIMIT_SIDE_LEN:
+            return cols, rows, cell_width, cell_height
+    return None
+
+def build_paddle_mosaic(images, layout):
+    """
+    Compone più immagini in un unico mosaico a griglia per una sola chiamata al predictor.
+    Ogni cella viene riempita con il colore di sfondo della propria immagine,
+    così la detection non vede bordi artificiali tra le varianti.
+    
+    Returns:
+        numpy.ndarray: il mosaico (buffer riutilizzato tra le chiamate)
+    """
+    cols, rows, cell_width, cell_height = layout
+    
+    # Buffer riutilizzato finché la geometria del mosaico non cambia (stesse ROI = stessa forma)
+    mosaic_shape = (rows * cell_height, cols * cell_width, 3)
+    if app.paddle_mosaic_buffer is None or app.paddle_mosaic_buffer.shape != mosaic_shape:
+        app.paddle_mosaic_buffer = np.empty(mosaic_shape, dtype=np.uint8)
+    mosaic = app.paddle_mosaic_buffer
+    mosaic.fill(0)
+    
+    for idx, img in enumerate(images):
+        row, col = divmod(idx, cols)
+        height, width = img.shape[:2]
+        
+        # Colore di sfondo = mediana del bordo esterno dell'immagine
+        border = np.concatenate([img[0], img[-1], img[:, 0], img[:, -1]])
+        background = [int(c) for c in np.median(border, axis=0)]
+        
+        cell = cv2.copyMakeBorder(img, 0, cell_height - height, 0, cell_width - width,
+                                  cv2.BORDER_CONSTANT, value=background)
+        mosaic[row * cell_height:(row + 1) * cell_height,
+               col * cell_width:(col + 1) * cell_width] = cell
+    
+    return mosaic
+
+def safe_paddle_ocr_batch_call(images):
+    """
+    Esegue detection+recognition su più immagini con UNA sola chiamata al predictor.
+    Le immagini vengono unite in un mosaico e le detection vengono riassegnate
+    alla cella di appartenenza, con coordinate locali all'immagine originale.
+    I box che escono dall'immagine della propria cella (fusi attraverso lo spazio
+    tra le celle) vengono scartati; se il mosaico verrebbe ridimensionato dalla
+    detection si usano le chiamate singole, così i risultati restano identici.
     
+    Returns:
+        list: un risultato per immagine nel formato standard di .ocr() ([[bbox, (text, conf)], ...])
+              oppure None se la chiamata batch non è riuscita
+    """
     try:
-        processed_images = preprocess_for_paddle(roi, area_type, slot_number)
+        if not app.paddle_ocr or not images:
+            return None
         
-        valid_results = []
-        debug_images = []
+        layout = paddle_mosaic_layout(images)
+        if layout is None:
+            return [safe_paddle_ocr_call(img) for img in images]
+        cols, rows, cell_width, cell_height = layout
         
-        for img, description in processed_images:
-            try:
-                # Chiamata corretta a PaddleOCR standard
-                result = safe_paddle_ocr_call(img)
+        with app.paddle_lock:
+            mosaic = build_paddle_mosaic(images, layout)
+            result = app.paddle_ocr.ocr(mosaic)
+        
+        per_image = [[] for _ in images]
+        
+        if result and result[0]:
+            for line in result[0]:
+                if len(line) < 2:
+                    continue
+                bbox, text_info = line[0], line[1]
                 
-                debug_info = {
-                    'image': img.copy(),
-                    'description': description,
-                    'result': result,
-                    'recognized_text': None,
-                    'confidence': 0
-                }
+                # Cella di appartenenza in base al centro del box
+                center_x = sum(point[0] for point in bbox) / len(bbox)
+                center_y = sum(point[1] for point in bbox) / len(bbox)
+                col = int(center_x // cell_width)
+                row = int(center_y // cell_height)
+                idx = row * cols + col
                 
-                # Parsing risultato PaddleOCR standard: [[[coordinates], [text, confidence]], ...]
-                if result and result[0]:
-                    for line in result[0]:
-                        if len(line) >= 2:
-                            bbox, (text, confidence) = line
-                            debug_info['recognized_text'] = str(text)
-                            debug_info['confidence'] = float(confidence)
-                            
-                            # Validazione
-                            validated_value, final_confidence = validate_and_correct_paddle_result(
-                                text, confidence, area_type, slot_number
-                            )
-                            
-                            if validated_value is not None:
-                                valid_results.append({
-                                    'value': validated_value,
-                                    'confidence': final_confidence,
-                                    'method': description,
-                                    'original_text': str(text)
-                                })
-                                debug_info['validated_value'] = validated_value
-                                break
+                if col >= cols or idx >= len(images):
+                    continue
                 
-                debug_images.append(debug_info)
+                # Tutti i vertici dentro l'immagine della cella: un box che entra nello spazio
+                # tra le celle oltre metà gap è fuso con la cella vicina e viene scartato
+                height, width = images[idx].shape[:2]
+                tolerance = PADDLE_MOSAIC_GAP // 2
+                local_points = [(point[0] - col * cell_width, point[1] - row * cell_height) for point in bbox]
+                if not all(-tolerance <= x <= width + tolerance and -tolerance <= y <= height + tolerance
+                           for x, y in local_points):
+                    continue
                 
-            except Exception as e:
-                log_message(f"Error in PaddleOCR processing: {str(e)}")
-                debug_images.append({
-                    'image': img.copy(),
-                    'description': f"{description}_ERROR",
-                    'result': None,
-                    'recognized_text': f"ERROR: {str(e)}",
-                    'confidence': 0,
-                    'validated_value': None
-                })
+                # Coordinate limitate all'immagine, come fa la detection sulle chiamate singole
+                local_bbox = [[min(max(x, 0), width - 1), min(max(y, 0), height - 1)] for x, y in local_points]
+                per_image[idx].append([local_bbox, text_info])
         
-        area_name = "SPN" if slot_number == 1 else "FMI"
+        # Stesso formato di .ocr() su immagine singola: [None] se nessun testo trovato
+        results = [[lines] if lines else [None] for lines in per_image]
+        if app.ocr_mosaic_verify:
+            verify_paddle_mosaic_results(images, results)
+        return results
         
-        # SALVA debug images SOLO se non ci sono risultati validi (ERRORE OCR)
-        if not valid_results:
-            debug_folder = save_paddle_debug_images(debug_images, area_name, valid_results)
-            if debug_folder:
-                log_message(f"❌ OCR FAILED - {area_name} Debug saved: {os.path.basename(debug_folder)}")
+    except Exception as e:
+        log_message(f"❌ PaddleOCR batch call failed: {str(e)}")
+        return None
+
+def paddle_result_lines(result):
+    """Righe di un risultato .ocr() come (testo, x_min, y_min, x_max, y_max), ordinate"""
+    lines = []
+    if result and result[0]:
+        for bbox, text_info in (line[:2] for line in result[0] if len(line) >= 2):
+            xs = [point[0] for point in bbox]
+            ys = [point[1] for point in bbox]
+            lines.append((str(text_info[0]), min(xs), min(ys), max(xs), max(ys)))
+    return sorted(lines)
+
+def verify_paddle_mosaic_results(images, batch_results):
+    """
+    Verifica di debug (app.ocr_mosaic_verify): riesegue ogni immagine con una chiamata
+    singola e segnala le differenze di testo o di box (oltre PADDLE_MOSAIC_VERIFY_TOLERANCE px)
+    rispetto al mosaico. Raddoppia il costo dell'OCR: solo per la messa a punto.
+    
+    Returns:
+        int: numero di immagini con risultati diversi
+    """
+    mismatches = 0
+    for idx, (img, batch_result) in enumerate(zip(images, batch_results)):
+        batch_lines = paddle_result_lines(batch_result)
+        single_lines = paddle_result_lines(safe_paddle_ocr_call(img))
+        same = len(batch_lines) == len(single_lines) and all(
+            batch_line[0] == single_line[0] and
+            all(abs(a - b) <= PADDLE_MOSAIC_VERIFY_TOLERANCE for a, b in zip(batch_line[1:], single_line[1:]))
+            for batch_line, single_line in zip(batch_lines, single_lines))
+        if not same:
+            mismatches += 1
+            log_message(f"⚠️ Mosaic OCR differs from single call (image {idx}): "
+                       f"{[line[0] for line in batch_lines]} vs {[line[0] for line in single_lines]}")
+    app.ocr_mosaic_verify_stats['checked'] += len(images)
+    app.ocr_mosaic_verify_stats['mismatches'] += mismatches
+    return mismatches
+
+def parse_paddle_variant_result(img, description, result, area_type, slot_number):
+    """
+    Interpreta il risultato PaddleOCR di una singola variante di preprocessing
+    
+    Returns:
+        tuple: (debug_info, valid_result) - valid_result è None se la variante non è valida
+    """
+    # Nessuna copia: le immagini restano valide fino alla fine del riconoscimento
+    debug_info = {
+        'image': img if app.ocr_debug_images else None,
+        'description': description,
+        'result': result,
+        'recognized_text': None,
+        'confidence': 0
+    }
+    valid_result = None
+    
+    # Parsing risultato PaddleOCR standard: [[[coordinates], [text, confidence]], ...]
+    if result and result[0]:
+        for line in result[0]:
+            if len(line) >= 2:
+                bbox, (text, confidence) = line
+                debug_info['recognized_text'] = str(text)
+                debug_info['confidence'] = float(confidence)
+                
+                # Validazione
+                validated_value, final_confidence = validate_and_correct_paddle_result(
+                    text, confidence, area_type, slot_number
+                )
+                
+                if validated_value is not None:
+                    valid_result = {
+                        'value': validated_value,
+                        'confidence': final_confidence,
+                        'method': description,
+                        'original_text': str(text)
+                    }
+                    debug_info['validated_value'] = validated_value
+                    break
+    
+    return debug_info, valid_result
+
+def paddle_error_debug_info(img, description, error):
+    """Voce di debug per una variante andata in errore"""
+    return {
+        'image': img if app.ocr_debug_images else None,
+        'description': f"{description}_ERROR",
+        'result': None,
+        'recognized_text': f"ERROR: {str(error)}",
+        'confidence': 0,
+        'validated_value': None
+    }
+
+def finalize_paddle_results(valid_results, debug_images, slot_number, methods_count):
+    """Salva il debug in caso di errore OCR e ritorna il valore con confidenza migliore"""
+    area_name = "SPN" if slot_number == 1 else "FMI"
+    
+    # SALVA debug images SOLO se non ci sono risultati validi (ERRORE OCR)
+    if not valid_results:
+        debug_folder = save_paddle_debug_images(debug_images, area_name, valid_results)
+        if debug_folder:
+            log_message(f"❌ OCR FAILED - {area_name} Debug saved: {os.path.basename(debug_folder)}")
+    
+    # Risultato migliore
+    if valid_results:
+        best_result = max(valid_results, key=lambda x: x['confidence'])
+        log_message(f"✅ {area_name} SUCCESS: {best_result['value']} "
+                   f"(conf: {best_result['confidence']:.2f})")
+        return best_result['value']
+    
+    log_message(f"❌ {area_name}: No valid results from {methods_count} methods")
+    return None
+
+def get_paddle_rec_input_height():
+    """Altezza di input attesa dal modello di recognition (rec_image_shape = 'C, H, W')"""
+    try:
+        rec_image_shape = app.paddle_ocr.args.rec_image_shape
+        if isinstance(rec_image_shape, str):
+            rec_image_shape = [int(v) for v in rec_image_shape.split(',')]
+        return int(rec_image_shape[1])
+    except Exception:
+        return PADDLE_REC_DEFAULT_HEIGHT
+
+def normalize_for_recognizer(image, target_height):
+    """Ridimensiona la ROI all'altezza di input del recognizer mantenendo l'aspect ratio"""
+    height, width = image.shape[:2]
+    if height == target_height:
+        return image
+    
+    scale = target_height / height
+    new_width = max(1, int(round(width * scale)))
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    return cv2.resize(image, (new_width, target_height), interpolation=interpolation)
+
+def safe_paddle_rec_call(images):
+    """
+    Solo recognition (nessuna detection) su una lista di ROI già normalizzate.
+    Le ROI disegnate dall'operatore sono già strette attorno al numero, quindi
+    il text detector DB è lavoro sprecato.
+    
+    Returns:
+        list: un risultato per immagine (vedi paddle_rec_batch), oppure None se la chiamata non è riuscita
+    """
+    try:
+        if not app.paddle_ocr or not images:
+            return None
         
-        # Risultato migliore
-        if valid_results:
-            best_result = max(valid_results, key=lambda x: x['confidence'])
-            log_message(f"✅ {area_name} SUCCESS: {best_result['value']} "
-                       f"(conf: {best_result['confidence']:.2f})")
-            return best_result['value']
+        with app.paddle_lock:
+            return paddle_rec_batch(app.paddle_ocr, images)
         
-        log_message(f"❌ {area_name}: No valid results from {len(processed_images)} methods")
+    except Exception as e:
+        log_message(f"❌ PaddleOCR recognition call failed: {str(e)}")
         return None
+
+def run_paddle_jobs(jobs, area_type, rec_only=False):
+    """
+    Esegue l'inferenza per una lista di varianti e ne interpreta i risultati.
+    
+    Args:
+        jobs: Lista di (slot_number, immagine, descrizione)
+        rec_only: True per saltare la detection e usare solo il recognizer
+    
+    Returns:
+        tuple: (valid_results, debug_images) - dizionari indicizzati per slot_number
+    """
+    valid_results = {}
+    debug_images = {}
+    for slot_number, _, _ in jobs:
+        valid_results.setdefault(slot_number, [])
+        debug_images.setdefault(slot_number, [])
+    
+    results = None
+    if rec_only:
+        target_height = get_paddle_rec_input_height()
+        jobs = [(slot_number, normalize_for_recognizer(img, target_height), f"{description}_rec")
+                for slot_number, img, description in jobs]
+    
+    # Worker esterni: un task per area, così SPN e FMI girano in parallelo. La detection
+    # completa in modalità batch resta in-process, dove usa il mosaico (una chiamata)
+    use_pool = rec_only or not (app.ocr_batch_mode and len(jobs) > 1)
+    if use_pool and app.ocr_pool is not None and app.ocr_pool.is_ready():
+        results = app.ocr_pool.run_jobs(jobs, rec_only)
+        if results is None:
+            log_message("⚠️ OCR worker pool failed, falling back to in-process OCR")
+    
+    if results is None and rec_only:
+        results = safe_paddle_rec_call([img for _, img, _ in jobs])
+        if results is None:
+            return valid_results, debug_images
+    elif results is None and app.ocr_batch_mode and len(jobs) > 1:
+        # Inferenza: una sola chiamata batch, con fallback alle chiamate singole
+        results = safe_paddle_ocr_batch_call([img for _, img, _ in jobs])
+        if results is None:
+            log_message("⚠️ Batch OCR failed, falling back to per-variant calls")
+    
+    for idx, (slot_number, img, description) in enumerate(jobs):
+        try:
+            result = results[idx] if results is not None else safe_paddle_ocr_call(img)
+            debug_info, valid_result = parse_paddle_variant_result(
+                img, description, result, area_type, slot_number
+            )
+            if valid_result is not None:
+                valid_results[slot_number].append(valid_result)
+            debug_images[slot_number].append(debug_info)
+            
+        except Exception as e:
+            log_message(f"Error in PaddleOCR processing: {str(e)}")
+            debug_images[slot_number].append(paddle_error_debug_info(img, description, e))
+    
+    return valid_results, debug_images
+
+def evaluate_paddle_jobs(jobs, area_type):
+    """
+    Valuta una lista di varianti (slot, immagine, descrizione).
+    In modalità recognition-only (app.ocr_recognition_only) la detection viene saltata
+    e usata solo come fallback per le aree con confidenza bassa.
+    
+    Returns:
+        tuple: (valid_results, debug_images) - dizionari indicizzati per slot_number
+    """
+    if not app.ocr_recognition_only:
+        return run_paddle_jobs(jobs, area_type)
+    
+    valid_results, debug_images = run_paddle_jobs(jobs, area_type, rec_only=True)
+    
+    # Fallback alla pipeline completa solo per le aree incerte
+    fallback_slots = set()
+    for slot_number in {job[0] for job in jobs}:
+        results = valid_results.get(slot_number, [])
+        best_confidence = max((r['confidence'] for r in results), default=0)
+        if best_confidence < app.ocr_rec_min_confidence:
+            area_name = "SPN" if slot_number == 1 else "FMI"
+            log_message(f"⚠️ {area_name} recognition-only confidence {best_confidence:.2f} "
+                       f"< {app.ocr_rec_min_confidence:.2f}, running full detection")
+            fallback_slots.add(slot_number)
+    
+    if fallback_slots:
+        fallback_jobs = [job for job in jobs if job[0] in fallback_slots]
+        det_valid, det_debug = run_paddle_jobs(fallback_jobs, area_type)
+        for slot_number in fallback_slots:
+            valid_results.setdefault(slot_number, []).extend(det_valid.get(slot_number, []))
+            debug_images.setdefault(slot_number, []).extend(det_debug.get(slot_number, []))
+    
+    return valid_results, debug_images
+
+def run_paddle_cascade(rois, area_type):
+    """
+    Cascata early-exit: le varianti vengono valutate in ordine di costo (PADDLE_CASCADE_ORDER)
+    e un'area esce dalla cascata appena una variante produce un valore validato
+    con confidenza >= app.ocr_cascade_min_confidence. Ogni stadio è un batch
+    (una chiamata al predictor) sulle sole aree ancora irrisolte: il mosaico unico di
+    tutte le varianti si ha solo con la cascata disattivata.
+    
+    Returns:
+        tuple: (valid_results, debug_images, methods_count) - dizionari indicizzati per slot_number
+    """
+    valid_results = {slot_number: [] for slot_number in rois}
+    debug_images = {slot_number: [] for slot_number in rois}
+    methods_count = {slot_number: 0 for slot_number in rois}
+    
+    # La base ridimensionata viene calcolata una volta sola; le varianti solo se servono
+    bases = {}
+    for slot_number, roi in rois.items():
+        try:
+            bases[slot_number] = get_paddle_preprocessor(slot_number)
+            bases[slot_number].prepare(roi)
+        except Exception as e:
+            area_name = "SPN" if slot_number == 1 else "FMI"
+            log_message(f"❌ {area_name} CRITICAL ERROR: {str(e)}")
+            del methods_count[slot_number]
+    
+    pending = set(bases)
+    for stage in PADDLE_CASCADE_ORDER:
+        if not pending:
+            break
+        
+        jobs = []
+        for slot_number in sorted(pending):
+            try:
+                jobs.append((slot_number, bases[slot_number].variant(stage), stage))
+                methods_count[slot_number] += 1
+            except Exception as e:
+                log_message(f"⚠️ Cascade stage {stage} preprocessing failed: {str(e)}")
+        if not jobs:
+            continue
+        
+        stage_valid, stage_debug = evaluate_paddle_jobs(jobs, area_type)
+        app.ocr_cascade_stats[stage]['runs'] += len({job[0] for job in jobs})
+        
+        for slot_number in {job[0] for job in jobs}:
+            results = stage_valid.get(slot_number, [])
+            valid_results[slot_number].extend(results)
+            debug_images[slot_number].extend(stage_debug.get(slot_number, []))
+            
+            if any(r['confidence'] >= app.ocr_cascade_min_confidence for r in results):
+                app.ocr_cascade_stats[stage]['hits'] += 1
+                pending.discard(slot_number)
+                area_name = "SPN" if slot_number == 1 else "FMI"
+                log_message(f"⚡ {area_name} resolved at cascade stage '{stage}'")
+    
+    return valid_results, debug_images, methods_count
+
+def get_ocr_cascade_stats():
+    """Riepilogo testuale dei contatori per stadio della cascata"""
+    lines = []
+    for stage in PADDLE_CASCADE_ORDER:
+        stats = app.ocr_cascade_stats[stage]
+        rate = stats['hits'] / stats['runs'] * 100 if stats['runs'] else 0
+        lines.append(f"{stage}: {stats['hits']}/{stats['runs']} hits ({rate:.0f}%)")
+    return " | ".join(lines)
+
+def run_number_recognition(rois, area_type, confidences, fresh=False):
+    """
+    Pipeline di riconoscimento di recognize_number_areas (da chiamare con app.ocr_lock).
+    La confidenza di ogni valore riconosciuto viene scritta in confidences[slot_number].
+    Con fresh cache e fast path vengono saltati: il valore è una lettura PaddleOCR nuova.
+    """
+    recognized = {slot_number: None for slot_number in rois}
+    
+    # Cache dei risultati: ROI con lo stesso hash di una già riconosciuta non ripassano dall'OCR
+    roi_hashes = {}
+    if app.ocr_cache_enabled and not fresh:
+        for slot_number, roi in rois.items():
+            try:
+                roi_hashes[slot_number] = compute_roi_hash(roi)
+            except Exception as e:
+                log_message(f"⚠️ ROI hash failed: {str(e)}")
+                continue
+            cached = app.ocr_cache.get(slot_number, roi_hashes[slot_number])
+            if cached is not None:
+                recognized[slot_number] = cached['value']
+                confidences[slot_number] = cached['confidence']
+                area_name = "SPN" if slot_number == 1 else "FMI"
+                log_message(f"⚡ {area_name} CACHE HIT: {cached['value']} (conf: {cached['confidence']:.2f})")
+        
+        rois = {slot_number: roi for slot_number, roi in rois.items() if recognized[slot_number] is None}
+        if not rois:
+            return recognized
+    
+    # Fast path: riconoscitore a template, PaddleOCR solo se la confidenza è bassa
+    if app.digit_fast_path_enabled and not fresh and area_type == "Number":
+        for slot_number, roi in rois.items():
+            try:
+                fast_result = app.digit_recognizer.recognize(roi)
+            except Exception as e:
+                log_message(f"⚠️ Digit template recognizer error: {str(e)}")
+                break
+            if fast_result is None:
+                continue
+            text, similarity, margin = fast_result
+            min_margin = app.digit_recognizer.min_margin
+            if min_margin is None or margin < max(min_margin, app.digit_fast_path_min_margin):
+                continue
+            value, confidence = validate_and_correct_paddle_result(text, similarity, area_type, slot_number)
+            if value is not None:
+                recognized[slot_number] = value
+                confidences[slot_number] = confidence
+                area_name = "SPN" if slot_number == 1 else "FMI"
+                log_message(f"⚡ {area_name} FAST PATH: {value} (conf: {confidence:.2f})")
+        
+        rois = {slot_number: roi for slot_number, roi in rois.items() if recognized[slot_number] is None}
+        if not rois:
+            return recognized
+    
+    if app.ocr_cascade_enabled:
+        valid_results, debug_images, methods_count = run_paddle_cascade(rois, area_type)
+    else:
+        # Prepara le varianti di tutte le aree: (slot, immagine, descrizione)
+        jobs = []
+        methods_count = {}
+        for slot_number, roi in rois.items():
+            try:
+                processed_images = get_paddle_preprocessor(slot_number).process(roi)
+            except Exception as e:
+                area_name = "SPN" if slot_number == 1 else "FMI"
+                log_message(f"❌ {area_name} CRITICAL ERROR: {str(e)}")
+                continue
+            methods_count[slot_number] = len(processed_images)
+            for img, description in processed_images:
+                jobs.append((slot_number, img, description))
+        
+        if not jobs:
+            return recognized
+        
+        valid_results, debug_images = evaluate_paddle_jobs(jobs, area_type)
+    
+    for slot_number in methods_count:
+        try:
+            recognized[slot_number] = finalize_paddle_results(
+                valid_results.get(slot_number, []), debug_images.get(slot_number, []),
+                slot_number, methods_count[slot_number]
+            )
+            
+            if recognized[slot_number] is None:
+                continue
+            confidence = max(r['confidence'] for r in valid_results[slot_number]
+                             if r['value'] == recognized[slot_number])
+            confidences[slot_number] = confidence
+            
+            # Solo i risultati affidabili entrano in cache
+            if slot_number in roi_hashes and confidence >= app.ocr_cache_min_confidence:
+                app.ocr_cache.put(slot_number, roi_hashes[slot_number],
+                                  recognized[slot_number], confidence)
+            
+            # ...e diventano campioni per il riconoscitore a template
+            if app.digit_fast_path_enabled and confidence >= app.digit_harvest_min_confidence:
+                app.digit_recognizer.harvest(rois[slot_number], recognized[slot_number])
+        except Exception as e:
+            area_name = "SPN" if slot_number == 1 else "FMI"
+            log_message(f"❌ {area_name} CRITICAL ERROR: {str(e)}")
+    
+    return recognized
+
+def recognize_number_areas(rois, area_type="Number", fresh=False):
+    """
+    Riconosce tutte le aree numeriche (SPN/FMI) insieme.
+    Le aree già viste (app.ocr_cache) vengono servite dalla cache, poi si prova il
+    riconoscitore a template (app.digit_recognizer) e solo dopo PaddleOCR.
+    In modalità cascata (app.ocr_cascade_enabled) le varianti vengono valutate in ordine
+    di costo fermandosi al primo risultato affidabile; altrimenti tutte le varianti
+    di tutte le aree vengono valutate insieme (in batch se app.ocr_batch_mode).
+    
+    Args:
+        rois: Dizionario {slot_number: roi}
+        fresh: salta cache e fast path (voti indipendenti del burst)
+    
+    Returns:
+        dict: {slot_number: valore riconosciuto o None}
+    """
+    # Attesa dell'inizializzazione FUORI dal lock: il test di avvio usa questa stessa funzione
+    if not ensure_paddle_ocr_ready():
+        log_message("❌ PaddleOCR not available")
+        return {slot_number: None for slot_number in rois}
+    
+    # I buffer dei preprocessor sono condivisi: un riconoscimento alla volta
+    with app.ocr_lock:
+        confidences = {}
+        recognized = run_number_recognition(rois, area_type, confidences, fresh)
+        app.last_number_confidences = confidences
+        return recognized
+
+def recognize_with_paddle_ocr(roi, area_type, slot_number):
+    """Riconoscimento con PaddleOCR standard - versione finale con debug condizionale"""
+    try:
+        return recognize_number_areas({slot_number: roi}, area_type).get(slot_number)
         
     except Exception as e:
         area_name = "SPN" if slot_number == 1 else "FMI"
         log_message(f"❌ {area_name} CRITICAL ERROR: {str(e)}")
         return None
 
-def create_simple_test_image():
-    """Crea immagine di test ottimale"""
-    # Immagine bianca 200x80
-    img = np.ones((80, 200, 3), dtype=np.uint8) * 255
-    
-    # Testo nero grande e chiaro
-    cv2.putText(img, "12345", (30, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
-    
-    return img
-
 def initialize_paddle_ocr():
     """Inizializzazione per PaddleOCR standard"""
     if app.paddle_ocr is not None and app.paddle_initialized:
@@ -1176,14 +1795,816 @@ def force_paddle_debug_test():
     except Exception as e:
         log_message(f"❌ Debug test error: {str(e)}")
 
-def test_paddle_debug_creation():
+
+def start_paddle_background_init():
     """
-    Testa la creazione delle cartelle debug PaddleOCR
+    Avvia import, inizializzazione e warm-up di PaddleOCR in un thread separato.
+    La UI resta utilizzabile; il riconoscimento attende app.paddle_ready.
+    
+    Returns:
+        Future: completata con True/False a inizializzazione terminata
     """
-    log_message("🧪 Testing PaddleOCR debug creation...")
+    if app.paddle_ready is not None:
+        return app.paddle_ready
     
-    try:
-        # Simula debug_images
+    app.paddle_ready = Future()
+    
+    def paddle_init_thread():
+        ready = False
+        try:
+            log_time("PaddleOCR background init start")
+            phase_start = time.time()
+            import paddleocr  # Import pesante (paddle + modelli): mai sul thread Tk
+            log_time(f"PaddleOCR import done ({time.time() - phase_start:.2f}s)")
+            
+            phase_start = time.time()
+            ready = initialize_paddle_ocr()
+            log_time(f"PaddleOCR init done ({time.time() - phase_start:.2f}s)")
+            
+            if ready:
+                phase_start = time.time()
+                # Crea subito una cartella debug di test
+                force_paddle_debug_test()
+                log_time(f"PaddleOCR warm-up done ({time.time() - phase_start:.2f}s)")
+                log_message("✅ Application ready with PaddleOCR")
+                # Worker OCR in processi separati (warm-up in background, fino ad allora OCR in-process)
+                start_ocr_worker_pool()
+            else:
+                log_message("❌ CRITICAL ERROR: Cannot initialize PaddleOCR!")
+                log_message("❌ Application cannot function without OCR engine")
+        except Exception as e:
+            log_message(f"❌ PaddleOCR background initialization failed: {str(e)}")
+        finally:
+            app.paddle_ready.set_result(ready)
+    
+    threading.Thread(target=paddle_init_thread, name="PaddleInit", daemon=True).start()
+    return app.paddle_ready
+
+def ensure_paddle_ocr_ready():
+    """
+    Attende che PaddleOCR sia pronto. Se l'inizializzazione in background non è stata
+    avviata (o è fallita) la esegue in modo sincrono come in passato.
+    """
+    if app.paddle_ocr is not None and app.paddle_initialized:
+        return True
+    
+    future = app.paddle_ready
+    if future is None:
+        return initialize_paddle_ocr()
+    
+    if not future.done():
+        log_message("⏳ Waiting for PaddleOCR initialization...")
+    try:
+        if future.result(timeout=app.paddle_ready_timeout):
+            return True
+    except FutureTimeoutError:
+        log_message(f"❌ PaddleOCR not ready after {app.paddle_ready_timeout:.0f}s")
+        return False
+    
+    # Inizializzazione in background fallita: nuovo tentativo sincrono
+    return initialize_paddle_ocr()
+
+
+def get_number_area_rois(frame):
+    """ROI delle aree numeriche selezionate: {slot_number: roi} (ROI vuote escluse)"""
+    rois = {}
+    for area in app.areas:
+        if len(area) < 6 or area[4] != "Number":
+            continue
+        x1, y1, x2, y2, _, slot_number = area
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        if frame is not None:
+            roi = frame[y1:y2, x1:x2]
+        else:
+            # Nessun frame disponibile: basta una ROI della stessa dimensione
+            roi = np.full((y2 - y1, x2 - x1, 3), 255, dtype=np.uint8)
+        if roi.size > 0:
+            rois[slot_number] = roi
+    return rois
+
+def warm_up_paddle_for_areas(frame=None):
+    """
+    Warm-up del predictor alle dimensioni REALI delle ROI selezionate: il predictor Paddle
+    alloca e ottimizza pigramente per ogni nuova forma di input, quindi la prima
+    acquisizione vera pagherebbe questo costo. Le forme già viste vengono saltate.
+    
+    Returns:
+        int: numero di nuove forme scaldate
+    """
+    if not ensure_paddle_ocr_ready():
+        return 0
+    
+    rois = get_number_area_rois(frame if frame is not None else app.frame)
+    if not rois:
+        return 0
+    
+    variants = {slot_number: preprocess_for_paddle(roi, "Number", slot_number)
+                for slot_number, roi in rois.items()}
+    jobs = [((slot_number, description, img.shape), img)
+            for slot_number, processed_images in variants.items()
+            for img, description in processed_images]
+    if all(key in app.paddle_warmed_shapes for key, _ in jobs):
+        return 0
+    
+    start_time = time.time()
+    images = [img for _, img in jobs]
+    
+    # Recognition-only alle altezze normalizzate usate in produzione
+    target_height = get_paddle_rec_input_height()
+    rec_images = [normalize_for_recognizer(img, target_height) for img in images]
+    safe_paddle_rec_call(rec_images)
+    if app.ocr_pool is not None and app.ocr_pool.is_ready():
+        app.ocr_pool.run_jobs([(key[0], img, key[1]) for (key, _), img in zip(jobs, rec_images)], True)
+    
+    # Detection con gli stessi input del riconoscimento: mosaici per stadio della cascata,
+    # mosaico completo, oppure le singole varianti
+    if app.ocr_batch_mode and app.ocr_cascade_enabled:
+        for stage in PADDLE_CASCADE_ORDER:
+            stage_images = [img for processed_images in variants.values()
+                            for img, description in processed_images if description == stage]
+            if len(stage_images) > 1:
+                safe_paddle_ocr_batch_call(stage_images)
+            elif stage_images:
+                safe_paddle_ocr_call(stage_images[0])
+    elif app.ocr_batch_mode and len(images) > 1:
+        safe_paddle_ocr_batch_call(images)
+    else:
+        for img in images:
+            safe_paddle_ocr_call(img)
+    
+    for key, _ in jobs:
+        app.paddle_warmed_shapes.add(key)
+    
+    log_message(f"🔥 PaddleOCR warm-up: {len(jobs)} ROI shapes in {time.time() - start_time:.2f}s")
+    return len(jobs)
+
+def schedule_paddle_warmup(frame=None):
+    """Avvia il warm-up sulle aree correnti in un thread separato (uno alla volta)"""
+    if app.paddle_warmup_running:
+        return
+    
+    frame = frame.copy() if frame is not None else (app.frame.copy() if app.frame is not None else None)
+    app.paddle_warmup_running = True
+    
+    def warmup_thread():
+        try:
+            warm_up_paddle_for_areas(frame)
+        except Exception as e:
+            log_message(f"⚠️ PaddleOCR warm-up failed: {str(e)}")
+        finally:
+            app.paddle_warmup_running = False
+    
+    threading.Thread(target=warmup_thread, name="PaddleWarmup", daemon=True).start()
+
+
+# ====== OCR Result Cache ======
+def compute_roi_hash(roi):
+    """
+    dHash della ROI binarizzata (stessa binarizzazione Otsu della variante binary_otsu).
+    
+    Returns:
+        tuple: (shape della ROI, hash come intero di OCR_CACHE_HASH_SIZE bit)
+    """
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    
+    hash_width, hash_height = OCR_CACHE_HASH_GRID
+    small = cv2.resize(binary, (hash_width + 1, hash_height), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return roi.shape[:2], int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+class OCRResultCache:
+    """
+    Cache LRU dei risultati OCR indicizzata per (slot, hash percettivo della ROI).
+    Un hash a distanza di Hamming <= max_distance da uno in cache è considerato la stessa ROI.
+    
+    Il default è 0 (hash identico): su un'area numerica ogni cifra copre poche colonne
+    del dHash e un solo tratto (8 contro 9, 3 contro 9) cambia un numero di bit simile
+    a quello del rumore, quindi una tolleranza restituirebbe il valore di un'altra cifra.
+    """
+    
+    def __init__(self, max_size=128, max_distance=0):
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.entries = OrderedDict()  # (slot, shape, hash) -> {'value', 'confidence'}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, slot_number, roi_hash):
+        """Ritorna {'value', 'confidence'} oppure None"""
+        shape, hash_value = roi_hash
+        with self.lock:
+            key = (slot_number, shape, hash_value)
+            if key not in self.entries and self.max_distance > 0:
+                # Ricerca per distanza di Hamming (la cache è piccola)
+                key = next((k for k in reversed(self.entries)
+                            if k[0] == slot_number and k[1] == shape
+                            and bin(k[2] ^ hash_value).count('1') <= self.max_distance), None)
+            
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+    
+    def put(self, slot_number, roi_hash, value, confidence):
+        shape, hash_value = roi_hash
+        with self.lock:
+            key = (slot_number, shape, hash_value)
+            self.entries[key] = {'value': value, 'confidence': confidence}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+    
+    def get_stats(self):
+        """Statistiche correnti della cache"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / lookups * 100) if lookups else 0.0
+            }
+
+def invalidate_ocr_state(reason):
+    """Invalida lo stato OCR derivato dalle aree/threshold correnti (cache risultati e change gate)"""
+    if app.ocr_cache.entries:
+        log_message(f"🧹 OCR cache cleared ({reason})")
+    app.ocr_cache.clear()
+    app.last_number_rois = {}
+    app.last_number_values = {}
+
+
+# ====== Digit Template Recognizer ======
+class DigitTemplateRecognizer:
+    """
+    Riconoscitore classico per il font fisso del cluster: segmentazione a componenti
+    connesse + k-NN (similarità coseno) su glifi normalizzati. Nessun modello deep:
+    pochi millisecondi per ROI. I campioni vengono raccolti automaticamente dai
+    risultati PaddleOCR ad alta confidenza e salvati in DIGIT_TEMPLATES_DIR/<cifra>/.
+    
+    La similarità assoluta non separa le cifre simili (8 contro 0/6/9 supera 0.9 sui
+    glifi binarizzati): la decisione usa il margine tra la classe migliore e la seconda.
+    La soglia del margine (min_margin) è calibrata leave-one-out sui campioni: deve
+    superare il margine di ogni campione classificato male tenendolo fuori.
+    """
+    
+    def __init__(self, templates_dir=DIGIT_TEMPLATES_DIR, k=3, max_samples_per_digit=40):
+        self.templates_dir = templates_dir
+        self.k = k
+        self.max_samples_per_digit = max_samples_per_digit
+        self.samples = {str(digit): [] for digit in range(10)}
+        self.matrix = None
+        self.labels = []
+        self.label_array = np.array([])
+        self.min_margin = None  # Soglia calibrata; None finché non ci sono campioni per ogni cifra
+        self.loaded = False
+        self.lock = threading.Lock()
+    
+    def load(self):
+        """Carica i template salvati (una sola volta)"""
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            
+            for digit in self.samples:
+                digit_dir = os.path.join(self.templates_dir, digit)
+                if not os.path.isdir(digit_dir):
+                    continue
+                for filename in sorted(os.listdir(digit_dir))[-self.max_samples_per_digit:]:
+                    glyph = cv2.imread(os.path.join(digit_dir, filename), cv2.IMREAD_GRAYSCALE)
+                    if glyph is not None and glyph.shape[::-1] == DIGIT_GLYPH_SIZE:
+                        self.samples[digit].append(self._to_vector(glyph))
+            self._rebuild()
+        
+        total = sum(len(v) for v in self.samples.values())
+        if total:
+            log_message(f"🔢 Digit templates loaded: {total} samples "
+                       f"({sum(1 for v in self.samples.values() if v)} digits)")
+            if self.min_margin is not None:
+                log_message(f"🔢 Digit fast path calibrated: min margin {self.min_margin:.3f}")
+    
+    def _rebuild(self):
+        vectors = []
+        self.labels = []
+        for digit, digit_samples in self.samples.items():
+            vectors.extend(digit_samples)
+            self.labels.extend([digit] * len(digit_samples))
+        self.matrix = np.vstack(vectors) if vectors else None
+        self.label_array = np.array(self.labels)
+        self.min_margin = self._calibrate() if self.is_trained() else None
+    
+    def is_trained(self):
+        """True solo con almeno DIGIT_MIN_SAMPLES_PER_DIGIT campioni per ogni cifra 0-9"""
+        return (self.matrix is not None and
+                all(len(v) >= DIGIT_MIN_SAMPLES_PER_DIGIT for v in self.samples.values()))
+    
+    def _classify(self, similarities, keep=None):
+        """
+        Classe migliore e margine sulla seconda per una riga di similarità.
+        Il punteggio di una classe è la media dei suoi k campioni più simili;
+        keep (maschera booleana) esclude campioni dal confronto.
+        """
+        scores = {}
+        for digit in self.samples:
+            mask = self.label_array == digit
+            if keep is not None:
+                mask &= keep
+            class_similarities = similarities[mask]
+            if class_similarities.size == 0:
+                continue
+            k = min(self.k, class_similarities.size)
+            scores[digit] = float(np.partition(class_similarities, -k)[-k:].mean())
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        best_digit, best_score = ranked[0]
+        margin = best_score - ranked[1][1] if len(ranked) > 1 else best_score
+        return best_digit, best_score, margin
+    
+    def _calibrate(self):
+        """
+        Soglia del margine da una validazione leave-one-out sui campioni: il margine più
+        alto tra i campioni classificati male (tenuti fuori) + DIGIT_MARGIN_SAFETY.
+        """
+        similarities = self.matrix @ self.matrix.T
+        keep = np.ones(len(self.labels), dtype=bool)
+        worst_error_margin = 0.0
+        errors = 0
+        for idx, row in enumerate(similarities):
+            keep[idx] = False
+            digit, _, margin = self._classify(row, keep)
+            keep[idx] = True
+            if digit != self.labels[idx]:
+                errors += 1
+                worst_error_margin = max(worst_error_margin, margin)
+        if errors:
+            log_message(f"🔢 Digit templates: {errors}/{len(self.labels)} held-out samples misclassified")
+        return worst_error_margin + DIGIT_MARGIN_SAFETY
+    
+    @staticmethod
+    def _to_vector(glyph):
+        vector = glyph.astype(np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    @staticmethod
+    def segment(roi):
+        """
+        Segmenta la ROI in glifi normalizzati (DIGIT_GLYPH_SIZE, uint8), da sinistra a destra.
+        Componenti sovrapposte in orizzontale vengono unite (segmenti separati della stessa cifra).
+        """
+        gray = roi_to_gray(roi)
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Le cifre sono la minoranza dei pixel: le vogliamo bianche su nero
+        if cv2.countNonZero(binary) > binary.size // 2:
+            binary = cv2.bitwise_not(binary)
+        
+        count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        roi_height = binary.shape[0]
+        boxes = []
+        for i in range(1, count):
+            x, y, w, h, area = stats[i]
+            if area < DIGIT_MIN_COMPONENT_AREA or h < roi_height * 0.15:
+                continue  # Rumore
+            boxes.append([x, y, x + w, y + h])
+        if not boxes:
+            return []
+        
+        boxes.sort()
+        merged = [boxes[0]]
+        for x1, y1, x2, y2 in boxes[1:]:
+            last = merged[-1]
+            if x1 <= last[2]:
+                last[1], last[2], last[3] = min(last[1], y1), max(last[2], x2), max(last[3], y2)
+            else:
+                merged.append([x1, y1, x2, y2])
+        
+        # Scarta segni più bassi delle cifre (trattini, punti)
+        max_height = max(y2 - y1 for _, y1, _, y2 in merged)
+        glyphs = []
+        for x1, y1, x2, y2 in merged:
+            if y2 - y1 < max_height * 0.5:
+                continue
+            glyph = binary[y1:y2, x1:x2]
+            
+            # Padding all'aspect ratio del glifo normalizzato, poi resize
+            glyph_width, glyph_height = DIGIT_GLYPH_SIZE
+            h, w = glyph.shape
+            target_w = max(w, int(round(h * glyph_width / glyph_height)))
+            target_h = max(h, int(round(w * glyph_height / glyph_width)))
+            pad_x, pad_y = target_w - w, target_h - h
+            glyph = cv2.copyMakeBorder(glyph, pad_y // 2, pad_y - pad_y // 2,
+                                       pad_x // 2, pad_x - pad_x // 2, cv2.BORDER_CONSTANT, value=0)
+            glyphs.append(cv2.resize(glyph, DIGIT_GLYPH_SIZE, interpolation=cv2.INTER_AREA))
+        return glyphs
+    
+    def recognize(self, roi):
+        """
+        Returns:
+            tuple: (testo, similarità, margine) - minimi tra le cifre - oppure None
+                   se il riconoscitore non è ancora addestrato su tutte le cifre
+        """
+        self.load()
+        glyphs = self.segment(roi)
+        if not glyphs:
+            return None
+        
+        with self.lock:
+            if not self.is_trained():
+                return None
+            vectors = np.vstack([self._to_vector(glyph) for glyph in glyphs])
+            similarities = vectors @ self.matrix.T
+            
+            text = ""
+            similarity = 1.0
+            margin = 1.0
+            for row in similarities:
+                digit, score, digit_margin = self._classify(row)
+                similarity = min(similarity, score)
+                margin = min(margin, digit_margin)
+                text += digit
+        
+        return text, similarity, margin
+    
+    def harvest(self, roi, value):
+        """Aggiunge i glifi di una ROI riconosciuta con certezza come campioni di training"""
+        self.load()
+        value_str = str(value)
+        glyphs = self.segment(roi)
+        if len(glyphs) != len(value_str):
+            return 0
+        
+        added = 0
+        with self.lock:
+            for digit, glyph in zip(value_str, glyphs):
+                if len(self.samples[digit]) >= self.max_samples_per_digit:
+                    continue
+                # Un glifo riconosciuto con sicurezza come un'altra cifra è una lettura PaddleOCR
+                # sbagliata: non deve diventare un template (persisterebbe tra le sessioni)
+                if self.min_margin is not None:
+                    predicted, _, margin = self._classify(self.matrix @ self._to_vector(glyph))
+                    if predicted != digit and margin >= self.min_margin:
+                        continue
+                try:
+                    digit_dir = os.path.join(self.templates_dir, digit)
+                    os.makedirs(digit_dir, exist_ok=True)
+                    cv2.imwrite(os.path.join(digit_dir, f"{int(time.time() * 1000)}_{added}.png"), glyph)
+                except Exception:
+                    pass  # Il campione resta comunque in memoria
+                self.samples[digit].append(self._to_vector(glyph))
+                added += 1
+            if added:
+                self._rebuild()
+        return added
+
+
+# ====== Change Detection Gate ======
+def roi_to_gray(roi):
+    return cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+
+def roi_block_max_diff(gray, previous):
+    """
+    Massima differenza media assoluta tra blocchi quadrati di mezza altezza della ROI
+    (circa mezzo glifo): una sola cifra cambiata in una ROI SPN larga resta visibile,
+    mentre la media sull'intera ROI la diluirebbe sotto la soglia.
+    """
+    diff = cv2.absdiff(gray, previous)
+    height, width = diff.shape[:2]
+    block = max(4, height // 2)
+    grid = (max(1, (width + block - 1) // block), max(1, (height + block - 1) // block))
+    return float(cv2.resize(diff, grid, interpolation=cv2.INTER_AREA).max())
+
+def number_rois_unchanged(number_rois):
+    """
+    True se tutte le ROI numeriche sono uguali a quelle dell'ultimo riconoscimento:
+    differenza media assoluta di ogni blocco (roi_block_max_diff) <= app.ocr_change_threshold.
+    """
+    if not app.last_number_rois or set(number_rois) != set(app.last_number_rois):
+        return False
+    
+    for slot_number, roi in number_rois.items():
+        previous = app.last_number_rois[slot_number]
+        gray = roi_to_gray(roi)
+        if gray.shape != previous.shape:
+            return False
+        if roi_block_max_diff(gray, previous) > app.ocr_change_threshold:
+            return False
+    return True
+
+def remember_number_rois(number_rois, numbers):
+    """Memorizza ROI e valori come riferimento per il change gate (solo se tutto è stato riconosciuto)"""
+    if all(numbers.get(slot_number) is not None for slot_number in number_rois):
+        app.last_number_rois = {slot_number: roi_to_gray(roi).copy() for slot_number, roi in number_rois.items()}
+        app.last_number_values = dict(numbers)
+    else:
+        app.last_number_rois = {}
+        app.last_number_values = {}
+
+
+# ====== Lamp Engine ======
+def lamp_luma(roi):
+    """Luminanza media (BT.601) di una ROI BGR calcolata con cv2.mean, senza copie in float"""
+    blue, green, red, _ = cv2.mean(roi)
+    return 0.299 * red + 0.587 * green + 0.114 * blue
+
+class LampEngine:
+    """
+    Stato delle lampade (slot 1 = Amber, slot 2 = Red) da tutte le aree Lamp del frame.
+    
+    Per ogni frame calcola la luminanza di ogni ROI lampada (una passata cv2.mean) e
+    applica la soglia con isteresi: la lampada si accende sopra la soglia e si spegne
+    solo sotto soglia - LAMP_HYSTERESIS. Uno storico di LAMP_WINDOW_SECONDS per lampada
+    permette di riconoscere le spie lampeggianti (BLINKING), che contano come accese.
+    """
+    ON = "ON"
+    OFF = "OFF"
+    BLINKING = "BLINKING"
+    
+    def __init__(self, window_seconds=LAMP_WINDOW_SECONDS, hysteresis=LAMP_HYSTERESIS):
+        self.window_seconds = window_seconds
+        self.hysteresis = hysteresis
+        self.lock = threading.Lock()
+        self.lamps = {}  # slot -> {'area', 'on', 'history': deque[(timestamp, on)]}
+        self.last_frame = None
+        self.last_result = {}
+    
+    def reset(self):
+        with self.lock:
+            self.lamps.clear()
+            self.last_frame = None
+            self.last_result = {}
+    
+    def update(self, frame, threshold, areas=None, timestamp=None):
+        """
+        Aggiorna lo stato di tutte le lampade con il frame.
+        
+        Lo stesso frame (anteprima e riconoscimento leggono dal thread di cattura)
+        viene conteggiato una sola volta nello storico.
+        
+        Returns:
+            dict: slot -> (luminanza, acceso, stato ON/OFF/BLINKING)
+        """
+        timestamp = timestamp if timestamp is not None else time.time()
+        areas = app.areas if areas is None else areas
+        
+        with self.lock:
+            if frame is self.last_frame:
+                return self.last_result
+            
+            result = {}
+            for area in areas:
+                if len(area) < 6 or area[4] != "Lamp":
+                    continue
+                x1, y1, x2, y2, _, slot_number = area
+                x1, x2 = min(x1, x2), max(x1, x2)
+                y1, y2 = min(y1, y2), max(y1, y2)
+                roi = frame[y1:y2, x1:x2]
+                if roi.size == 0:
+                    continue
+                
+                luma = lamp_luma(roi)
+                
+                lamp = self.lamps.get(slot_number)
+                if lamp is None or lamp['area'] != (x1, y1, x2, y2):
+                    # Area nuova o ridisegnata: lo storico precedente non vale più
+                    lamp = {'area': (x1, y1, x2, y2), 'on': luma > threshold, 'history': deque()}
+                    self.lamps[slot_number] = lamp
+                
+                # Isteresi attorno alla soglia
+                if lamp['on']:
+                    lamp['on'] = luma >= threshold - self.hysteresis
+                else:
+                    lamp['on'] = luma > threshold
+                
+                history = lamp['history']
+                history.append((timestamp, lamp['on']))
+                while history and timestamp - history[0][0] > self.window_seconds:
+                    history.popleft()
+                
+                transitions = sum(1 for previous, current in zip(history, list(history)[1:])
+                                  if previous[1] != current[1])
+                if transitions >= LAMP_BLINK_MIN_TRANSITIONS:
+                    state = self.BLINKING
+                else:
+                    state = self.ON if lamp['on'] else self.OFF
+                
+                result[slot_number] = (luma, state != self.OFF, state)
+            
+            self.last_frame = frame
+            self.last_result = result
+            return result
+
+# ====== OCR Worker Pool ======
+class OCRWorkerPool:
+    """
+    Pool di processi OCR persistenti. Ogni worker tiene la propria istanza PaddleOCR
+    già scaldata; le ROI viaggiano in SharedMemory e i risultati tornano su una coda
+    letta da un thread dispatcher che completa le Future corrispondenti.
+    
+    Il worker (paddle_ocr_worker.ocr_worker_main) vive in un modulo separato: con "spawn"
+    i processi figli importano solo quello, non lo script con Tk, CAN e AppState.
+    """
+    
+    def __init__(self, worker_count=2):
+        self.worker_count = worker_count
+        self.context = multiprocessing.get_context("spawn")
+        self.task_queue = None
+        self.result_queue = None
+        self.workers = []
+        self.ready_workers = set()
+        self.failed_workers = set()
+        self.pending = {}  # task_id -> (Future, SharedMemory)
+        self.lock = threading.Lock()
+        self.task_counter = 0
+        self.dispatcher = None
+        self.running = False
+    
+    def start(self):
+        """Avvia i processi worker e il thread dispatcher (non attende il warm-up)"""
+        if self.running:
+            return
+        
+        self.task_queue = self.context.Queue()
+        self.result_queue = self.context.Queue()
+        self.running = True
+        
+        for worker_id in range(self.worker_count):
+            process = self.context.Process(
+                target=ocr_worker_main,
+                args=(worker_id, self.task_queue, self.result_queue),
+                name=f"OCRWorker-{worker_id}",
+                daemon=True
+            )
+            process.start()
+            self.workers.append(process)
+        
+        self.dispatcher = threading.Thread(target=self._dispatch_results, name="OCRPoolDispatcher", daemon=True)
+        self.dispatcher.start()
+        log_message(f"🔧 OCR worker pool starting ({self.worker_count} processes)")
+    
+    def is_ready(self):
+        """True se almeno un worker ha completato il warm-up ed è ancora vivo"""
+        with self.lock:
+            ready_workers = list(self.ready_workers)
+        return self.running and any(self.workers[w].is_alive() for w in ready_workers)
+    
+    def _dispatch_results(self):
+        """Thread dispatcher: smista i messaggi dei worker sulle Future in attesa"""
+        while self.running:
+            try:
+                message = self.result_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            
+            if message[0] == 'ready':
+                _, worker_id, error = message
+                with self.lock:
+                    if error is None:
+                        self.ready_workers.add(worker_id)
+                    else:
+                        self.failed_workers.add(worker_id)
+                    ready_count = len(self.ready_workers)
+                if error is None:
+                    log_message(f"✅ OCR worker {worker_id} ready ({ready_count}/{self.worker_count})")
+                else:
+                    log_message(f"❌ OCR worker {worker_id} failed to start: {error}")
+                continue
+            
+            _, task_id, results, error = message
+            with self.lock:
+                future, shm = self.pending.pop(task_id, (None, None))
+            if shm is not None:
+                self._release_shm(shm)
+            if future is None:
+                continue
+            if error is None:
+                future.set_result(results)
+            else:
+                future.set_exception(RuntimeError(error))
+    
+    @staticmethod
+    def _release_shm(shm):
+        try:
+            shm.close()
+            shm.unlink()
+        except Exception:
+            pass
+    
+    def submit(self, images, rec_only):
+        """Invia un gruppo di immagini a un worker; ritorna una Future con un risultato per immagine"""
+        shm, specs = pack_images_to_shared_memory(images)
+        future = Future()
+        with self.lock:
+            self.task_counter += 1
+            task_id = self.task_counter
+            # La SharedMemory resta viva finché il worker non risponde (anche dopo un timeout)
+            self.pending[task_id] = (future, shm)
+        self.task_queue.put((task_id, shm.name, specs, rec_only))
+        return future
+    
+    def run_jobs(self, jobs, rec_only):
+        """
+        Esegue le varianti (slot, immagine, descrizione) raggruppate per area,
+        un task per area in parallelo sui worker.
+        
+        Returns:
+            list: risultati nello stesso ordine di jobs, oppure None in caso di errore/timeout
+        """
+        groups = {}
+        for idx, (slot_number, img, _) in enumerate(jobs):
+            groups.setdefault(slot_number, []).append((idx, img))
+        
+        try:
+            futures = [(group, self.submit([img for _, img in group], rec_only))
+                       for group in groups.values()]
+            
+            results = [None] * len(jobs)
+            deadline = time.time() + app.ocr_worker_timeout
+            for group, future in futures:
+                group_results = future.result(timeout=max(0.0, deadline - time.time()))
+                for (idx, _), result in zip(group, group_results):
+                    results[idx] = result
+            return results
+            
+        except FutureTimeoutError:
+            log_message(f"⚠️ OCR worker pool timeout ({app.ocr_worker_timeout:.0f}s)")
+            return None
+        except Exception as e:
+            log_message(f"❌ OCR worker pool error: {str(e)}")
+            return None
+    
+    def stop(self):
+        """Ferma i worker e libera la memoria condivisa ancora in uso"""
+        if not self.running:
+            return
+        self.running = False
+        
+        for _ in self.workers:
+            try:
+                self.task_queue.put(None)
+            except Exception:
+                pass
+        for process in self.workers:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        
+        # Il dispatcher esce entro il timeout della get() dopo running = False
+        if self.dispatcher is not None and self.dispatcher is not threading.current_thread():
+            self.dispatcher.join(timeout=2.0)
+        self.dispatcher = None
+        
+        with self.lock:
+            for future, shm in self.pending.values():
+                self._release_shm(shm)
+                future.cancel()
+            self.pending.clear()
+            self.ready_workers.clear()
+        
+        self.workers = []
+
+def start_ocr_worker_pool():
+    """Avvia il pool di worker OCR se abilitato"""
+    if not app.ocr_use_worker_pool or app.ocr_pool is not None:
+        return
+    
+    try:
+        app.ocr_pool = OCRWorkerPool(app.ocr_worker_count)
+        app.ocr_pool.start()
+        atexit.register(stop_ocr_worker_pool)
+    except Exception as e:
+        log_message(f"⚠️ OCR worker pool not available, using in-process OCR: {str(e)}")
+        app.ocr_pool = None
+
+def stop_ocr_worker_pool():
+    """Ferma il pool di worker OCR (chiamato anche all'uscita)"""
+    if app.ocr_pool is not None:
+        app.ocr_pool.stop()
+        app.ocr_pool = None
+
+def test_paddle_debug_creation():
+    """
+    Testa la creazione delle cartelle debug PaddleOCR
+    """
+    log_message("🧪 Testing PaddleOCR debug creation...")
+    
+    try:
+        # Simula debug_images
         test_debug_images = [
             {
                 'image': np.ones((50, 100, 3), dtype=np.uint8) * 128,
@@ -1454,6 +2875,7 @@ class AppState:
     def __init__(self):
         # Webcam & frame variables
         self.cap = None
+        self.frame_grabber = None  # Thread di cattura con ring buffer (unico lettore di cap)
         self.selected_camera = 0
         self.frame = None
         self.current_frame = None
@@ -1468,24 +2890,67 @@ class AppState:
         self.webcam_exposure = -8
         self.webcam_focus = 73 
         self.webcam_initialized = False
+        self.webcam_property_debounce = 0.15  # Secondi di quiete dello slider prima di applicare i parametri
+        self.pending_webcam_properties = {}  # Parametri richiesti senza thread di cattura attivo
         
         # Proprietà per la Live View
         self.live_view_active = False
         self.slider_changed = False
+        self.preview_renderer = None  # PreviewRenderer (live view e anteprima durante il riconoscimento)
+        self.preview_min_interval = 0.033  # Intervallo minimo del pump di anteprima (~30 fps)
+        self.preview_max_interval = 0.2    # Intervallo massimo quando il thread Tk è carico (5 fps)
         
 
         # PaddleOCR configuration
         self.paddle_ocr = None
         self.paddle_initialized = False
+        self.paddle_ready = None  # Future dell'inizializzazione in background (True/False)
+        self.paddle_ready_timeout = 120.0  # Attesa massima del riconoscimento durante l'avvio
+        self.paddle_lock = threading.Lock()  # Il predictor Paddle non è thread-safe (warm-up vs riconoscimento)
+        self.paddle_warmed_shapes = set()  # Forme (slot, variante, shape) già passate nel predictor
+        self.paddle_warmup_running = False
+        self.ocr_batch_mode = True  # Varianti SPN/FMI in un mosaico per chiamata (con la cascata: un mosaico per stadio)
+        self.paddle_mosaic_buffer = None  # Buffer del mosaico, riutilizzato finché la geometria non cambia
+        self.ocr_mosaic_verify = False  # Debug: confronta il mosaico con le chiamate singole
+        self.ocr_mosaic_verify_stats = {'checked': 0, 'mismatches': 0}
+        self.ocr_recognition_only = True  # Salta la detection: le ROI SPN/FMI sono già strette
+        self.ocr_rec_min_confidence = 0.85  # Sotto questa confidenza si torna alla detection completa
+        self.ocr_cascade_enabled = True  # Varianti in ordine di costo con uscita anticipata
+        self.ocr_cascade_min_confidence = 0.90  # Confidenza minima per uscire dalla cascata
+        self.ocr_cascade_stats = {stage: {'runs': 0, 'hits': 0} for stage in PADDLE_CASCADE_ORDER}
+        self.ocr_use_worker_pool = False  # OCR in processi separati (uno per area SPN/FMI): un'istanza PaddleOCR in più per worker
+        self.ocr_worker_count = 2
+        self.ocr_worker_timeout = 15.0  # Secondi oltre i quali si torna all'OCR in-process
+        self.ocr_pool = None
+        self.ocr_cache_enabled = True  # Cache LRU dei risultati per ROI identiche (stesso dHash)
+        self.ocr_cache_min_confidence = 0.90  # Confidenza minima per entrare in cache
+        self.ocr_cache = OCRResultCache(max_size=128)  # Solo hash identici per le aree SPN/FMI
+        self.ocr_change_gate_enabled = True  # Salta l'OCR se le aree numeriche non sono cambiate
+        self.ocr_change_threshold = 8.0  # Differenza media assoluta massima per blocco (livelli di grigio) considerata "invariata"
+        self.last_number_rois = {}  # ROI in scala di grigi dell'ultimo riconoscimento completo
+        self.last_number_values = {}
+        self.last_number_confidences = {}  # Confidenze dell'ultimo recognize_number_areas
+        self.burst_max_frames = 5  # Frame massimi per acquisizione (voto temporale)
+        self.burst_consensus_votes = 2  # Frame concordi necessari per fermare il burst
+        self.digit_fast_path_enabled = True  # Riconoscitore a template prima di PaddleOCR
+        self.digit_fast_path_min_margin = 0.05  # Margine minimo sulla seconda cifra (oltre alla soglia calibrata)
+        self.digit_harvest_min_confidence = 0.95  # Risultati PaddleOCR usati come campioni di training
+        self.digit_recognizer = DigitTemplateRecognizer()
+        self.ocr_lock = threading.RLock()  # Serializza i riconoscimenti (buffer di preprocessing condivisi)
+        self.paddle_preprocessors = {}  # slot_number -> PaddlePreprocessor con buffer preallocati
+        self.ocr_debug_images = True  # Conserva le varianti per salvarle in caso di errore OCR
 
         # OCR threshold per il riconoscimento numeri
         self.ocr_threshold = 240
         
         # Manteniamo solo il threshold per le lampade
         self.lamp_threshold = 10
+        self.lamp_engine = LampEngine()  # Luminanza, isteresi e lampeggio di tutte le lampade
         
         # Riferimento al pannello di threshold preview
         self.threshold_preview_panel = None
+        self.threshold_surface = None  # DisplaySurface del pannello di threshold preview
+        self.preview_surface = None    # DisplaySurface del pannello principale
         
         # Resolution settings
         self.selected_resolution = "800x600"
@@ -1538,6 +3003,8 @@ class AppState:
         self.dm1_thread_running = False
         self.dm1_paused = False
         self.dm1_counter = 1
+        self.dm1_group_size = 1  # DTC per messaggio DM1 (>1: J1939 BAM)
+        self.dm1_group_page_time = 5.0  # Secondi per pagina guasto del cruscotto nei DM1 multi-DTC
         self.is_canalyzer_mode = False  # Default in modalità Canalyzer
         
         # Risultati dei test
@@ -1606,34 +3073,39 @@ def log_message(message, clear=False, error=False):
     """
     Versione migliorata di log_message che mantiene TUTTO il log in memoria
     Sostituisce la funzione log_message esistente
+    
+    Può essere chiamata da qualsiasi thread: il buffer completo viene aggiornato subito,
+    il widget solo dal thread Tk (dagli altri thread tramite root.after).
     """
     global COMPLETE_LOG_BUFFER
     
-    if clear:
-        output_text.delete(1.0, tk.END)
+    formatted_message = None
+    if message:
+        # Get current timestamp
+        current_time = time.strftime("%H:%M:%S", time.localtime())
+        formatted_message = f"[{current_time}] {message}"
+        
+        # SEMPRE aggiungi al buffer completo (QUESTA È LA CHIAVE!)
         # NON cancelliamo il buffer completo quando si fa clear della UI
-        if message:  # Se c'è un messaggio, aggiungilo
-            current_time = time.strftime("%H:%M:%S", time.localtime())
-            formatted_message = f"[{current_time}] {message}"
-            
-            # Aggiungi sempre al buffer completo
-            COMPLETE_LOG_BUFFER.append(formatted_message)
-            
-            # Aggiungi alla UI
-            output_text.insert(tk.END, formatted_message + "\n")
-            output_text.see(tk.END)
+        COMPLETE_LOG_BUFFER.append(formatted_message)
+    elif not clear:
         return
     
-    if not message:
+    if threading.current_thread() is threading.main_thread():
+        show_log_message(formatted_message, clear)
+    else:
+        try:
+            root.after(0, show_log_message, formatted_message, clear)
+        except (RuntimeError, tk.TclError):
+            pass  # Finestra già chiusa: il messaggio resta nel buffer completo
+
+def show_log_message(formatted_message, clear=False):
+    """Aggiorna il widget di log (solo dal thread Tk)"""
+    if clear:
+        output_text.delete(1.0, tk.END)
+    if formatted_message is None:
         return
     
-    # Get current timestamp
-    current_time = time.strftime("%H:%M:%S", time.localtime())
-    formatted_message = f"[{current_time}] {message}"
-    
-    # SEMPRE aggiungi al buffer completo (QUESTA È LA CHIAVE!)
-    COMPLETE_LOG_BUFFER.append(formatted_message)
-    
     # Aggiungi alla UI (con limite per performance)
     output_text.insert(tk.END, formatted_message + "\n")
     
@@ -1873,6 +3345,378 @@ def save_complete_log_to_file(file_path=None):
         return None
 
 # ====== Camera Management ======
+WEBCAM_PROPERTY_NAMES = {
+    cv2.CAP_PROP_CONTRAST: "contrast",
+    cv2.CAP_PROP_SATURATION: "saturation",
+    cv2.CAP_PROP_EXPOSURE: "exposure",
+    cv2.CAP_PROP_FOCUS: "focus",
+}
+
+class FrameGrabber:
+    """
+    Thread di cattura unico proprietario delle letture da app.cap: legge di continuo
+    e pubblica i frame con timestamp in un piccolo ring buffer. I consumer prendono
+    l'ultimo frame in tempo costante, senza bloccarsi sulla webcam e senza competere
+    sullo stesso VideoCapture. Un solo scrittore: la pubblicazione è l'assegnazione
+    di self.seq dopo aver scritto lo slot, quindi la lettura dell'ultimo frame non usa lock.
+    Il timestamp di ogni frame è l'istante di INIZIO lettura: un frame con timestamp >= T
+    è stato letto dopo T, ma può essere un frame già nel buffer del driver (DSHOW può
+    ignorare BUFFERSIZE=1) esposto fino a un periodo prima; per un frame esposto
+    sicuramente dopo T wait_for_frame_after(skip_buffered=True) scarta il primo.
+    I frame pubblicati sono condivisi: i consumer non devono modificarli in-place.
+    """
+    
+    def __init__(self, cap, size=4):
+        self.cap = cap
+        self.size = size
+        self.ring = [None] * size  # (seq, timestamp, frame)
+        self.seq = 0
+        self.failures = 0
+        self.running = False
+        self.thread = None
+        self.new_frame = threading.Condition()  # Solo per chi attende un frame più recente
+        self.property_lock = threading.Lock()
+        self.pending_properties = {}  # prop_id -> valore richiesto (applicato dal thread di cattura)
+        self.properties_due = 0.0
+        self.properties_requested = 0  # Contatore delle richieste (set_property)
+        self.properties_applied = 0    # Ultima richiesta applicata su cap
+        self.applied_properties = {}  # prop_id -> ultimo valore impostato su cap
+    
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._capture_loop, name="FrameGrabber", daemon=True)
+        self.thread.start()
+    
+    def _capture_loop(self):
+        while self.running:
+            if self.pending_properties and time.time() >= self.properties_due:
+                self._apply_pending_properties()
+            try:
+                timestamp = time.time()
+                ret, frame = self.cap.read()
+            except Exception:
+                ret, frame = False, None
+            
+            if not ret or frame is None:
+                self.failures += 1
+                time.sleep(0.01)
+                continue
+            
+            self.failures = 0
+            seq = self.seq + 1
+            self.ring[seq % self.size] = (seq, timestamp, frame)
+            with self.new_frame:
+                self.seq = seq
+                self.new_frame.notify_all()
+    
+    def set_property(self, prop_id, value, debounce=0.0):
+        """
+        Accoda un parametro della webcam; viene applicato dal thread di cattura tra due
+        letture, dopo debounce secondi senza nuove richieste (trascinamento slider).
+        """
+        with self.property_lock:
+            self.pending_properties[prop_id] = float(value)
+            self.properties_due = time.time() + debounce
+            self.properties_requested += 1
+    
+    def flush_properties(self, timeout=1.0):
+        """
+        Applica subito i parametri in attesa di debounce (dal thread di cattura) e
+        ritorna l'istante dopo il quale vengono applicati: read_frame_after su questo istante
+        scarta anche il frame già nel buffer del driver.
+        """
+        with self.property_lock:
+            requested = self.properties_requested
+            self.properties_due = 0.0
+        deadline = time.time() + timeout
+        while self.running and self.properties_applied < requested and time.time() < deadline:
+            time.sleep(0.005)
+        return time.time()
+    
+    def _apply_pending_properties(self):
+        with self.property_lock:
+            pending, self.pending_properties = self.pending_properties, {}
+            requested = self.properties_requested
+        
+        changed = [(prop_id, value) for prop_id, value in pending.items()
+                   if self.applied_properties.get(prop_id) != value]
+        
+        try:
+            for prop_id, value in changed:
+                self.cap.set(prop_id, value)
+                self.applied_properties[prop_id] = value
+            
+            if changed:
+                # Rilettura dei soli parametri modificati, in un'unica riga di log
+                readback = ", ".join(f"{WEBCAM_PROPERTY_NAMES.get(prop_id, prop_id)} {value:g} "
+                                     f"(actual {self.cap.get(prop_id):g})"
+                                     for prop_id, value in changed)
+                log_message(f"Webcam parameters set: {readback}")
+        except Exception as e:
+            log_message(f"Error setting webcam parameters: {str(e)}")
+        finally:
+            self.properties_applied = requested
+    
+    def latest(self):
+        """Ultimo frame pubblicato: (seq, timestamp, frame) oppure None"""
+        seq = self.seq
+        return self.ring[seq % self.size] if seq else None
+    
+    def read(self, first_frame_timeout=1.0):
+        """
+        Sostituto di cap.read(): ritorna (ret, frame) con l'ultimo frame.
+        Attende solo se il grabber non ha ancora prodotto il primo frame.
+        """
+        entry = self.latest()
+        deadline = time.time() + first_frame_timeout
+        while entry is None and self.running and time.time() < deadline:
+            time.sleep(0.005)
+            entry = self.latest()
+        if entry is None:
+            return False, None
+        return True, entry[2]
+    
+    def wait_for_frame_after(self, after_time, timeout=1.0, skip_buffered=False):
+        """
+        Primo frame la cui lettura è iniziata dopo after_time; ritorna appena disponibile.
+        Il primo frame letto può provenire dal buffer del driver: con skip_buffered si
+        attende il successivo, esposto sicuramente dopo after_time (un frame di latenza).
+        
+        Returns:
+            tuple: (seq, timestamp, frame) oppure None in caso di timeout
+        """
+        deadline = time.time() + timeout
+        first_seq = None
+        with self.new_frame:
+            while True:
+                entry = self.latest()
+                if entry is not None and entry[1] >= after_time:
+                    if first_seq is None:
+                        first_seq = min(e[0] for e in list(self.ring)
+                                        if e is not None and e[1] >= after_time)
+                    if not skip_buffered or entry[0] > first_seq:
+                        return entry
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.running:
+                    return None
+                self.new_frame.wait(remaining)
+    
+    def stop(self):
+        self.running = False
+        with self.new_frame:
+            self.new_frame.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.0)
+        self.thread = None
+
+# Serializza avvio/arresto del thread di cattura: start_frame_grabber è chiamata dal thread Tk,
+# dal CameraController e dal producer del burst, e due FrameGrabber sulla stessa VideoCapture
+# leggerebbero in concorrenza
+frame_grabber_lock = threading.RLock()
+
+def start_frame_grabber(applied_properties=None):
+    """
+    Avvia (o riavvia se la webcam è cambiata) il thread di cattura su app.cap.
+    applied_properties: parametri già impostati su app.cap all'apertura; i parametri
+    richiesti dagli slider senza thread di cattura attivo vengono applicati all'avvio.
+    """
+    with frame_grabber_lock:
+        if app.cap is None or not app.cap.isOpened():
+            return None
+        grabber = app.frame_grabber
+        if grabber is not None and grabber.running and grabber.cap is app.cap:
+            return grabber
+        if grabber is not None:
+            grabber.stop()
+        grabber = FrameGrabber(app.cap)
+        grabber.applied_properties.update(applied_properties or {})
+        pending, app.pending_webcam_properties = app.pending_webcam_properties, {}
+        for prop_id, value in pending.items():
+            grabber.set_property(prop_id, value)
+        app.frame_grabber = grabber
+        grabber.start()
+        return grabber
+
+def read_latest_frame():
+    """Ultimo frame della webcam tramite il thread di cattura: (ret, frame)"""
+    grabber = start_frame_grabber()
+    if grabber is None:
+        return False, None
+    return grabber.read()
+
+def read_frame_after(after_time, timeout=1.0):
+    """
+    Come read_latest_frame(), ma garantisce un frame esposto dopo after_time (es. dopo
+    l'applicazione dei parametri webcam), scartando quello nel buffer del driver: (ret, frame)
+    """
+    grabber = start_frame_grabber()
+    entry = (grabber.wait_for_frame_after(after_time, timeout, skip_buffered=True)
+             if grabber is not None else None)
+    if entry is None:
+        return False, None
+    return True, entry[2]
+
+def release_webcam():
+    """Ferma il thread di cattura e chiude la webcam"""
+    with frame_grabber_lock:
+        if app.frame_grabber is not None:
+            app.frame_grabber.stop()
+            app.frame_grabber = None
+        if app.cap is not None:
+            try:
+                app.cap.release()
+            except Exception:
+                pass
+            app.cap = None
+    if camera_enumerator is not None:
+        camera_enumerator.release()
+
+def apply_webcam_settings(cap, settings):
+    """
+    Imposta contrasto/saturazione/esposizione/focus su una webcam appena aperta
+    (prima dell'avvio del thread di cattura). Ritorna i valori impostati per prop_id.
+    """
+    properties = {
+        cv2.CAP_PROP_CONTRAST: float(settings['contrast']),
+        cv2.CAP_PROP_SATURATION: float(settings['saturation']),
+        cv2.CAP_PROP_EXPOSURE: float(settings['exposure']),
+        cv2.CAP_PROP_FOCUS: float(settings['focus']),
+    }
+    for prop_id, value in properties.items():
+        cap.set(prop_id, value)
+    app.webcam_focus = int(settings['focus'])
+    
+    readback = ", ".join(f"{WEBCAM_PROPERTY_NAMES[prop_id]}={cap.get(prop_id):g}" for prop_id in properties)
+    log_message(f"Webcam parameters: {readback}")
+    return properties
+
+def queue_webcam_property(prop_id, value):
+    """
+    Accoda un parametro sul thread di cattura. Senza thread attivo (webcam chiusa o in
+    apertura) il valore resta in app.pending_webcam_properties e viene applicato
+    all'avvio del thread di cattura.
+    """
+    with frame_grabber_lock:
+        grabber = app.frame_grabber
+        if grabber is None or not grabber.running:
+            app.pending_webcam_properties[prop_id] = float(value)
+            return False
+    grabber.set_property(prop_id, value, app.webcam_property_debounce)
+    return True
+
+def flush_webcam_properties():
+    """Applica i parametri ancora in debounce; ritorna l'istante da cui i frame li riflettono"""
+    grabber = app.frame_grabber
+    if grabber is None or not grabber.running:
+        return time.time()
+    return grabber.flush_properties()
+
+def snapshot_camera_settings():
+    """Legge sul thread Tk i parametri necessari ad aprire la webcam (i widget non sono thread-safe)"""
+    return {
+        'camera': app.selected_camera,
+        'resolution': app.selected_resolution,
+        'contrast': webcam_contrast_slider.get(),
+        'saturation': webcam_saturation_slider.get(),
+        'exposure': webcam_exposure_slider.get(),
+        'focus': webcam_focus_slider.get(),
+    }
+
+def camera_is_ready():
+    return app.webcam_initialized and app.cap is not None and app.cap.isOpened()
+
+class CameraController:
+    """
+    Apertura, riconfigurazione e chiusura della webcam su un thread dedicato.
+    
+    Stati: CLOSED -> OPENING -> OPEN -> (RECONFIGURING -> OPEN) -> CLOSING -> CLOSED,
+    ERROR se l'apertura fallisce. Le richieste sono eseguite in ordine; un'apertura
+    richiesta mentre un'altra è già in coda si accoda alla stessa operazione.
+    Le callback on_done(success) vengono eseguite sul thread Tk tramite root.after.
+    """
+    CLOSED = "CLOSED"
+    OPENING = "OPENING"
+    OPEN = "OPEN"
+    RECONFIGURING = "RECONFIGURING"
+    ERROR = "ERROR"
+    CLOSING = "CLOSING"
+    
+    def __init__(self):
+        self.state = self.CLOSED
+        self.lock = threading.Lock()
+        self.jobs = queue.Queue()
+        self.pending = []  # Richieste non ancora completate (inclusa quella in esecuzione)
+        self.thread = None
+    
+    def open(self, on_done=None):
+        """Apre la webcam se non è già aperta"""
+        self._submit("open", on_done)
+    
+    def reconfigure(self, on_done=None):
+        """Riapre la webcam con camera/risoluzione/parametri correnti"""
+        self._submit("reconfigure", on_done)
+    
+    def close(self, on_done=None):
+        self._submit("close", on_done)
+    
+    @property
+    def busy(self):
+        return bool(self.pending)
+    
+    def _submit(self, action, on_done):
+        settings = snapshot_camera_settings() if action != "close" else None
+        with self.lock:
+            last = self.pending[-1] if self.pending else None
+            if action == "open":
+                if last is None and self.state == self.OPEN and camera_is_ready():
+                    self._dispatch([on_done], True)
+                    return
+                if last is not None and last['action'] in ("open", "reconfigure"):
+                    last['callbacks'].append(on_done)
+                    return
+            job = {'action': action, 'settings': settings, 'callbacks': [on_done]}
+            self.pending.append(job)
+            self.jobs.put(job)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._worker_loop, name="CameraController", daemon=True)
+                self.thread.start()
+    
+    def _worker_loop(self):
+        while True:
+            job = self.jobs.get()
+            action = job['action']
+            success = False
+            try:
+                if action == "close":
+                    self.state = self.CLOSING
+                    release_webcam()
+                    app.webcam_initialized = False
+                    self.state = self.CLOSED
+                    success = True
+                elif action == "open" and camera_is_ready():
+                    self.state = self.OPEN
+                    success = True
+                else:
+                    self.state = self.OPENING if action == "open" else self.RECONFIGURING
+                    if action == "reconfigure":
+                        app.webcam_initialized = False
+                    success = initialize_webcam_delayed(app, job['settings'])
+                    self.state = self.OPEN if success else self.ERROR
+            except Exception as e:
+                log_message(f"Camera controller error ({action}): {str(e)}")
+                self.state = self.ERROR
+            
+            with self.lock:
+                self.pending.remove(job)
+            self._dispatch(job['callbacks'], success)
+    
+    def _dispatch(self, callbacks, success):
+        for callback in callbacks:
+            if callback is not None:
+                root.after(0, callback, success)
+
+camera_controller = CameraController()
+
 def list_cameras():
     """Lists available webcam devices"""
     #log_time("Inizio list_cameras")
@@ -1899,6 +3743,231 @@ def list_cameras_light():
     # L'utente dovrà selezionare quella funzionante
     return ["Webcam 0", "Webcam 1"]
 
+def camera_device_ids(count):
+    """
+    Identità dei dispositivi per indice OpenCV: nome DirectShow su Windows (pygrabber,
+    opzionale), nome e percorso V4L2 su Linux. Dispositivi con lo stesso nome sono
+    distinti dall'ordinale; gli indici senza identità nota restano "Webcam <indice>".
+    """
+    names = {}
+    try:
+        if sys.platform.startswith("win"):
+            from pygrabber.dshow_graph import FilterGraph
+            names = dict(enumerate(FilterGraph().get_input_devices()))
+        elif sys.platform.startswith("linux"):
+            for index in range(count):
+                name_file = f"/sys/class/video4linux/video{index}/name"
+                if os.path.exists(name_file):
+                    with open(name_file, 'r', encoding='utf-8') as f:
+                        names[index] = f"{f.read().strip()} (/dev/video{index})"
+    except Exception:
+        pass  # pygrabber non installato o enumerazione non disponibile
+    
+    device_ids = {}
+    seen = {}
+    for index in range(count):
+        name = names.get(index)
+        if not name:
+            device_ids[index] = f"Webcam {index}"
+            continue
+        seen[name] = seen.get(name, 0) + 1
+        device_ids[index] = name if seen[name] == 1 else f"{name} #{seen[name]}"
+    return device_ids
+
+class CameraEnumerator:
+    """
+    Enumerazione delle webcam con sonda concorrente (un thread per indice) e cache su disco.
+    
+    Per ogni indice vengono provati i backend in ordine (DirectShow, poi quello di default);
+    del primo che apre la webcam si registrano risoluzioni effettivamente supportate, fps e
+    se esposizione/focus sono impostabili. La cache (CAMERA_CAPABILITIES_FILE) è indicizzata
+    per identità del dispositivo (camera_device_ids), così una webcam diversa sullo stesso
+    indice non eredita le capacità di quella precedente; viene usata subito all'avvio e la
+    sonda la aggiorna in background.
+    
+    Su DirectShow la webcam è esclusiva: la webcam aperta dall'applicazione viene riservata
+    (reserve) e la sonda non la apre; se una sonda su quell'indice è in corso, reserve attende.
+    """
+    
+    BACKENDS = (("DSHOW", cv2.CAP_DSHOW), ("ANY", cv2.CAP_ANY))
+    
+    def __init__(self, cache_file=CAMERA_CAPABILITIES_FILE):
+        self.cache_file = cache_file
+        self.capabilities = {}
+        self.lock = threading.Lock()
+        self.probing = False
+        self.probe_condition = threading.Condition()
+        self.active_probes = set()  # Indici aperti in questo momento dalla sonda
+        self.reserved_index = None  # Webcam in uso dall'applicazione
+        self.device_ids = camera_device_ids(CAMERA_PROBE_INDICES)
+        self.load()
+    
+    def load(self):
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    self.capabilities = json.load(f)
+        except Exception as e:
+            log_message(f"Camera cache not loaded: {str(e)}")
+            self.capabilities = {}
+    
+    def save(self):
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(self.capabilities, f, indent=2)
+        except Exception as e:
+            log_message(f"Camera cache not saved: {str(e)}")
+    
+    def cameras(self):
+        """Nomi delle webcam note e collegate ("Webcam <indice>"), ordinati per indice"""
+        with self.lock:
+            return [f"Webcam {index}" for index, device_id in sorted(self.device_ids.items())
+                    if device_id in self.capabilities]
+    
+    def get(self, index):
+        with self.lock:
+            return self.capabilities.get(self.device_ids.get(index, f"Webcam {index}"))
+    
+    def reserve(self, index, timeout=CAMERA_PROBE_TIMEOUT):
+        """La webcam index sta per essere aperta dall'applicazione: attende la sonda in corso su quell'indice"""
+        with self.probe_condition:
+            self.reserved_index = index
+            deadline = time.time() + timeout
+            while index in self.active_probes:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    log_message(f"Webcam {index} still being probed, opening anyway")
+                    break
+                self.probe_condition.wait(remaining)
+    
+    def release(self):
+        with self.probe_condition:
+            self.reserved_index = None
+    
+    def backend_for(self, index):
+        """Backend OpenCV con cui la webcam è stata aperta in fase di sonda (default DirectShow)"""
+        caps = self.get(index)
+        backends = dict(self.BACKENDS)
+        return backends.get(caps.get('backend'), cv2.CAP_DSHOW) if caps else cv2.CAP_DSHOW
+    
+    @staticmethod
+    def probe(index):
+        """Apre la webcam index e ne misura le capacità; None se non disponibile"""
+        for backend_name, backend in CameraEnumerator.BACKENDS:
+            cap = None
+            try:
+                cap = cv2.VideoCapture(index, backend)
+                if not cap.isOpened():
+                    continue
+                ret, _ = cap.read()
+                if not ret:
+                    continue
+                
+                resolutions = []
+                for resolution in CAMERA_PROBE_RESOLUTIONS:
+                    width, height = map(int, resolution.split('x'))
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+                    actual = f"{int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))}"
+                    if actual == resolution and actual not in resolutions:
+                        resolutions.append(actual)
+                
+                return {
+                    'index': index,
+                    'device': None,  # Impostato da _discover
+                    'backend': backend_name,
+                    'resolutions': resolutions,
+                    'fps': cap.get(cv2.CAP_PROP_FPS),
+                    'exposure_settable': bool(cap.set(cv2.CAP_PROP_EXPOSURE, cap.get(cv2.CAP_PROP_EXPOSURE))),
+                    'focus_settable': bool(cap.set(cv2.CAP_PROP_FOCUS, cap.get(cv2.CAP_PROP_FOCUS))),
+                    'probed_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                }
+            except Exception:
+                continue
+            finally:
+                if cap is not None:
+                    cap.release()
+        return None
+    
+    def discover(self, on_done=None):
+        """
+        Sonda in background tutti gli indici in parallelo (timeout complessivo
+        CAMERA_PROBE_TIMEOUT) e aggiorna la cache. La webcam riservata dall'applicazione
+        non viene riaperta (resta valida la voce in cache). on_done(cameras) sul thread Tk.
+        """
+        if self.probing:
+            return
+        self.probing = True
+        threading.Thread(target=self._discover, args=(on_done,),
+                         name="CameraEnumerator", daemon=True).start()
+    
+    def _discover(self, on_done):
+        start_time = time.time()
+        results = {}
+        skipped = set()
+        device_ids = camera_device_ids(CAMERA_PROBE_INDICES)
+        
+        def worker(index):
+            with self.probe_condition:
+                if index == self.reserved_index:
+                    skipped.add(index)
+                    return
+                self.active_probes.add(index)
+            try:
+                results[index] = self.probe(index)
+            finally:
+                with self.probe_condition:
+                    self.active_probes.discard(index)
+                    self.probe_condition.notify_all()
+        
+        threads = []
+        for index in range(CAMERA_PROBE_INDICES):
+            thread = threading.Thread(target=worker, args=(index,), daemon=True)
+            thread.start()
+            threads.append((index, thread))
+        
+        deadline = start_time + CAMERA_PROBE_TIMEOUT
+        for index, thread in threads:
+            thread.join(max(0.0, deadline - time.time()))
+        
+        with self.lock:
+            self.device_ids = device_ids
+            for index, thread in threads:
+                device_id = device_ids[index]
+                if thread.is_alive() or index in skipped:
+                    continue  # Sonda bloccata o webcam in uso: resta la voce in cache, se presente
+                if results.get(index):
+                    results[index]['device'] = device_id
+                    self.capabilities[device_id] = results[index]
+                else:
+                    self.capabilities.pop(device_id, None)
+        self.save()
+        self.probing = False
+        
+        cameras = self.cameras()
+        log_message(f"Webcam probe completed in {time.time() - start_time:.2f}s: {', '.join(cameras) or 'none'}")
+        if on_done is not None:
+            root.after(0, on_done, cameras)
+
+camera_enumerator = None  # Creato in init_camera_list()
+
+def apply_camera_capabilities(index):
+    """Aggiorna resolution_options (e la combobox) con le risoluzioni supportate dalla webcam index"""
+    caps = camera_enumerator.get(index) if camera_enumerator is not None else None
+    if not caps or not caps.get('resolutions'):
+        return
+    
+    app.resolution_options = list(caps['resolutions'])
+    resolution_combobox['values'] = app.resolution_options
+    if app.selected_resolution not in app.resolution_options:
+        # Mantieni la risoluzione più vicina a quella selezionata
+        selected_width = int(app.selected_resolution.split('x')[0])
+        app.selected_resolution = min(app.resolution_options,
+                                      key=lambda r: abs(int(r.split('x')[0]) - selected_width))
+        app.webcam_initialized = False
+        log_message(f"Resolution not supported by Webcam {index}, using {app.selected_resolution}")
+    resolution_combobox.set(app.selected_resolution)
+
 def set_camera_resolution(cap, resolution_str):
     """Sets the specified resolution on the webcam"""
     if cap is None or not cap.isOpened():
@@ -1923,49 +3992,155 @@ def set_camera_resolution(cap, resolution_str):
 
 # ====== Approccio semplificato per Live View ======
 
+class PreviewRenderer:
+    """
+    Anteprima della webcam disaccoppiata dal thread Tk.
+    
+    Un thread di rendering prende dal FrameGrabber il frame più recente, disegna gli
+    overlay (modalità RECOGNITION), ridimensiona e converte l'immagine; tiene solo
+    l'ultima immagine pronta. Il pump sul thread Tk la mostra nel DisplaySurface:
+    i frame arrivati nel frattempo vengono scartati, e il rendering successivo parte
+    solo dopo che il precedente è stato mostrato. L'intervallo del pump si adatta al
+    costo misurato sul thread Tk (disegno + ritardo del timer quando Tk è occupato).
+    """
+    LIVE = "live"
+    RECOGNITION = "recognition"
+    
+    def __init__(self, surface):
+        self.surface = surface
+        self.mode = None
+        self.running = False
+        self.thread = None
+        self.rendered = None  # (seq, buffer RGB del DisplaySurface) ultima immagine pronta
+        self.painted_seq = 0
+        self.render_request = threading.Event()
+        self.read_failed = False
+        self.interval = app.preview_min_interval
+        self.ui_cost = 0.0
+        self.pump_due = 0.0
+        self.generation = 0  # Invalida thread e pump di un avvio precedente
+    
+    def start(self, mode):
+        self.mode = mode
+        self.read_failed = False
+        if self.running:
+            return
+        self.running = True
+        self.generation += 1
+        self.rendered = None
+        self.render_request.set()
+        self.thread = threading.Thread(target=self._render_loop, args=(self.generation,),
+                                       name="PreviewRenderer", daemon=True)
+        self.thread.start()
+        self.pump_due = time.time()
+        self._pump(self.generation)
+    
+    def stop(self):
+        self.running = False
+        self.render_request.set()
+    
+    def _active(self, generation):
+        return self.running and generation == self.generation
+    
+    def _render_loop(self, generation):
+        last_timestamp = 0.0
+        while self._active(generation):
+            if not self.render_request.wait(0.2):
+                continue
+            grabber = app.frame_grabber
+            if grabber is None or not grabber.running or camera_controller.busy:
+                time.sleep(0.05)  # Webcam in apertura/riconfigurazione
+                continue
+            
+            entry = grabber.wait_for_frame_after(last_timestamp + 1e-6, timeout=1.0)
+            if entry is None:
+                if grabber.running and not camera_controller.busy:
+                    self.read_failed = True
+                continue
+            seq, last_timestamp, frame = entry
+            
+            try:
+                if self.mode == self.RECOGNITION:
+                    frame = draw_recognition_overlay(frame)
+                # Il buffer RGB è riscritto solo dopo che il pump lo ha mostrato (render_request)
+                image = self.surface.prepare(frame)
+            except Exception as e:
+                log_message(f"Preview render error: {str(e)}")
+                time.sleep(0.1)
+                continue
+            
+            self.render_request.clear()
+            self.rendered = (seq, image)
+    
+    def _should_continue(self):
+        if self.mode == self.LIVE:
+            return app.live_view_active
+        return app.running and app.preview_running
+    
+    def _pump(self, generation):
+        if generation != self.generation:
+            return
+        if not self.running or not self._should_continue():
+            self.stop()
+            return
+        
+        if self.read_failed:
+            self.stop()
+            if self.mode == self.LIVE:
+                log_message("Impossible read frame from webcam")
+                app.live_view_active = False
+                live_view_btn.config(text="Start Live View", bg="#8cff8c")
+            else:
+                log_message("Error during live preview: no frames from webcam")
+            return
+        
+        start = time.time()
+        lateness = max(0.0, start - self.pump_due)
+        
+        rendered = self.rendered
+        if rendered is not None and rendered[0] != self.painted_seq:
+            try:
+                self.surface.paint(rendered[1])
+                self.painted_seq = rendered[0]
+                
+                # Aggiorna anche la threshold preview
+                if self.mode == self.LIVE:
+                    update_threshold_preview()
+            except Exception as e:
+                log_message(f"Live view error: {str(e)}")
+            # Immagine consumata: il renderer può preparare la successiva
+            self.render_request.set()
+        
+        # Budget UI: media mobile di (costo del disegno + ritardo del timer)
+        cost = (time.time() - start) + lateness
+        self.ui_cost = 0.8 * self.ui_cost + 0.2 * cost
+        self.interval = min(max(app.preview_min_interval, 4 * self.ui_cost), app.preview_max_interval)
+        
+        self.pump_due = time.time() + self.interval
+        root.after(int(self.interval * 1000), self._pump, generation)
+
+def get_preview_renderer():
+    if app.preview_renderer is None:
+        app.preview_renderer = PreviewRenderer(app.preview_surface)
+    return app.preview_renderer
+
 def update_live_view():
-    """Aggiorna la visualizzazione live un frame alla volta senza overlay"""
+    """Avvia la visualizzazione live (senza overlay) tramite il PreviewRenderer"""
     if not hasattr(app, 'live_view_active') or not app.live_view_active:
         return
     
+    # Webcam in riconfigurazione (cambio camera/risoluzione): riprova tra poco
+    if camera_controller.busy:
+        root.after(50, update_live_view)
+        return
+    
     if app.cap is None or not app.cap.isOpened():
         log_message("Webcam not available")
         app.live_view_active = False
         live_view_btn.config(text="Start Live View", bg="#8cff8c")
         return
     
-    try:
-        # Leggi un frame
-        ret, frame = app.cap.read()
-        if not ret or frame is None:
-            log_message("Impossible read frame from webcam")
-            app.live_view_active = False
-            live_view_btn.config(text="Start Live View", bg="#8cff8c")
-            return
-        
-        # Applica le impostazioni correnti se uno slider è stato modificato
-        if hasattr(app, 'slider_changed') and app.slider_changed:
-            try:
-                update_webcam_contrast(webcam_contrast_slider.get())
-                update_webcam_saturation(webcam_saturation_slider.get())
-                update_webcam_exposure(webcam_exposure_slider.get())
-                update_webcam_focus(webcam_focus_slider.get())
-                app.slider_changed = False
-            except Exception as e:
-                log_message(f"Error updating parameters: {str(e)}")
-        
-        # Mostra il frame nel pannello esistente senza overlay
-        display_frame_in_panel(frame)
-        
-        # Aggiorna anche la threshold preview
-        update_threshold_preview()
-        
-    except Exception as e:
-        log_message(f"Live view error: {str(e)}")
-    finally:
-        # Programma il prossimo aggiornamento solo se la live view è ancora attiva
-        if hasattr(app, 'live_view_active') and app.live_view_active:
-            root.after(50, update_live_view)  # Aggiorna ogni 50ms (circa 20 fps)
+    get_preview_renderer().start(PreviewRenderer.LIVE)
 
 
 
@@ -1984,7 +4159,7 @@ def toggle_live_preview_during_recognition(enabled):
 
 # Funzione per avviare l'anteprima continua
 def start_continuous_preview():
-    """Avvia un ciclo continuo di acquisizione e visualizzazione dei frame dalla webcam"""
+    """Avvia l'anteprima continua (con overlay delle aree) durante il riconoscimento"""
     if not hasattr(app, 'live_preview_during_recognition') or not app.live_preview_during_recognition or not app.running:
         if hasattr(app, 'preview_running'):
             app.preview_running = False
@@ -1996,136 +4171,115 @@ def start_continuous_preview():
     
     app.preview_running = True
     
-    # Assicurati che la webcam sia aperta
+    # Assicurati che la webcam sia aperta: l'apertura avviene in background e
+    # l'anteprima riparte dalla callback di completamento
     if app.cap is None or not app.cap.isOpened():
-        try:
-            app.cap = cv2.VideoCapture(app.selected_camera, cv2.CAP_DSHOW)
-            if not app.cap.isOpened():
+        def on_webcam_ready(success):
+            if success:
+                start_continuous_preview()
+            else:
                 log_message("Impossible to open webcam for Live View")
                 app.preview_running = False
-                return
-            
-            # Imposta la risoluzione
-            set_camera_resolution(app.cap, app.selected_resolution)
-            
-            # Applica i parametri della webcam
-            update_webcam_contrast(webcam_contrast_slider.get())
-            update_webcam_saturation(webcam_saturation_slider.get())
-            update_webcam_exposure(webcam_exposure_slider.get())
-            update_webcam_focus(webcam_focus_slider.get())
-        except Exception as e:
-            log_message(f"Webcam initializing error: {str(e)}")
-            app.preview_running = False
-            return
+        camera_controller.open(on_webcam_ready)
+        return
     
-    try:
-        # Leggi un frame dalla webcam
-        ret, frame = app.cap.read()
+    get_preview_renderer().start(PreviewRenderer.RECOGNITION)
+
+def draw_recognition_overlay(frame):
+    """Copia del frame con aree, stato lampade e valori riconosciuti (anteprima durante il riconoscimento)"""
+    # Crea una copia del frame per non interferire con il processo di riconoscimento
+    display_frame = frame.copy()
+    
+    # Ottieni il threshold delle lampade
+    lamp_threshold = app.lamp_threshold
+    
+    # Aggiungi barra informativa in alto
+    height, width = display_frame.shape[:2]
+    bar_height = 30
+    cv2.rectangle(display_frame, (0, 0), (width, bar_height), (0, 0, 0), -1)
+    
+    # Aggiungi il testo con i valori di base
+    info_text = f"LIVE - Lamp Threshold: {lamp_threshold}"
+    cv2.putText(display_frame, info_text, (10, 20), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    
+    # Array per memorizzare le luminosità delle lampade
+    lamp_luminosities = []
+    
+    # Stato di tutte le lampade in un'unica passata
+    lamp_states = app.lamp_engine.update(frame, lamp_threshold)
+    
+    # Mostra le aree selezionate sul frame
+    for area in app.areas:
+        x1, y1, x2, y2, area_type, slot_number = area
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
         
-        if ret:
-            # Crea una copia del frame per non interferire con il processo di riconoscimento
-            display_frame = frame.copy()
-            
-            # Ottieni il threshold delle lampade
-            lamp_threshold = app.lamp_threshold if hasattr(app, 'lamp_threshold') else lamp_threshold_slider.get()
-            
-            # Aggiungi barra informativa in alto
-            height, width = display_frame.shape[:2]
-            bar_height = 30
-            cv2.rectangle(display_frame, (0, 0), (width, bar_height), (0, 0, 0), -1)
-            
-            # Ottieni i valori attuali della webcam
-            brightness = app.cap.get(cv2.CAP_PROP_BRIGHTNESS) if app.cap else 0
-            
-            # Aggiungi il testo con i valori di base
-            info_text = f"LIVE - Lamp Threshold: {lamp_threshold}"
-            cv2.putText(display_frame, info_text, (10, 20), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-            
-            # Array per memorizzare le luminosità delle lampade
-            lamp_luminosities = []
+        # Colore del rettangolo: verde per le aree numeriche, blu per le lampade
+        color = (0, 255, 0) if area_type == "Number" else (255, 0, 0)
+        cv2.rectangle(display_frame, (x1, y1), (x2, y2), color, 2)
+        
+        # Aggiunta di etichette
+        if area_type == "Lamp":
+            lamp_name = "Amber" if slot_number == 1 else "Red"
             
-            # Mostra le aree selezionate sul frame
-            for area in app.areas:
-                x1, y1, x2, y2, area_type, slot_number = area
-                x1, x2 = min(x1, x2), max(x1, x2)
-                y1, y2 = min(y1, y2), max(y1, y2)
+            # Luminosità e stato della lampada calcolati dal LampEngine
+            if slot_number in lamp_states:
+                luminosity, is_bright, lamp_state = lamp_states[slot_number]
                 
-                # Colore del rettangolo: verde per le aree numeriche, blu per le lampade
-                color = (0, 255, 0) if area_type == "Number" else (255, 0, 0)
-                cv2.rectangle(display_frame, (x1, y1), (x2, y2), color, 2)
-                
-                # Estrai l'area di interesse
-                roi = frame[y1:y2, x1:x2]
+                # Memorizza la luminosità per mostrarla nella barra in alto
+                lamp_luminosities.append((lamp_name, luminosity, lamp_state))
                 
-                # Aggiunta di etichette
-                if area_type == "Lamp":
-                    lamp_name = "Amber" if slot_number == 1 else "Red"
-                    
-                    # Calcola la luminosità della lampada
-                    if roi.size > 0:
-                        avg_lamp = np.mean(roi, axis=(0,1)).astype(int).tolist()
-                        luminosity = 0.299*avg_lamp[2] + 0.587*avg_lamp[1] + 0.114*avg_lamp[0]
-                        is_bright = luminosity > lamp_threshold
-                        
-                        # Memorizza la luminosità per mostrarla nella barra in alto
-                        lamp_luminosities.append((lamp_name, luminosity, is_bright))
-                        
-                        # Colore del rettangolo in base allo stato della lampada
-                        rect_color = (0, 255, 0) if is_bright else (0, 0, 255)
-                        cv2.rectangle(display_frame, (x1, y1), (x2, y2), rect_color, 2)
-                        
-                        
-                        # Testo con informazioni sulla lampada
-                        lamp_info = f"Lamp {slot_number} ({lamp_name}): L:{int(luminosity)} ({'ON' if is_bright else 'OFF'})"
-                        cv2.putText(display_frame, lamp_info, (x1, y1-5), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                    else:
-                        cv2.putText(display_frame, f"Lamp {slot_number} ({lamp_name})", (x1, y1-5), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
-                else:  # Number area
-                    area_name = "SPN" if slot_number == 1 else "FMI"
-                    
-                    # Se abbiamo un valore riconosciuto, mostralo
-                    recognized_value = None
-                    if hasattr(app, 'last_recognition_values') and app.last_recognition_values:
-                        if slot_number == 1:  # SPN
-                            recognized_value = app.last_recognition_values.get('SPN')
-                        elif slot_number == 2:  # FMI
-                            recognized_value = app.last_recognition_values.get('FMI')
-                    
-                    if recognized_value is not None:
-                        value_text = f"Area {slot_number} ({area_name}): {recognized_value}"
-                        cv2.putText(display_frame, value_text, (x1, y1-5), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-                    else:
-                        cv2.putText(display_frame, f"Area {slot_number} ({area_name})", (x1, y1-5), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
-            
-            # Aggiungi informazioni delle lampade nella barra superiore, se disponibili
-            if lamp_luminosities:
-                lamp_info_text = " | ".join([f"{name}: {int(lum)} ({('ON' if is_on else 'OFF')})" 
-                                           for name, lum, is_on in lamp_luminosities])
+                # Colore del rettangolo in base allo stato della lampada
+                rect_color = (0, 255, 0) if is_bright else (0, 0, 255)
+                cv2.rectangle(display_frame, (x1, y1), (x2, y2), rect_color, 2)
                 
-                # Calcola la posizione per allineare a destra
-                text_size = cv2.getTextSize(lamp_info_text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0]
-                info_x = max(width - text_size[0] - 10, width // 2)
                 
-                cv2.putText(display_frame, lamp_info_text, (info_x, 20), 
+                # Testo con informazioni sulla lampada
+                lamp_info = f"Lamp {slot_number} ({lamp_name}): L:{int(luminosity)} ({lamp_state})"
+                cv2.putText(display_frame, lamp_info, (x1, y1-5), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                        
-            # Visualizza il frame nel pannello
-            display_frame_in_panel(display_frame)
-    except Exception as e:
-        log_message(f"Error during live preview: {str(e)}")
+            else:
+                cv2.putText(display_frame, f"Lamp {slot_number} ({lamp_name})", (x1, y1-5), 
+                          cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+        else:  # Number area
+            area_name = "SPN" if slot_number == 1 else "FMI"
+            
+            # Se abbiamo un valore riconosciuto, mostralo
+            recognized_value = None
+            if hasattr(app, 'last_recognition_values') and app.last_recognition_values:
+                if slot_number == 1:  # SPN
+                    recognized_value = app.last_recognition_values.get('SPN')
+                elif slot_number == 2:  # FMI
+                    recognized_value = app.last_recognition_values.get('FMI')
+            
+            if recognized_value is not None:
+                value_text = f"Area {slot_number} ({area_name}): {recognized_value}"
+                cv2.putText(display_frame, value_text, (x1, y1-5), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            else:
+                cv2.putText(display_frame, f"Area {slot_number} ({area_name})", (x1, y1-5), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
     
-    # Programma il prossimo aggiornamento solo se l'anteprima è ancora attiva
-    if hasattr(app, 'preview_running') and app.preview_running:
-        root.after(50, start_continuous_preview)  # Aggiorna ogni 50ms (circa 20 fps)
+    # Aggiungi informazioni delle lampade nella barra superiore, se disponibili
+    if lamp_luminosities:
+        lamp_info_text = " | ".join([f"{name}: {int(lum)} ({state})" 
+                                   for name, lum, state in lamp_luminosities])
+        
+        # Calcola la posizione per allineare a destra
+        text_size = cv2.getTextSize(lamp_info_text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0]
+        info_x = max(width - text_size[0] - 10, width // 2)
+        
+        cv2.putText(display_frame, lamp_info_text, (info_x, 20), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    
+    return display_frame
 
 def stop_continuous_preview():
     """Ferma il ciclo di anteprima continua"""
     app.preview_running = False
+    if app.preview_renderer is not None and app.preview_renderer.mode == PreviewRenderer.RECOGNITION:
+        app.preview_renderer.stop()
     log_message("Live Preview stopped")
 
 
@@ -2146,117 +4300,150 @@ def toggle_live_view():
     if app.running:
         log_message("Stop acquisition before start Live View")
         stop_recognition()
-        time.sleep(0.5)
-    
-    # Inizializza la webcam con la funzione delayed
-    if not initialize_webcam_delayed(app):
-        log_message("Errore: impossibile inizializzare la webcam per Live View")
-        return
     
-    # Aggiorna l'interfaccia
-    live_view_btn.config(text="Stop Live View", bg="#ff8c8c")  # Rosso chiaro
+    # L'apertura della webcam avviene in background: il pulsante resta disabilitato fino al completamento
+    live_view_btn.config(text="Opening webcam...", state=tk.DISABLED)
     app.preview_btn.config(state=tk.DISABLED)
     
-    # Attiva la live view
-    app.live_view_active = True
-    
-    # Avvia il ciclo di aggiornamento
-    update_live_view()
+    def on_webcam_ready(success):
+        live_view_btn.config(state=tk.NORMAL)
+        if not success:
+            log_message("Errore: impossibile inizializzare la webcam per Live View")
+            live_view_btn.config(text="Start Live View", bg="#8cff8c")
+            app.preview_btn.config(state=tk.NORMAL)
+            return
+        
+        # Aggiorna l'interfaccia
+        live_view_btn.config(text="Stop Live View", bg="#ff8c8c")  # Rosso chiaro
+        
+        # Attiva la live view
+        app.live_view_active = True
+        
+        # Avvia il ciclo di aggiornamento
+        update_live_view()
+        
+        log_message("Live View started. Set webcam parameters")
     
-    log_message("Live View started. Set webcam parameters")
+    camera_controller.open(on_webcam_ready)
+
 
 
+class DisplaySurface:
+    """
+    Pannello Tk su cui mostrare frame ridimensionati mantenendo le proporzioni.
+    
+    La dimensione del pannello è letta solo all'evento <Configure> (on_configure); la
+    geometria del letterbox, il canvas BGR, il buffer RGB e il PhotoImage vengono
+    riutilizzati finché pannello e frame non cambiano dimensione. prepare() può girare
+    su un thread di lavoro, paint() va chiamato sul thread Tk. Buffer e geometria sono
+    protetti da self.lock: prepare() dal renderer e show() dal thread Tk non si
+    sovrappongono (un resize durante l'anteprima non può strappare il frame).
+    """
+    
+    def __init__(self, panel, default_size=(640, 480)):
+        self.panel = panel
+        self.default_size = default_size
+        self.size = None  # (larghezza, altezza) dall'ultimo <Configure>
+        self.geometry_key = None
+        self.geometry = None  # (new_width, new_height, x_offset, y_offset)
+        self.canvas = None
+        self.resized = None
+        self.rgb = None
+        self.photo = None
+        self.lock = threading.RLock()
+    
+    def on_configure(self, event):
+        self.size = (event.width, event.height)
+    
+    def _panel_size(self):
+        # Nessun winfo_* qui: prepare() può girare fuori dal thread Tk
+        width, height = self.size or (0, 0)
+        # Se il pannello non è ancora stato inizializzato, usa valori di default
+        return (width if width > 1 else self.default_size[0],
+                height if height > 1 else self.default_size[1])
+    
+    def _update_geometry(self, panel_width, panel_height, frame_width, frame_height):
+        key = (panel_width, panel_height, frame_width, frame_height)
+        if key == self.geometry_key:
+            return
+        
+        # Ridimensiona mantenendo le proporzioni
+        frame_ratio = frame_width / frame_height
+        if frame_ratio > panel_width / panel_height:  # L'immagine è più larga del pannello
+            new_width = panel_width
+            new_height = int(panel_width / frame_ratio)
+        else:  # L'immagine è più alta del pannello
+            new_height = panel_height
+            new_width = int(panel_height * frame_ratio)
+        
+        # Centra l'immagine ridimensionata sul canvas
+        x_offset = max(0, (panel_width - new_width) // 2)
+        y_offset = max(0, (panel_height - new_height) // 2)
+        
+        self.geometry_key = key
+        self.geometry = (new_width, new_height, x_offset, y_offset)
+        self.canvas = np.zeros((panel_height, panel_width, 3), dtype=np.uint8)  # Bande nere fisse
+        self.resized = np.empty((new_height, new_width, 3), dtype=np.uint8)
+        self.rgb = np.empty_like(self.canvas)
+    
+    def prepare(self, frame):
+        """Letterbox + conversione RGB nei buffer riutilizzati; ritorna il buffer RGB"""
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        panel_width, panel_height = self._panel_size()
+        frame_height, frame_width = frame.shape[:2]
+        with self.lock:
+            self._update_geometry(panel_width, panel_height, frame_width, frame_height)
+            
+            new_width, new_height, x_offset, y_offset = self.geometry
+            cv2.resize(frame, (new_width, new_height), dst=self.resized, interpolation=cv2.INTER_AREA)
+            self.canvas[y_offset:y_offset+new_height, x_offset:x_offset+new_width] = self.resized
+            cv2.cvtColor(self.canvas, cv2.COLOR_BGR2RGB, dst=self.rgb)
+            return self.rgb
+    
+    def paint(self, rgb):
+        """Mostra il buffer RGB nel pannello aggiornando il PhotoImage esistente (thread Tk)"""
+        img = Image.fromarray(rgb)
+        if self.photo is not None and (self.photo.width(), self.photo.height()) == img.size:
+            self.photo.paste(img)
+            return
+        self.photo = ImageTk.PhotoImage(image=img)
+        self.panel.imgtk = self.photo
+        self.panel.configure(image=self.photo)
+    
+    def show(self, frame):
+        with self.lock:
+            self.paint(self.prepare(frame))
 
 def display_frame_in_panel(frame):
     """Visualizza l'immagine nel pannello mantenendo le proporzioni corrette"""
-    if frame is None:
+    if frame is None or app.preview_surface is None:
         return
-        
-    # Ottieni le dimensioni del pannello e del frame
-    panel_width = recognized_frame_panel.winfo_width()
-    panel_height = recognized_frame_panel.winfo_height()
-    
-    # Se il pannello non è ancora stato inizializzato, usa valori di default
-    if panel_width <= 1:
-        panel_width = 640
-    if panel_height <= 1:
-        panel_height = 480
-    
-    frame_height, frame_width = frame.shape[:2]
-    
-    # Calcola il rapporto d'aspetto
-    frame_ratio = frame_width / frame_height
-    panel_ratio = panel_width / panel_height
-    
-    # Ridimensiona mantenendo le proporzioni
-    if frame_ratio > panel_ratio:  # L'immagine è più larga del pannello
-        new_width = panel_width
-        new_height = int(panel_width / frame_ratio)
-    else:  # L'immagine è più alta del pannello
-        new_height = panel_height
-        new_width = int(panel_height * frame_ratio)
-    
-    # Ridimensiona l'immagine
-    resized = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
-    
-    # Crea un'immagine canvas delle dimensioni del pannello
-    canvas = np.zeros((panel_height, panel_width, 3), dtype=np.uint8)
-    
-    # Centra l'immagine ridimensionata sul canvas
-    y_offset = (panel_height - new_height) // 2
-    x_offset = (panel_width - new_width) // 2
-    
-    # Assicurati che gli offset siano non negativi e che non ci siano overflow
-    y_offset = max(0, y_offset)
-    x_offset = max(0, x_offset)
-    
-    # Copia l'immagine ridimensionata sul canvas
-    canvas[y_offset:y_offset+new_height, x_offset:x_offset+new_width] = resized
-    
-    # Converti per Tkinter
-    img_rgb = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB)
-    img = Image.fromarray(img_rgb)
-    imgtk = ImageTk.PhotoImage(image=img)
-    
-    recognized_frame_panel.imgtk = imgtk
-    recognized_frame_panel.configure(image=imgtk)
+    app.preview_surface.show(frame)
 
 def update_webcam_contrast(value):
-    """Aggiorna il valore di contrasto della webcam"""
+    """Aggiorna il valore di contrasto della webcam (applicato dal thread di cattura)"""
     app.slider_changed = True
-    if app.cap is not None and app.cap.isOpened():
-        app.cap.set(cv2.CAP_PROP_CONTRAST, float(value))
-        actual_value = app.cap.get(cv2.CAP_PROP_CONTRAST)
-        log_message(f"Webcam contrast set to {value}, actual value: {actual_value}")
-        return actual_value
-    return None
+    app.webcam_contrast = float(value)
+    queue_webcam_property(cv2.CAP_PROP_CONTRAST, value)
 
 def update_webcam_saturation(value):
-    """Aggiorna il valore di saturazione della webcam"""
+    """Aggiorna il valore di saturazione della webcam (applicato dal thread di cattura)"""
     app.slider_changed = True
-    if app.cap is not None and app.cap.isOpened():
-        app.cap.set(cv2.CAP_PROP_SATURATION, float(value))
-        actual_value = app.cap.get(cv2.CAP_PROP_SATURATION)
-        log_message(f"Webcam saturation set to {value}, actual value: {actual_value}")
-        return actual_value
-    return None
+    app.webcam_saturation = float(value)
+    queue_webcam_property(cv2.CAP_PROP_SATURATION, value)
 
 def update_webcam_exposure(value):
+    """Aggiorna il valore di esposizione della webcam (applicato dal thread di cattura)"""
     app.slider_changed = True
-    """Aggiorna il valore di esposizione della webcam"""
-    if app.cap is not None and app.cap.isOpened():
-        # Converte il valore dello slider al valore di esposizione effettivo
-        # L'esposizione è solitamente rappresentata in valori negativi per la webcam
-        actual_value = app.cap.set(cv2.CAP_PROP_EXPOSURE, float(value))
-        actual_value = app.cap.get(cv2.CAP_PROP_EXPOSURE)
-        log_message(f"Webcam exposure set to {value}, actual value: {actual_value}")
-        return actual_value
-    return None
+    # L'esposizione è solitamente rappresentata in valori negativi per la webcam
+    app.webcam_exposure = float(value)
+    queue_webcam_property(cv2.CAP_PROP_EXPOSURE, value)
 
 
 def update_webcam_focus(value):
     """
-    Aggiorna immediatamente la messa a fuoco della webcam quando lo slider cambia
+    Aggiorna la messa a fuoco della webcam quando lo slider cambia
     Questo sarà l'ultimo parametro che verrà applicato all'immagine per il riconoscimento
     """
     # Aggiorna il flag di modifica slider
@@ -2265,20 +4452,14 @@ def update_webcam_focus(value):
     # Aggiorna il valore di focus nell'app state
     app.webcam_focus = int(value)
     
-    if app.cap is not None and app.cap.isOpened():
-        try:
-            # Imposta la messa a fuoco manuale
-            app.cap.set(cv2.CAP_PROP_FOCUS, float(value))
-            
-            # Verifica il valore effettivamente impostato
-            actual_value = app.cap.get(cv2.CAP_PROP_FOCUS)
-            log_message(f"Webcam focus set to {value}, actual value: {actual_value}")
-        except Exception as e:
-            log_message(f"Error setting webcam focus: {str(e)}")
+    # Messa a fuoco manuale, applicata dal thread di cattura dopo il debounce
+    queue_webcam_property(cv2.CAP_PROP_FOCUS, value)
 
 
 def update_ocr_threshold(value):
     """Aggiorna il valore di threshold per il riconoscimento OCR e aggiorna la preview"""
+    if int(value) != app.ocr_threshold:
+        invalidate_ocr_state("OCR threshold changed")
     app.ocr_threshold = int(value)
     app.slider_changed = True
     
@@ -2286,8 +4467,35 @@ def update_ocr_threshold(value):
     if hasattr(app, 'live_view_active') and app.live_view_active:
         update_threshold_preview()
 
+def threshold_roi_for_preview(roi, threshold_value):
+    """Stessa elaborazione dell'OCR (zoom 4x, equalizzazione, threshold, morfologia) su una sola ROI"""
+    roi_gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    scale_factor = 4.0
+    roi_resized = cv2.resize(roi_gray, None, fx=scale_factor, fy=scale_factor, interpolation=cv2.INTER_CUBIC)
+    roi_equalized = cv2.equalizeHist(roi_resized)
+    _, roi_binary = cv2.threshold(roi_equalized, threshold_value, 255, cv2.THRESH_BINARY)
+    kernel = np.ones((2, 2), dtype=np.uint8)
+    roi_binary = cv2.morphologyEx(roi_binary, cv2.MORPH_OPEN, kernel)
+    roi_binary = cv2.morphologyEx(roi_binary, cv2.MORPH_CLOSE, kernel)
+    return cv2.cvtColor(roi_binary, cv2.COLOR_GRAY2BGR)
+
+def get_threshold_preview_canvas(shape):
+    """Canvas nero riutilizzato tra un aggiornamento e l'altro (stessa forma del frame)"""
+    canvas = getattr(get_threshold_preview_canvas, 'canvas', None)
+    if canvas is None or canvas.shape != shape:
+        canvas = np.zeros(shape, dtype=np.uint8)
+        get_threshold_preview_canvas.canvas = canvas
+    else:
+        canvas.fill(0)
+    return canvas
+
 def update_threshold_preview():
-    """Aggiorna la visualizzazione dell'effetto della threshold per OCR"""
+    """
+    Aggiorna la visualizzazione dell'effetto della threshold per OCR
+    
+    Usa l'ultimo frame del thread di cattura ed elabora solo le ROI numeriche; il risultato
+    viene ricalcolato solo se cambiano frame, threshold o aree.
+    """
     # Anche se Live View non è attiva, prova comunque a fare l'aggiornamento
     # se è stata appena selezionata un'area numerica
     has_number_areas = any(area[4] == "Number" for area in app.areas if len(area) >= 5)
@@ -2295,29 +4503,23 @@ def update_threshold_preview():
     if not (hasattr(app, 'live_view_active') and app.live_view_active) and not has_number_areas:
         return
     
-    # Se non c'è una connessione attiva alla webcam, prova ad aprirla
+    # Se non c'è una connessione attiva alla webcam, aprila in background e riprova al termine
     if app.cap is None or not app.cap.isOpened():
-        try:
-            initialize_webcam_delayed(app)
-            if app.cap is None or not app.cap.isOpened():
-                return
-        except:
-            return
+        if not camera_controller.busy:
+            camera_controller.open(lambda ok: update_threshold_preview() if ok else None)
+        return
     
     try:
-        # Leggi un frame dalla webcam
-        ret, frame = app.cap.read()
-        if not ret or frame is None:
+        # Ultimo frame dal thread di cattura (condiviso: non va modificato)
+        grabber = start_frame_grabber()
+        entry = grabber.latest() if grabber is not None else None
+        if entry is None:
             return
+        seq, _, frame = entry
         
         # Estrai il valore di threshold corrente
         threshold_value = app.ocr_threshold
         
-        # Crea una copia del frame per la preview della threshold
-        display_frame = np.zeros_like(frame)
-        
-        # Flag per verificare se ci sono aree numeriche
-        number_areas_found = False
         number_areas = []
         
         # Raccogli prima tutte le aree numeriche
@@ -2325,7 +4527,6 @@ def update_threshold_preview():
             if len(area) < 6 or area[4] != "Number":
                 continue
             
-            number_areas_found = True
             slot_number = area[5]
             
             # Usa le coordinate memorizzate se disponibili, altrimenti quelle dell'area
@@ -2338,10 +4539,15 @@ def update_threshold_preview():
             
             number_areas.append((x1, y1, x2, y2, slot_number))
         
+        # Niente da ricalcolare se frame, threshold e aree sono quelli già mostrati
+        cache_key = (seq, threshold_value, tuple(number_areas), app.threshold_surface.size if app.threshold_surface else None)
+        if getattr(update_threshold_preview, 'last_key', None) == cache_key:
+            return
+        
         # Se ci sono aree numeriche, creiamo un layout che le mostri tutte
-        if number_areas_found:
-            # Crea un nuovo frame nero per la visualizzazione
-            display_frame = np.zeros_like(frame)
+        if number_areas:
+            # Frame nero per la visualizzazione (buffer riutilizzato)
+            display_frame = get_threshold_preview_canvas(frame.shape)
             
             # Se c'è solo un'area, mostrala centrata e ingrandita
             if len(number_areas) == 1:
@@ -2352,15 +4558,7 @@ def update_threshold_preview():
                 roi = frame[y1:y2, x1:x2]
                 if roi.size > 0:
                     # Elabora l'area come prima
-                    roi_gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-                    scale_factor = 4.0
-                    roi_resized = cv2.resize(roi_gray, None, fx=scale_factor, fy=scale_factor, interpolation=cv2.INTER_CUBIC)
-                    roi_equalized = cv2.equalizeHist(roi_resized)
-                    _, roi_binary = cv2.threshold(roi_equalized, threshold_value, 255, cv2.THRESH_BINARY)
-                    kernel = np.ones((2, 2), dtype=np.uint8)
-                    roi_binary = cv2.morphologyEx(roi_binary, cv2.MORPH_OPEN, kernel)
-                    roi_binary = cv2.morphologyEx(roi_binary, cv2.MORPH_CLOSE, kernel)
-                    roi_color = cv2.cvtColor(roi_binary, cv2.COLOR_GRAY2BGR)
+                    roi_color = threshold_roi_for_preview(roi, threshold_value)
                     
                     # Mostra l'area centrata e ingrandita
                     zoom_factor = 3.0
@@ -2404,15 +4602,7 @@ def update_threshold_preview():
                     roi = frame[y1:y2, x1:x2]
                     if roi.size > 0:
                         # Elabora l'area
-                        roi_gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-                        scale_factor = 4.0
-                        roi_resized = cv2.resize(roi_gray, None, fx=scale_factor, fy=scale_factor, interpolation=cv2.INTER_CUBIC)
-                        roi_equalized = cv2.equalizeHist(roi_resized)
-                        _, roi_binary = cv2.threshold(roi_equalized, threshold_value, 255, cv2.THRESH_BINARY)
-                        kernel = np.ones((2, 2), dtype=np.uint8)
-                        roi_binary = cv2.morphologyEx(roi_binary, cv2.MORPH_OPEN, kernel)
-                        roi_binary = cv2.morphologyEx(roi_binary, cv2.MORPH_CLOSE, kernel)
-                        roi_color = cv2.cvtColor(roi_binary, cv2.COLOR_GRAY2BGR)
+                        roi_color = threshold_roi_for_preview(roi, threshold_value)
                         
                         # Calcola la posizione nell'immagine
                         if i == 0:  # Prima area (solitamente SPN) - in alto
@@ -2452,10 +4642,17 @@ def update_threshold_preview():
                         cv2.putText(display_frame, text, (new_x1, new_y1-10), 
                                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         
-        # Se non ci sono aree numeriche, mostra comunque un'anteprima della threshold sull'intero frame
+        # Se non ci sono aree numeriche, mostra comunque un'anteprima della threshold sul frame
+        # ridotto alle dimensioni del pannello (il frame a piena risoluzione non verrebbe visto)
         else:
-            # Converti l'intero frame in scala di grigi
-            frame_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            frame_height, frame_width = frame.shape[:2]
+            panel_width = app.threshold_surface.size[0] if app.threshold_surface and app.threshold_surface.size else 640
+            scale = min(1.0, max(panel_width, 1) / frame_width)
+            small = cv2.resize(frame, (int(frame_width * scale), int(frame_height * scale)),
+                               interpolation=cv2.INTER_AREA) if scale < 1.0 else frame
+            
+            # Converti il frame in scala di grigi
+            frame_gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
             
             # Equalizzazione dell'istogramma per migliorare il contrasto
             frame_equalized = cv2.equalizeHist(frame_gray)
@@ -2477,6 +4674,7 @@ def update_threshold_preview():
         
         # Visualizza il frame con la threshold applicata
         display_threshold_preview(display_frame)
+        update_threshold_preview.last_key = cache_key
     
     except Exception as e:
         # Log dell'errore per debug
@@ -2489,58 +4687,11 @@ def display_threshold_preview(frame):
     if frame is None:
         return
     
-    # Se il pannello non esiste, crealo
-    if not hasattr(app, 'threshold_preview_panel') or app.threshold_preview_panel is None:
+    # Se il pannello non esiste, non c'è nulla da aggiornare
+    if app.threshold_surface is None:
         return
     
-    # Ottieni le dimensioni del pannello
-    panel_width = app.threshold_preview_panel.winfo_width()
-    panel_height = app.threshold_preview_panel.winfo_height()
-    
-    # Se il pannello non è ancora stato inizializzato, usa valori di default
-    if panel_width <= 1:
-        panel_width = 640
-    if panel_height <= 1:
-        panel_height = 240  # Altezza ridotta per il pannello di threshold
-    
-    frame_height, frame_width = frame.shape[:2]
-    
-    # Calcola il rapporto d'aspetto
-    frame_ratio = frame_width / frame_height
-    panel_ratio = panel_width / panel_height
-    
-    # Ridimensiona mantenendo le proporzioni
-    if frame_ratio > panel_ratio:  # L'immagine è più larga del pannello
-        new_width = panel_width
-        new_height = int(panel_width / frame_ratio)
-    else:  # L'immagine è più alta del pannello
-        new_height = panel_height
-        new_width = int(panel_height * frame_ratio)
-    
-    # Ridimensiona l'immagine
-    resized = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
-    
-    # Crea un'immagine canvas delle dimensioni del pannello
-    canvas = np.zeros((panel_height, panel_width, 3), dtype=np.uint8)
-    
-    # Centra l'immagine ridimensionata sul canvas
-    y_offset = (panel_height - new_height) // 2
-    x_offset = (panel_width - new_width) // 2
-    
-    # Assicurati che gli offset siano non negativi e che non ci siano overflow
-    y_offset = max(0, y_offset)
-    x_offset = max(0, x_offset)
-    
-    # Copia l'immagine ridimensionata sul canvas
-    canvas[y_offset:y_offset+new_height, x_offset:x_offset+new_width] = resized
-    
-    # Converti per Tkinter
-    img_rgb = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB)
-    img = Image.fromarray(img_rgb)
-    imgtk = ImageTk.PhotoImage(image=img)
-    
-    app.threshold_preview_panel.imgtk = imgtk
-    app.threshold_preview_panel.configure(image=imgtk)
+    app.threshold_surface.show(frame)
 
 def update_selected_camera(event):
     """Handles the change of selected camera"""
@@ -2552,11 +4703,16 @@ def update_selected_camera(event):
             app.selected_camera = new_camera
             # Importante: resetta il flag di inizializzazione per forzare la reinizializzazione
             app.webcam_initialized = False
-            # Se la webcam è aperta, chiudila
-            if app.cap is not None and app.cap.isOpened():
-                app.cap.release()
-                app.cap = None
-            log_message(f"Webcam changed to {selection}, will be initialized on next use")
+            # Risoluzioni supportate dalla nuova webcam (dalla cache, senza riaprirla)
+            apply_camera_capabilities(new_camera)
+            # Se la webcam è in uso riaprila subito sulla nuova camera, altrimenti chiudila
+            if app.live_view_active or app.running:
+                log_message(f"Webcam changed to {selection}, switching...")
+                camera_controller.reconfigure(lambda ok: log_message(
+                    f"Webcam switched to {selection}" if ok else f"Error switching to {selection}"))
+            else:
+                camera_controller.close()
+                log_message(f"Webcam changed to {selection}, will be initialized on next use")
 
 
 def update_selected_resolution(event):
@@ -2569,11 +4725,14 @@ def update_selected_resolution(event):
         # Resetta il flag di inizializzazione per reinizializzare alla prossima apertura
         app.webcam_initialized = False
         
-        # If the webcam is already open, update the resolution
+        # If the webcam is in use, reopen it with the new resolution
         if app.cap is not None and app.cap.isOpened():
-            log_message("Closing Webcam  for resolution updated, will be initialized on next use")
-            app.cap.release()
-            app.cap = None
+            if app.live_view_active or app.running:
+                log_message("Reconfiguring webcam for the new resolution...")
+                camera_controller.reconfigure()
+            else:
+                log_message("Closing Webcam  for resolution updated, will be initialized on next use")
+                camera_controller.close()
 
 
 
@@ -2589,12 +4748,13 @@ def initialize_webcam(app):
     try:
         # Se la webcam è già aperta, chiudila
         if app.cap is not None and app.cap.isOpened():
-            app.cap.release()
-            app.cap = None
+            release_webcam()
             #log_time("Webcam precedente chiusa")
         
         # Usa sempre DirectShow su Windows per migliorare prestazioni e compatibilità
         #log_time("Prima di VideoCapture")
+        if camera_enumerator is not None:
+            camera_enumerator.reserve(app.selected_camera)
         app.cap = cv2.VideoCapture(app.selected_camera, cv2.CAP_DSHOW)
         #log_time("Dopo VideoCapture")
         
@@ -2616,20 +4776,17 @@ def initialize_webcam(app):
         #log_time("Dopo impostazioni ottimizzazione webcam")
         
         # Applica i controlli diretti della webcam
-        update_webcam_contrast(webcam_contrast_slider.get())
-        update_webcam_saturation(webcam_saturation_slider.get())
-        update_webcam_exposure(webcam_exposure_slider.get())
-        update_webcam_focus(webcam_focus_slider.get())
+        applied_properties = apply_webcam_settings(app.cap, snapshot_camera_settings())
         #log_time("Dopo impostazione parametri webcam")
         
-        # Leggi i primi frame per completare l'inizializzazione
-        # e permettere alle impostazioni di essere applicate
-        for i in range(5):
-            log_time(f"Prima del frame di warmup {i+1}")
-            ret, _ = app.cap.read()
-            log_time(f"Dopo il frame di warmup {i+1}")
-            if not ret:
-                log_message("Attenzione: problema durante la lettura dei frame iniziali")
+        # Invece di scartare un numero fisso di frame, attendi il primo frame
+        # catturato dopo l'applicazione delle impostazioni
+        settings_applied = start_frame_grabber(applied_properties).flush_properties()
+        log_time("Prima del primo frame dopo le impostazioni")
+        ret, _ = read_frame_after(settings_applied, timeout=2.0)
+        log_time("Dopo il primo frame dopo le impostazioni")
+        if not ret:
+            log_message("Attenzione: problema durante la lettura dei frame iniziali")
                 
         # Verifica le dimensioni effettive ottenute
         actual_width = app.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
@@ -2639,7 +4796,6 @@ def initialize_webcam(app):
         log_message(f"Webcam inizializzata con dimensioni: {int(actual_width)}x{int(actual_height)}")
         log_message(f"Tempo di inizializzazione webcam: {end_time - start_time:.2f} secondi")
         #log_time("Fine initialize_webcam")
-        
         return True
         
     except Exception as e:
@@ -2647,13 +4803,16 @@ def initialize_webcam(app):
         #log_time("Errore in initialize_webcam")
         return False
 
-def initialize_webcam_delayed(app):
+def initialize_webcam_delayed(app, settings):
     """
     Inizializza la webcam in modo ottimizzato solo quando necessario
     Ritorna True se la webcam è già inizializzata o se l'inizializzazione ha successo
+    
+    Operazione bloccante: va eseguita dal thread di CameraController, con i
+    parametri letti in anticipo sul thread Tk (snapshot_camera_settings).
     """
     # Se la webcam è già stata inizializzata, non fare nulla
-    if app.webcam_initialized and app.cap is not None and app.cap.isOpened():
+    if camera_is_ready():
         return True
         
     log_message("Inizializzazione webcam in corso...")
@@ -2661,42 +4820,50 @@ def initialize_webcam_delayed(app):
     
     try:
         # Se la webcam è già aperta, chiudila
-        if app.cap is not None and app.cap.isOpened():
-            app.cap.release()
-            app.cap = None
-        
-        # Usa DirectShow su Windows
-        app.cap = cv2.VideoCapture(app.selected_camera, cv2.CAP_DSHOW)
-        
-        if not app.cap.isOpened():
-            log_message(f"Errore: impossibile aprire la webcam {app.selected_camera}")
+        if app.cap is not None:
+            release_webcam()
+        
+        # La webcam viene configurata in locale e pubblicata in app.cap solo a fine
+        # configurazione, così il resto dell'applicazione non la vede a metà
+        backend = cv2.CAP_DSHOW
+        if camera_enumerator is not None:
+            # Webcam esclusiva su DirectShow: attendi l'eventuale sonda e falla saltare
+            camera_enumerator.reserve(settings['camera'])
+            backend = camera_enumerator.backend_for(settings['camera'])
+        cap = cv2.VideoCapture(settings['camera'], backend)
+        
+        if not cap.isOpened():
+            log_message(f"Errore: impossibile aprire la webcam {settings['camera']}")
+            cap.release()
+            if camera_enumerator is not None:
+                camera_enumerator.release()
             return False
             
         # Imposta la risoluzione selezionata
-        width, height = map(int, app.selected_resolution.split('x'))
-        app.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        app.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        width, height = map(int, settings['resolution'].split('x'))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
         
         # Ottimizzazioni per webcam
-        app.cap.set(cv2.CAP_PROP_FPS, 30)
-        app.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        app.cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)
+        cap.set(cv2.CAP_PROP_FPS, 30)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)
         
         # Applica i controlli diretti della webcam
-        update_webcam_contrast(webcam_contrast_slider.get())
-        update_webcam_saturation(webcam_saturation_slider.get())
-        update_webcam_exposure(webcam_exposure_slider.get())
-        update_webcam_focus(webcam_focus_slider.get())
-        
-        # Leggi i primi frame per completare l'inizializzazione (solo 2 invece di 5)
-        for _ in range(2):
-            ret, _ = app.cap.read()
-            if not ret:
-                log_message("Attenzione: problema durante la lettura dei frame iniziali")
-                
+        applied_properties = apply_webcam_settings(cap, settings)
+        
         # Verifica le dimensioni effettive ottenute
-        actual_width = app.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-        actual_height = app.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        actual_width = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
+        actual_height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        
+        # Attendi il primo frame catturato dopo l'applicazione delle impostazioni
+        with frame_grabber_lock:
+            app.cap = cap
+            grabber = start_frame_grabber(applied_properties)
+        settings_applied = grabber.flush_properties()
+        ret, _ = read_frame_after(settings_applied, timeout=2.0)
+        if not ret:
+            log_message("Attenzione: problema durante la lettura dei frame iniziali")
         
         end_time = time.time()
         log_message(f"Webcam inizializzata con dimensioni: {int(actual_width)}x{int(actual_height)}")
@@ -2704,7 +4871,6 @@ def initialize_webcam_delayed(app):
         
         # Imposta il flag di inizializzazione
         app.webcam_initialized = True
-        
         return True
         
     except Exception as e:
@@ -2719,6 +4885,12 @@ def update_lamp_threshold(value):
 
 def on_preview_panel_resize(event):
     """Handles resizing of the preview panel"""
+    if app.preview_surface is not None:
+        app.preview_surface.on_configure(event)
+    # Con il renderer attivo disegna solo lui (dal frame successivo con la nuova geometria)
+    renderer = app.preview_renderer
+    if renderer is not None and renderer.running:
+        return
     if app.current_frame is not None:
         # Redraw the current image with the new dimensions
         display_frame_in_panel(app.current_frame)
@@ -2777,6 +4949,7 @@ def remove_area(index):
         
         # Remove the area
         app.areas.pop(index)
+        invalidate_ocr_state("area removed")
         update_area_display()
         
         # Disabilitiamo il pulsante Start se non ci sono più aree
@@ -2806,6 +4979,7 @@ def remove_area(index):
 def remove_all_areas():
     """Removes all selected areas"""
     app.areas.clear()
+    invalidate_ocr_state("areas removed")
     app.area_slots = [False, False]  # Reset all slots
     app.lamp_slots = [False, False]
     update_area_display()
@@ -2892,9 +5066,13 @@ def select_area_or_lamp(event, x, y, flags, param):
                 slot_number = app.areas[-1][5]
                 app.ocr_areas = getattr(app, 'ocr_areas', {})
                 app.ocr_areas[slot_number] = (x1, y1, x2, y2)
+                invalidate_ocr_state("number area changed")
                 
                 # Usa un timer con un ritardo leggermente maggiore
                 root.after(500, update_threshold_preview)  # 300ms di ritardo
+                
+                # Warm-up OCR alla dimensione reale della nuova area
+                root.after(600, schedule_paddle_warmup)
             
             display_frame = draw_all_areas_with_labels(display_frame)
             update_area_display()
@@ -2956,15 +5134,21 @@ def capture_preview():
     except:
         pass
     
-    try:
-        # Inizializza la webcam con la funzione delayed
-        if not initialize_webcam_delayed(app):
+    # Inizializza la webcam in background e prosegui nella callback
+    def on_webcam_ready(success):
+        if not success:
             log_message("Errore: impossibile inizializzare la webcam")
             update_button_states('initial')
             return
+        start_area_selection()
+    
+    camera_controller.open(on_webcam_ready)
 
+def start_area_selection():
+    """Acquisisce un frame e apre la finestra di selezione delle aree (webcam già aperta)"""
+    try:
         # Leggi un frame
-        ret, app.frame = app.cap.read()
+        ret, app.frame = read_latest_frame()
         
         if not ret:
             log_message("Errore: impossibile acquisire un frame")
@@ -2977,6 +5161,7 @@ def capture_preview():
 
         # Reset delle aree selezionate
         app.areas.clear()
+        invalidate_ocr_state("area selection restarted")
         app.area_slots = [False, False]
         app.lamp_slots = [False, False]
         
@@ -3096,6 +5281,206 @@ def create_can_bus(interface_name, channel, bitrate):
         log_message(f"General error creating CAN bus: {str(e)}")
         raise Exception(f"Unable to create Vector CAN bus. Error: {str(e)}")
 
+class CANBusManager:
+    """
+    Connessioni CAN persistenti: un bus per (interfaccia, canale, bitrate), condiviso tra
+    invio DM1, risposta FF99, ascolto Canalyzer e player ASC.
+    
+    send() è serializzato da un lock per bus; se il driver segnala un errore il bus viene
+    chiuso, riaperto e l'invio ritentato una volta. Il lock copre solo send(): i task
+    ciclici di bus.send_periodic (DM1PeriodicSender) inviano dal thread di python-can
+    e si affidano alla thread-safety di bus.send() del driver. Aprire lo stesso canale con un
+    bitrate diverso chiude prima il bus precedente. L'apertura del driver avviene fuori
+    dal lock globale (serializzata per canale), così un'apertura lenta o fallita non
+    blocca gli invii sugli altri canali. stats['reused'] conta solo le get_bus() dei
+    consumer servite da un bus già aperto, non i singoli send().
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buses = {}       # (interfaccia, canale, bitrate) -> bus
+        self.send_locks = {}  # (interfaccia, canale, bitrate) -> Lock
+        self.open_locks = {}  # (interfaccia, canale) -> Lock per apertura/chiusura del driver
+        self.stats = {'opened': 0, 'reused': 0, 'reconnects': 0, 'sent': 0, 'send_errors': 0}
+    
+    @staticmethod
+    def make_key(interface_name, channel, bitrate):
+        if isinstance(channel, str) and channel.isdigit():
+            channel = int(channel)
+        return (interface_name, channel, int(bitrate))
+    
+    def get_bus(self, interface_name, channel, bitrate, count_reuse=True):
+        """
+        Bus aperto per i parametri indicati (lo apre solo se non esiste già).
+        count_reuse=False per i consumer che ricontrollano un bus già acquisito.
+        """
+        return self._get_or_open(self.make_key(interface_name, channel, bitrate), count_reuse)
+    
+    def _get_or_open(self, key, count_reuse=False):
+        with self.lock:
+            bus = self.buses.get(key)
+            if bus is not None:
+                if count_reuse:
+                    self.stats['reused'] += 1
+                return bus
+            open_lock = self.open_locks.setdefault(key[:2], threading.Lock())
+            self.send_locks.setdefault(key, threading.Lock())
+        
+        with open_lock:
+            with self.lock:
+                bus = self.buses.get(key)
+                if bus is not None:  # Aperto da un altro thread nel frattempo
+                    if count_reuse:
+                        self.stats['reused'] += 1
+                    return bus
+                # Stesso canale con parametri diversi: chiudi il bus precedente
+                stale = [self.buses.pop(k) for k in list(self.buses) if k[:2] == key[:2]]
+            
+            for old_bus in stale:
+                self._close_bus(old_bus)
+            bus = create_can_bus(*key)
+            
+            with self.lock:
+                self.buses[key] = bus
+                self.stats['opened'] += 1
+            return bus
+    
+    def send(self, msg, interface_name, channel, bitrate):
+        """Invia msg sul bus condiviso; riapre il bus e ritenta una volta in caso di errore CAN"""
+        key = self.make_key(interface_name, channel, bitrate)
+        for attempt in range(2):
+            bus = self._get_or_open(key)
+            try:
+                with self.send_locks[key]:
+                    bus.send(msg)
+                self.stats['sent'] += 1
+                return True
+            except can.CanError as e:
+                self.stats['send_errors'] += 1
+                if attempt > 0:
+                    raise
+                log_message(f"CAN send error ({str(e)}), reconnecting bus...")
+                self.reconnect(*key, failed_bus=bus)
+        return False
+    
+    def is_open(self, bus):
+        """True se bus è ancora aperto (non chiuso da reconnect o da un cambio di parametri)"""
+        with self.lock:
+            return any(open_bus is bus for open_bus in self.buses.values())
+    
+    def reconnect(self, interface_name, channel, bitrate, failed_bus=None):
+        """
+        Chiude il bus; verrà riaperto al prossimo utilizzo. Con failed_bus lo chiude solo
+        se è ancora quello corrente: se un altro thread l'ha già riaperto non va richiuso.
+        """
+        key = self.make_key(interface_name, channel, bitrate)
+        with self.lock:
+            if failed_bus is not None and self.buses.get(key) is not failed_bus:
+                return
+            bus = self.buses.pop(key, None)
+            self.stats['reconnects'] += 1
+        self._close_bus(bus)
+    
+    @staticmethod
+    def _close_bus(bus):
+        if bus is not None:
+            try:
+                bus.shutdown()
+            except Exception:
+                pass
+    
+    def close_all(self):
+        with self.lock:
+            buses, self.buses = list(self.buses.values()), {}
+        for bus in buses:
+            self._close_bus(bus)
+    
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, open_buses=len(self.buses))
+
+can_bus_manager = CANBusManager()
+atexit.register(can_bus_manager.close_all)
+
+def get_can_params():
+    """Interfaccia, canale e bitrate correnti dall'interfaccia utente"""
+    return 'vector', can_channel_var.get(), int(can_bitrate_var.get())
+
+def j1939_pgn_filter(pgn):
+    """Filtro di accettazione python-can per un PGN J1939 (qualsiasi priorità e SA)"""
+    if ((pgn >> 8) & 0xFF) < 0xF0:
+        # PDU1: il byte PS è l'indirizzo di destinazione, non fa parte del PGN
+        return {"can_id": (pgn & 0xFF00) << 8, "can_mask": 0x00FF0000, "extended": True}
+    return {"can_id": (pgn & 0xFFFF) << 8, "can_mask": 0x00FFFF00, "extended": True}
+
+class CANReceiver:
+    """
+    Ricezione event-driven sul bus condiviso: filtri di accettazione (bus.set_filters,
+    applicati in hardware dai driver che lo supportano, es. Vector) limitati ai PGN di
+    interesse e un can.Notifier che consegna i frame ai listener nel proprio thread,
+    invece del polling bus.recv() con filtro in Python.
+    
+    Il bus è condiviso con gli invii (CANBusManager) e resta aperto tra una sessione e
+    l'altra: start() scarta i frame accodati dal driver mentre nessuno leggeva, così i
+    listener vedono solo il traffico successivo. stop() ripristina la ricezione
+    senza filtri. Un errore del driver ferma il Notifier e viene passato ai listener
+    (on_error); chi usa il receiver lo riavvia con restart().
+    """
+    
+    def __init__(self, pgns):
+        self.filters = [j1939_pgn_filter(pgn) for pgn in pgns]
+        self.listeners = []
+        self.can_params = None
+        self.bus = None
+        self.notifier = None
+    
+    def start(self, listeners, interface_name, channel, bitrate):
+        self.listeners = list(listeners)
+        self.can_params = (interface_name, channel, bitrate)
+        self.bus = can_bus_manager.get_bus(interface_name, channel, bitrate)
+        try:
+            self.bus.set_filters(self.filters)
+        except Exception as e:
+            # I listener verificano comunque il PGN: si perde solo il filtraggio a monte
+            log_message(f"CAN acceptance filters not available ({str(e)}), filtering in software")
+        self._drain()
+        self.notifier = can.Notifier(self.bus, self.listeners, timeout=1.0)
+    
+    def _drain(self, timeout=1.0):
+        """Scarta i frame già in coda sul bus (ricevuti prima di start)"""
+        deadline = time.perf_counter() + timeout  # Limite su un bus molto carico
+        discarded = 0
+        while time.perf_counter() < deadline:
+            try:
+                if self.bus.recv(0) is None:
+                    break
+            except Exception:
+                break
+            discarded += 1
+        if discarded:
+            log_message(f"CAN receiver: discarded {discarded} queued frames")
+    
+    def restart(self):
+        """Riapre il bus dopo un errore del driver e riavvia la ricezione"""
+        failed_bus = self.bus
+        self.stop()
+        can_bus_manager.reconnect(*self.can_params, failed_bus=failed_bus)
+        self.start(self.listeners, *self.can_params)
+    
+    def stop(self):
+        if self.notifier is not None:
+            try:
+                self.notifier.stop(timeout=2.0)
+            except Exception:
+                pass
+            self.notifier = None
+        if self.bus is not None:
+            try:
+                self.bus.set_filters(None)
+            except Exception:
+                pass
+            self.bus = None
+
 
 # ====== CAN Communication ======
 def send_canalyzer_can_message(recognized_values, lamp_brightness_status):
@@ -3167,9 +5552,6 @@ def send_canalyzer_can_message(recognized_values, lamp_brightness_status):
         
         # Crea e invia il messaggio CAN
         try:
-            # Connect to CAN bus
-            bus = create_can_bus('vector', channel, bitrate)
-            
             # Create CAN message
             msg = can.Message(
                 arbitration_id=arb_id,
@@ -3178,8 +5560,8 @@ def send_canalyzer_can_message(recognized_values, lamp_brightness_status):
                 dlc=8
             )
             
-            # Send message
-            bus.send(msg)
+            # Send message sul bus condiviso
+            can_bus_manager.send(msg, 'vector', channel, bitrate)
             
             # Log con dettagli esadecimali più concisi
             log_message(
@@ -3194,134 +5576,265 @@ def send_canalyzer_can_message(recognized_values, lamp_brightness_status):
         except can.CanError as e:
             log_message(f"CAN send error: {str(e)}")
             return False
-        finally:
-            # Chiudi la connessione
-            if 'bus' in locals() and bus:
-                bus.shutdown()
                 
     except Exception as e:
         log_message(f"Error preparing Canalyzer CAN message: {str(e)}")
         return False
 
 
+# ====== DM1 Encoding ======
+DM1_PGN = 0xFECA
+DM1_PRIORITY = 6
+DM1_LAMP_BITS = {"AMBER": 1 << 2, "RED": 1 << 4}  # Byte 0: Amber Warning / Red Stop lamp
+
+# Frame DM1 pronto per l'invio: ID esteso e 8 byte immutabili
+DM1Frame = namedtuple("DM1Frame", ["arbitration_id", "data", "spn", "fmi", "lamp", "sa"])
+
+def capl_generate_dtc(spn, fmi):
+    """
+    Replica esatta della logica CAPL generateDTC() (conversioni bit a bit).
+    Usata solo come riferimento per validare encode_dm1_payload().
+    """
+    # 1. SPN binary conversion
+    bits_spn = [0] * 19
+    for i in range(19-1, -1, -1):
+        bits_spn[19-1-i] = 1 if (spn & (1 << i)) else 0
+    
+    # 2. Split SPN in 3+8+8 bit sequence
+    SPN_3bit_H = bits_spn[0:3]
+    SPN_8bit_M = bits_spn[3:11]
+    SPN_8bit_L = bits_spn[11:19]
+    
+    # 3. FMI binary conversion
+    FMI = [0] * 5
+    for i in range(5-1, -1, -1):
+        FMI[5-1-i] = 1 if (fmi & (1 << i)) else 0
+    
+    # 4. DTC2Byte creation: SPN_8bit_L + SPN_8bit_M
+    DTC2Byte = [0] * 16
+    for i in range(8):
+        DTC2Byte[i] = SPN_8bit_L[i]
+    for i in range(8):
+        DTC2Byte[8 + i] = SPN_8bit_M[i]
+    
+    # 5. FaultType1Byte: SPN_3bit_H + FMI
+    FaultType1Byte = [0] * 8
+    for i in range(3):
+        FaultType1Byte[i] = SPN_3bit_H[i]
+    for i in range(5):
+        FaultType1Byte[3 + i] = FMI[i]
+    
+    # 6. DTC3Byte: DTC2Byte + FaultType1Byte
+    bits_dtc = [0] * 32
+    for i in range(16):
+        bits_dtc[i] = DTC2Byte[i]
+    for i in range(8):
+        bits_dtc[16 + i] = FaultType1Byte[i]
+    
+    # 7. BinToHex conversion
+    dtc_generated = 0
+    for i in range(len(bits_dtc)):
+        b = 1 if bits_dtc[i] == 1 else 0
+        dtc_generated = (dtc_generated << 1) | b
+    
+    return dtc_generated
+
+def encode_dm1_payload(spn, fmi, lamp_status, sa):
+    """
+    Codifica gli 8 byte DM1 (un solo DTC) con aritmetica sui bit:
+    [lampade, 0xFF, SPN[7:0], SPN[15:8], SPN[18:16]<<5 | FMI, 0x00, SA, 0xFF]
+    """
+    return bytes((
+        DM1_LAMP_BITS.get(lamp_status, 0),
+        0xFF,
+        spn & 0xFF,
+        (spn >> 8) & 0xFF,
+        (((spn >> 16) & 0x07) << 5) | (fmi & 0x1F),
+        0x00,
+        sa & 0xFF,
+        0xFF,
+    ))
+
+def decode_dm1_payload(data):
+    """Decodifica un payload DM1 a singolo DTC: dict con SPN, FMI, LAMP e SA"""
+    lamp = "NONE"
+    for name, bit in DM1_LAMP_BITS.items():
+        if data[0] & bit:
+            lamp = name
+            break
+    return {
+        "SPN": data[2] | (data[3] << 8) | ((data[4] >> 5) << 16),
+        "FMI": data[4] & 0x1F,
+        "LAMP": lamp,
+        "SA": data[6],
+    }
+
+def encode_dm1_payload_capl(spn, fmi, lamp_status, sa):
+    """Payload DM1 costruito dalla replica CAPL (riferimento per la validazione)"""
+    dtc_generated = capl_generate_dtc(spn, fmi)
+    return bytes((
+        DM1_LAMP_BITS.get(lamp_status, 0),
+        0xFF,
+        (dtc_generated >> 24) & 0xFF,
+        (dtc_generated >> 16) & 0xFF,
+        (dtc_generated >> 8) & 0xFF,
+        dtc_generated & 0xFF,
+        sa & 0xFF,
+        0xFF,
+    ))
+
+def build_dm1_frame(spn, fmi, lamp_status, sa, validate=False):
+    """
+    Frame DM1 immutabile per un DTC. Con validate il payload viene confrontato con
+    la replica CAPL (in caso di differenza si usa quello CAPL e si segnala l'errore)
+    e ridecodificato: valori fuori dai campi DM1 (SPN > 19 bit, FMI > 5 bit, lampada
+    sconosciuta) vengono segnalati perché il cruscotto mostrerà valori diversi.
+    """
+    data = encode_dm1_payload(spn, fmi, lamp_status, sa)
+    if validate:
+        reference = encode_dm1_payload_capl(spn, fmi, lamp_status, sa)
+        if data != reference:
+            log_message(f"⚠️ DM1 encoder mismatch for SPN={spn} FMI={fmi}: "
+                       f"[{data.hex(' ').upper()}] vs CAPL [{reference.hex(' ').upper()}]")
+            data = reference
+        decoded = decode_dm1_payload(data)
+        expected = {"SPN": spn, "FMI": fmi, "LAMP": lamp_status, "SA": sa}
+        if decoded != expected:
+            log_message(f"⚠️ DM1 payload does not round-trip: {expected} encoded as {decoded}")
+    arb_id = (DM1_PRIORITY << 26) | (DM1_PGN << 8) | (sa & 0xFF)
+    return DM1Frame(arb_id, data, spn, fmi, lamp_status, sa)
+
+# J1939-21 Transport Protocol: BAM per DM1 con più di un DTC (payload > 8 byte)
+TP_PRIORITY = 7
+TP_CM_PGN = 0xEC00
+TP_DT_PGN = 0xEB00
+TP_CM_BAM = 0x20
+TP_GLOBAL_ADDRESS = 0xFF
+TP_MAX_PAYLOAD = 1785          # 255 pacchetti x 7 byte
+BAM_PACKET_SPACING = 0.05      # 50 ms tra i TP.DT (J1939-21: 50-200 ms)
+DM1_MAX_GROUP_SIZE = 20        # 82 byte, 12 TP.DT: la sequenza BAM resta sotto il periodo di 1 s
+
+def encode_dm1_multi_payload(frames):
+    """
+    Payload DM1 J1939 con N DTC: [lampade, 0xFF] + 4 byte per DTC
+    [SPN[7:0], SPN[15:8], SPN[18:16]<<5 | FMI, OC=0x00]. Le lampade sono l'OR dei DTC.
+    """
+    payload = bytearray((0x00, 0xFF))
+    for frame in frames:
+        payload[0] |= frame.data[0]
+        payload += frame.data[2:5]
+        payload.append(0x00)
+    return bytes(payload)
+
+def decode_dm1_multi_payload(payload):
+    """Decodifica un payload DM1 multi-DTC: (lampada, lista di dict con SPN e FMI)"""
+    lamp = "NONE"
+    for name, bit in DM1_LAMP_BITS.items():
+        if payload[0] & bit:
+            lamp = name
+            break
+    dtcs = []
+    for offset in range(2, len(payload) - 3, 4):
+        dtc = payload[offset:offset + 4]
+        dtcs.append({
+            "SPN": dtc[0] | (dtc[1] << 8) | ((dtc[2] >> 5) << 16),
+            "FMI": dtc[2] & 0x1F,
+        })
+    return lamp, dtcs
+
+def build_bam_frames(payload, sa, pgn=DM1_PGN):
+    """
+    Segmenta un payload con J1939 BAM: un TP.CM broadcast seguito da ceil(len/7)
+    TP.DT [sequenza, 7 byte] con riempimento 0xFF. Ritorna [(arbitration_id, data)].
+    """
+    size = len(payload)
+    if size <= 8 or size > TP_MAX_PAYLOAD:
+        raise ValueError(f"BAM payload must be 9-{TP_MAX_PAYLOAD} bytes, got {size}")
+    
+    packets = (size + 6) // 7
+    cm_id = (TP_PRIORITY << 26) | ((TP_CM_PGN | TP_GLOBAL_ADDRESS) << 8) | (sa & 0xFF)
+    dt_id = (TP_PRIORITY << 26) | ((TP_DT_PGN | TP_GLOBAL_ADDRESS) << 8) | (sa & 0xFF)
+    
+    frames = [(cm_id, bytes((TP_CM_BAM, size & 0xFF, size >> 8, packets, 0xFF,
+                             pgn & 0xFF, (pgn >> 8) & 0xFF, (pgn >> 16) & 0xFF)))]
+    for seq in range(packets):
+        chunk = payload[seq * 7:(seq + 1) * 7]
+        frames.append((dt_id, bytes((seq + 1,)) + chunk + b"\xFF" * (7 - len(chunk))))
+    return frames
+
+def build_dm1_multi_frames(dtc_list):
+    """
+    Frame CAN di un DM1 con tutti i DTC della lista (stesso Source Address):
+    un solo frame DM1 per un DTC, altrimenti la sequenza BAM del payload composto.
+    Il payload riassemblato dai TP.DT viene ridecodificato e confrontato con i DTC.
+    """
+    frames = [get_dm1_frame(dtc) for dtc in dtc_list]
+    sa = frames[0].sa
+    if any(frame.sa != sa for frame in frames):
+        raise ValueError("All DTCs in a DM1 message must share the same Source Address")
+    if len(frames) == 1:
+        return [(frames[0].arbitration_id, frames[0].data)]
+    payload = encode_dm1_multi_payload(frames)
+    bam_frames = build_bam_frames(payload, sa)
+    
+    reassembled = b"".join(data[1:] for _, data in bam_frames[1:])[:len(payload)]
+    lamp, decoded = decode_dm1_multi_payload(reassembled)
+    expected = [{"SPN": frame.spn, "FMI": frame.fmi} for frame in frames]
+    lamps = {frame.lamp for frame in frames if frame.lamp in DM1_LAMP_BITS}
+    if decoded != expected or lamp not in (lamps or {"NONE"}):
+        log_message(f"⚠️ DM1 BAM payload does not round-trip: {expected} encoded as {decoded} (lamp {lamp})")
+    return bam_frames
+
+def get_dm1_frame(dtc_params):
+    """Frame DM1 pre-codificato (chiave "DM1"), altrimenti codificato ora dai parametri"""
+    frame = dtc_params.get("DM1")
+    if frame is None:
+        frame = build_dm1_frame(int(dtc_params.get("SPN", 0)), int(dtc_params.get("FMI", 0)),
+                                dtc_params.get("LAMP", "NONE"), int(dtc_params.get("SA", 0)))
+    return frame
+
+def log_dm1_values_once(frame):
+    """Logga i valori DM1 solo al primo invio di ogni DTC"""
+    # Variabile statica per tracciare i DTC già inviati
+    if not hasattr(log_dm1_values_once, 'sent_dtcs'):
+        log_dm1_values_once.sent_dtcs = set()
+    
+    # Crea una chiave univoca per il DTC
+    dtc_key = (frame.spn, frame.fmi, frame.lamp, frame.sa)
+    if dtc_key in log_dm1_values_once.sent_dtcs:
+        return
+    
+    log_message("==================== Values to be sent ====================")
+    log_message(f"SPN: {frame.spn}")
+    log_message(f"FMI: {frame.fmi}")
+    log_message(f"Lamp: {frame.lamp}")
+    log_message(f"Source Address: 0x{frame.sa:02X}")
+    log_message("=======================================================")
+    
+    # Aggiungi questo DTC alla lista
+    log_dm1_values_once.sent_dtcs.add(dtc_key)
+
 def send_can_message(dtc_params):
     """
     Sends a DM1 CAN message con registrazione dei dettagli solo al primo invio.
-    Replica esattamente la logica CAPL custom.
+    Usa il frame DM1 pre-codificato in load_csv_data (chiave "DM1") se presente;
+    la codifica equivale alla logica CAPL custom (vedi capl_generate_dtc).
     """
-    # Variabile statica per tracciare i DTC già inviati
-    if not hasattr(send_can_message, 'sent_dtcs'):
-        send_can_message.sent_dtcs = set()
-    
     try:
-        # Estrai i parametri
-        spn = int(dtc_params.get("SPN", 0))
-        fmi = int(dtc_params.get("FMI", 0))
-        lamp_status = dtc_params.get("LAMP", "NONE")
-        sa = int(dtc_params.get("SA", 0))
-        
-        # Crea una chiave univoca per il DTC
-        dtc_key = (spn, fmi, lamp_status, sa)
-        
-        # Logga i dettagli solo la prima volta
-        if dtc_key not in send_can_message.sent_dtcs:
-            log_message("==================== Values to be sent ====================")
-            log_message(f"SPN: {spn}")
-            log_message(f"FMI: {fmi}")
-            log_message(f"Lamp: {lamp_status}")
-            log_message(f"Source Address: 0x{sa:02X}")
-            log_message("=======================================================")
-            
-            # Aggiungi questo DTC alla lista
-            send_can_message.sent_dtcs.add(dtc_key)
-        
-        # REPLICA ESATTA DELLA LOGICA CAPL generateDTC()
-        
-        # 1. SPN binary conversion
-        bits_spn = [0] * 19
-        for i in range(19-1, -1, -1):
-            bits_spn[19-1-i] = 1 if (spn & (1 << i)) else 0
-        
-        # 2. Split SPN in 3+8+8 bit sequence
-        SPN_3bit_H = bits_spn[0:3]
-        SPN_8bit_M = bits_spn[3:11]
-        SPN_8bit_L = bits_spn[11:19]
-        
-        # 3. FMI binary conversion
-        FMI = [0] * 5
-        for i in range(5-1, -1, -1):
-            FMI[5-1-i] = 1 if (fmi & (1 << i)) else 0
-        
-        # 4. DTC2Byte creation: SPN_8bit_L + SPN_8bit_M
-        DTC2Byte = [0] * 16
-        for i in range(8):
-            DTC2Byte[i] = SPN_8bit_L[i]
-        for i in range(8):
-            DTC2Byte[8 + i] = SPN_8bit_M[i]
-        
-        # 5. FaultType1Byte: SPN_3bit_H + FMI
-        FaultType1Byte = [0] * 8
-        for i in range(3):
-            FaultType1Byte[i] = SPN_3bit_H[i]
-        for i in range(5):
-            FaultType1Byte[3 + i] = FMI[i]
-        
-        # 6. DTC3Byte: DTC2Byte + FaultType1Byte
-        bits_dtc = [0] * 32
-        for i in range(16):
-            bits_dtc[i] = DTC2Byte[i]
-        for i in range(8):
-            bits_dtc[16 + i] = FaultType1Byte[i]
-        
-        # 7. BinToHex conversion
-        dtc_generated = 0
-        for i in range(len(bits_dtc)):
-            b = 1 if bits_dtc[i] == 1 else 0
-            dtc_generated = (dtc_generated << 1) | b
-        
-        # Build extended CAN ID
-        pgn = 0xFECA
-        priority = 6
-        arb_id = (priority << 26) | (pgn << 8) | sa
-        
-        # Initialize message with 8 bytes
-        data = [0x00] * 8
-        
-        # Handle lamps in first byte
-        if lamp_status == "AMBER":
-            data[0] |= (1 << 2)
-        elif lamp_status == "RED":
-            data[0] |= (1 << 4)
-        
-        # Byte 1: Reserved
-        data[1] = 0xFF
-        
-        # Set DTC bytes (replica CAPL sendDTC)
-        data[2] = (dtc_generated >> 24) & 0xFF
-        data[3] = (dtc_generated >> 16) & 0xFF
-        data[4] = (dtc_generated >> 8) & 0xFF
-        data[5] = dtc_generated & 0xFF
-        
-        # Set Source Address
-        data[6] = sa
-        
-        # Byte 7: Reserved
-        data[7] = 0xFF
-        
-        # Connect to CAN bus
-        bus = create_can_bus('vector', can_channel_var.get(), int(can_bitrate_var.get()))
+        frame = get_dm1_frame(dtc_params)
+        log_dm1_values_once(frame)
         
         try:
             # Create CAN message
             msg = can.Message(
-                arbitration_id=arb_id,
-                data=data,
+                arbitration_id=frame.arbitration_id,
+                data=frame.data,
                 is_extended_id=True,
                 dlc=8
             )
             
-            # Send message
-            bus.send(msg)
+            # Send message sul bus condiviso (aperto una sola volta)
+            can_bus_manager.send(msg, *get_can_params())
             
             app.can_message_counter += 1
             return True
@@ -3329,8 +5842,6 @@ def send_can_message(dtc_params):
         except can.CanError as e:
             log_message(f"CAN send error: {str(e)}")
             return False
-        finally:
-            bus.shutdown()
         
     except Exception as e:
         log_message(f"Error preparing CAN message: {str(e)}")
@@ -3340,6 +5851,265 @@ def send_can_message(dtc_params):
 
 
 
+DM1_PERIODIC_MAX_RESTARTS = 3  # Ricreazioni del task periodico per DTC prima del loop software
+
+class DM1PeriodicSender:
+    """
+    Trasmissione ciclica del DM1 corrente con il task periodico di python-can
+    (bus.send_periodic) sul bus condiviso, invece di send + time.sleep in Python.
+    
+    Il cambio DTC usa modify_data() sul task esistente se l'arbitration ID non cambia
+    (python-can lo rifiuta con ValueError); con un Source Address diverso il task viene
+    ricreato. suspend() ferma il task tra un DTC e il successivo. Un errore di invio ferma il task di python-can: is_alive()
+    permette al thread di supervisione di accorgersene (anche se il CANBusManager ha
+    riaperto il bus) e di ricreare il task. Gli istanti di invio sono misurati con il modifier_callback (python-can
+    >= 4.2); con versioni precedenti le statistiche del periodo non sono disponibili.
+    """
+    
+    def __init__(self, period=1.0):
+        self.period = period
+        self.task = None
+        self.bus = None
+        self.arbitration_id = None
+        self.lock = threading.Lock()
+        self.last_sent = None
+        self.intervals = deque(maxlen=600)
+        self.sent_count = 0
+        self.timing_available = False
+    
+    def _on_send(self, msg):
+        # Chiamato dal task prima di ogni invio
+        now = time.perf_counter()
+        if self.last_sent is not None:
+            self.intervals.append(now - self.last_sent)
+        self.last_sent = now
+        self.sent_count += 1
+        app.can_message_counter += 1
+    
+    def send(self, dtc_params):
+        """Avvia (o aggiorna) l'invio ciclico del DTC; False se il task periodico non è disponibile"""
+        frame = get_dm1_frame(dtc_params)
+        log_dm1_values_once(frame)
+        msg = can.Message(arbitration_id=frame.arbitration_id, data=frame.data,
+                          is_extended_id=True, dlc=8)
+        
+        with self.lock:
+            try:
+                bus = can_bus_manager.get_bus(*get_can_params(), count_reuse=self.bus is None)
+                if (self.task is not None and self.bus is bus and
+                        self.arbitration_id == msg.arbitration_id):
+                    self.task.modify_data(msg)
+                    if hasattr(self.task, 'start'):
+                        self.task.start()  # No-op se il task è già attivo
+                else:
+                    if self.bus is not bus:
+                        # Statistiche per bus: un nuovo Source Address non le azzera
+                        self.intervals.clear()
+                        self.sent_count = 0
+                    self._stop_task()
+                    try:
+                        self.task = bus.send_periodic(msg, self.period, modifier_callback=self._on_send)
+                        self.timing_available = True
+                    except TypeError:
+                        # python-can < 4.2: nessun modifier_callback
+                        self.task = bus.send_periodic(msg, self.period)
+                        self.timing_available = False
+                    self.bus = bus
+                    self.arbitration_id = msg.arbitration_id
+                self.last_sent = None  # Non misurare la pausa tra un DTC e il successivo
+                return True
+            except Exception as e:
+                log_message(f"Periodic DM1 not available ({str(e)}), using software timing")
+                self._stop_task()
+                return False
+    
+    def is_alive(self):
+        """False se il task non invia più: thread fermato da un errore o bus chiuso/riaperto"""
+        with self.lock:
+            if self.task is None:
+                return False
+            thread = getattr(self.task, 'thread', None)  # ThreadBasedCyclicSendTask
+            if thread is not None and not thread.is_alive():
+                return False
+            return can_bus_manager.is_open(self.bus)
+    
+    def suspend(self):
+        """Ferma l'invio ciclico mantenendo il task per il DTC successivo"""
+        with self.lock:
+            if self.task is not None:
+                try:
+                    self.task.stop()
+                except Exception:
+                    self._stop_task()
+    
+    def _stop_task(self):
+        if self.task is not None:
+            try:
+                self.task.stop()
+            except Exception:
+                pass
+        self.task = None
+        self.bus = None
+        self.arbitration_id = None
+    
+    def stop(self):
+        with self.lock:
+            self._stop_task()
+    
+    def get_stats(self):
+        """Statistiche del periodo misurato (ms): n, media, min, max, jitter (deviazione standard)"""
+        stats = period_stats_ms(self.intervals)
+        stats.update({'sent': self.sent_count, 'timing_available': self.timing_available})
+        return stats
+
+def period_stats_ms(intervals):
+    """Statistiche (ms) di una serie di intervalli in secondi"""
+    intervals = list(intervals)
+    if not intervals:
+        return {'samples': 0}
+    periods_ms = np.array(intervals) * 1000.0
+    return {
+        'samples': len(periods_ms),
+        'mean_ms': float(periods_ms.mean()),
+        'min_ms': float(periods_ms.min()),
+        'max_ms': float(periods_ms.max()),
+        'jitter_ms': float(periods_ms.std()),
+    }
+
+dm1_periodic_sender = DM1PeriodicSender()
+atexit.register(dm1_periodic_sender.stop)
+
+def get_dm1_period_stats():
+    return dm1_periodic_sender.get_stats()
+
+class DM1BAMSender:
+    """
+    Trasmissione ciclica di un DM1 con più DTC (J1939 BAM): ogni periodo un TP.CM
+    seguito dai TP.DT distanziati di BAM_PACKET_SPACING. La sequenza ha ID diversi e
+    una spaziatura propria, quindi non può usare bus.send_periodic: il thread pianifica
+    gli invii su scadenze assolute (time.perf_counter), così la deriva non si accumula.
+    
+    send() sostituisce il messaggio anche a metà sequenza (la sequenza interrotta viene
+    abbandonata); suspend() ferma l'invio tra un gruppo e il successivo. I parametri CAN
+    sono letti una volta in send() e memorizzati con i messaggi: il thread di invio non
+    legge le variabili Tk.
+    """
+    
+    def __init__(self, period=1.0, spacing=BAM_PACKET_SPACING):
+        self.period = period
+        self.spacing = spacing
+        self.condition = threading.Condition()
+        self.messages = None
+        self.can_params = None
+        self.generation = 0
+        self.running = False
+        self.thread = None
+        self.intervals = deque(maxlen=600)
+        self.sent_count = 0
+    
+    def send(self, dtc_list):
+        """Avvia (o aggiorna) l'invio ciclico del DM1 con tutti i DTC della lista"""
+        frames = build_dm1_multi_frames(dtc_list)
+        for dtc in dtc_list:
+            log_dm1_values_once(get_dm1_frame(dtc))
+        messages = [can.Message(arbitration_id=arb_id, data=data, is_extended_id=True, dlc=8)
+                    for arb_id, data in frames]
+        can_params = get_can_params()
+        
+        with self.condition:
+            self.messages = messages
+            self.can_params = can_params
+            self.generation += 1
+            if self.thread is None or not self.thread.is_alive():
+                self.running = True
+                self.intervals.clear()
+                self.sent_count = 0
+                self.thread = threading.Thread(target=self._run, name="DM1BAMSender", daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+        
+        log_message(f"DM1 BAM: {len(dtc_list)} DTCs, {len(messages) - 1} TP.DT packets every {self.period:.1f}s")
+    
+    def suspend(self):
+        with self.condition:
+            self.messages = None
+            self.generation += 1
+            self.condition.notify_all()
+    
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.messages = None
+            self.generation += 1
+            self.condition.notify_all()
+            thread = self.thread
+            self.thread = None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+    
+    def _wait_until(self, deadline, generation):
+        """Attende la scadenza; False se nel frattempo il messaggio è cambiato o il sender è fermo"""
+        with self.condition:
+            while self.running and self.generation == generation:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return True
+                self.condition.wait(remaining)
+            return False
+    
+    def _send_sequence(self, messages, can_params, start, generation):
+        """TP.CM + TP.DT a scadenze fisse da start; False se la sequenza è stata interrotta"""
+        for packet, msg in enumerate(messages):
+            if packet and not self._wait_until(start + packet * self.spacing, generation):
+                return False
+            try:
+                can_bus_manager.send(msg, *can_params)
+            except Exception as e:
+                # Sequenza incompleta: i ricevitori la scartano per timeout, si riprova al ciclo dopo
+                log_message(f"CAN send error (BAM packet {packet}): {str(e)}")
+                return True
+        return True
+    
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.running and self.messages is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                messages = self.messages
+                can_params = self.can_params
+                generation = self.generation
+            
+            cycle_start = time.perf_counter()
+            last_cycle = None  # Non misurare la pausa tra un gruppo e il successivo
+            while True:
+                if last_cycle is not None:
+                    self.intervals.append(cycle_start - last_cycle)
+                last_cycle = cycle_start
+                
+                if not self._send_sequence(messages, can_params, cycle_start, generation):
+                    break
+                self.sent_count += 1
+                app.can_message_counter += 1
+                
+                cycle_start += self.period
+                if not self._wait_until(cycle_start, generation):
+                    break
+                # In ritardo di oltre un periodo (bus bloccato): riallinea invece di recuperare a raffica
+                now = time.perf_counter()
+                if now - cycle_start > self.period:
+                    cycle_start = now
+    
+    def get_stats(self):
+        """Statistiche del periodo tra due TP.CM consecutivi (ms)"""
+        stats = period_stats_ms(self.intervals)
+        stats['sent'] = self.sent_count
+        return stats
+
+dm1_bam_sender = DM1BAMSender()
+atexit.register(dm1_bam_sender.stop)
+
 # Sostituisci la funzione update_countdown con questa versione:
 def update_countdown():
     """Aggiorna il valore del countdown senza visualizzarlo nella preview"""
@@ -3379,34 +6149,18 @@ def perform_acquisition():
         if app.cap is not None and app.cap.isOpened():
             log_message("Webcam open and ready")
             
-            # Read a few frames to 'warm up' the webcam
-            for _ in range(3):
-                app.cap.read()
-                
-            start_time = time.time()
-            ret, frame = app.cap.read()
-            acquisition_time = time.time() - start_time
+            # Acquisizione burst ed elaborazione in un thread separato
+            threading.Thread(
+                target=process_burst_in_background,
+                args=(True,),
+                daemon=True
+            ).start()
             
-            log_message(f"Frame acquisition completed. Time: {acquisition_time:.3f} seconds")
-        
-            if ret:
-                log_message("Frame acquired successfully")
-                
-                # Elabora l'immagine in un thread separato
-                threading.Thread(
-                    target=process_frame_in_background,
-                    args=(frame.copy(), True),
-                    daemon=True
-                ).start()
-                
-                # Reset acquisition flag immediately, don't wait for processing to complete
-                app.ecff_received = False
-                
-                # Update CSV index after recognition will be handled in the thread
-                log_message("Image processing started in background thread")
-            else:
-                log_message("Error: unable to acquire frame from webcam")
-                app.ecff_received = False
+            # Reset acquisition flag immediately, don't wait for processing to complete
+            app.ecff_received = False
+            
+            # Update CSV index after recognition will be handled in the thread
+            log_message("Image processing started in background thread")
         else:
             log_message("Error: webcam not initialized or closed")
             app.ecff_received = False
@@ -3434,80 +6188,112 @@ def process_frame_in_background(frame, verify_expected=False):
     except Exception as e:
         log_message(f"Error in background processing: {str(e)}")
 
+def process_burst_in_background(verify_expected=False):
+    """Acquisisce e riconosce un burst di frame in un thread di background"""
+    try:
+        log_message("Background processing: starting burst recognition...")
+        
+        start_time = time.time()
+        recognized_values, lamp_brightness_status, _ = recognize_burst(verify_expected)
+        if recognized_values is None:
+            log_message("Error: unable to acquire frame from webcam")
+            return
+        log_message(f"Burst recognition completed. Time: {time.time() - start_time:.3f} seconds")
+        
+        # Aggiorna l'UI nel thread principale
+        root.after(0, lambda: update_ui_after_recognition(recognized_values, lamp_brightness_status))
+        
+        # Update CSV index after recognition
+        if app.dtc_frame:
+            root.after(0, lambda: app.dtc_frame.next_dtc())
+            
+        log_message("Background processing: recognition completed")
+    except Exception as e:
+        log_message(f"Error in background processing: {str(e)}")
+
 def update_ui_after_recognition(recognized_values, lamp_brightness_status):
     """Aggiorna l'interfaccia utente dopo il completamento del riconoscimento"""
     # Questa funzione viene eseguita nel thread principale (UI thread)
     log_message("Updating UI with recognition results")
 
-def perform_canalyzer_acquisition():
-    """Performs a single acquisition cycle in Canalyzer mode with DTC verification"""
+def perform_canalyzer_acquisition(on_done=None):
+    """
+    Performs a single acquisition cycle in Canalyzer mode with DTC verification.
+    Il burst OCR gira in un thread di lavoro; risposta FF99 e on_done vengono
+    eseguiti nel thread Tk al termine (on_done anche se l'acquisizione non parte).
+    """
     if not app.running:
         log_message("Cannot perform acquisition - application not running")
+        if on_done is not None:
+            on_done()
         return
     
     # Modifica: in modalità NON-CANALYZER non controlliamo ecff_received perché
     # è già stato impostato nel dm1_sender_thread
     if app.is_canalyzer_mode and not app.ecff_received:
         log_message("Cannot perform acquisition - no pending DM1 message")
+        if on_done is not None:
+            on_done()
         return
     
+    log_message("Starting acquisition cycle")
+    threading.Thread(target=canalyzer_acquisition_worker, args=(on_done,),
+                     name="CanalyzerAcquisition", daemon=True).start()
+
+def canalyzer_acquisition_worker(on_done):
+    """Burst OCR fuori dal thread Tk; il risultato torna al thread Tk con root.after"""
+    recognized_values, lamp_brightness_status = None, None
     try:
-        log_message("Starting acquisition cycle")
-        
         if app.cap is not None and app.cap.isOpened():
             log_message("Webcam open and ready for acquisition")
             
-            # Read a few frames to 'warm up' the webcam
-            for _ in range(3):
-                app.cap.read()
-                
-            ret, frame = app.cap.read()
+            # Riconoscimento senza verifica su un burst di frame
+            log_message("Starting image recognition...")
+            recognized_values, lamp_brightness_status, _ = recognize_burst(verify_expected=False)
             
-            if ret:
-                log_message("Frame acquired successfully")
-                
-                # Usa direttamente il frame catturato
-                processed_frame = frame.copy()
-                
-                # Riconoscimento senza verifica
-                log_message("Starting image recognition...")
-                recognized_values, lamp_brightness_status = process_frame(processed_frame, verify_expected=False)
-                                
-                # Invia il messaggio CAN come risposta
-                log_message("Sending FF99 response...")
-                send_canalyzer_can_message(recognized_values, lamp_brightness_status)
-                
-                # Reset flag acquisizione
-                app.ecff_received = False
-                
-                # In modalità DTC Test, non avanza al prossimo DTC qui
-                # Sarà gestito dal thread dm1_sender_thread
-                
-                # Log completamento ciclo
-                log_message(">>> Recognition cycle completed")
-                
-            else:
+            if recognized_values is None:
                 log_message("Error: unable to acquire frame from webcam")
-                app.ecff_received = False
         else:
             log_message("Error: webcam not initialized or closed")
-            app.ecff_received = False
     except Exception as e:
         log_message(f"Error during acquisition: {str(e)}")
+        recognized_values = None
+    
+    root.after(0, finish_canalyzer_acquisition, recognized_values, lamp_brightness_status, on_done)
+
+def finish_canalyzer_acquisition(recognized_values, lamp_brightness_status, on_done):
+    """Risposta FF99 (thread Tk: legge i parametri CAN dall'interfaccia) e reset dei flag"""
+    try:
+        if recognized_values is not None:
+            # Invia il messaggio CAN come risposta
+            log_message("Sending FF99 response...")
+            send_canalyzer_can_message(recognized_values, lamp_brightness_status)
+            
+            # In modalità DTC Test, non avanza al prossimo DTC qui
+            # Sarà gestito dal thread dm1_sender_thread
+            
+            # Log completamento ciclo
+            log_message(">>> Recognition cycle completed")
+    except Exception as e:
+        log_message(f"Error during acquisition: {str(e)}")
+    finally:
+        # Reset flag acquisizione
         app.ecff_received = False
+        if on_done is not None:
+            on_done()
 
 def process_canalyzer_recognition():
     """
     Funzione callback che gestisce l'acquisizione dopo il timeout.
     Chiamata dopo 60 secondi dal rilevamento di un nuovo messaggio.
     """
-    # Esegui l'acquisizione
-    perform_canalyzer_acquisition()
-    
-    # Resetta il flag di elaborazione per permettere nuovi messaggi
-    app.canalyzer_is_processing = False
+    def on_done():
+        # Resetta il flag di elaborazione per permettere nuovi messaggi
+        app.canalyzer_is_processing = False
+        log_message("Ready for next DM1 message")
     
-    log_message("Ready for next DM1 message")
+    # Esegui l'acquisizione (in background)
+    perform_canalyzer_acquisition(on_done)
 
 def schedule_canalyzer_acquisition():
     """Funzione intermedia che prepara e avvia l'acquisizione dopo il countdown"""
@@ -3516,12 +6302,13 @@ def schedule_canalyzer_acquisition():
     # Aggiorna l'ultimo messaggio elaborato
     app.canalyzer_last_processed_message = app.message_to_process
     
-    # Esegui l'acquisizione
-    perform_canalyzer_acquisition()
+    def on_done():
+        # Resetta il flag di acquisizione programmata
+        app.canalyzer_is_acquisition_scheduled = False
+        log_message("Ready for next new DM1 message")
     
-    # Resetta il flag di acquisizione programmata
-    app.canalyzer_is_acquisition_scheduled = False
-    log_message("Ready for next new DM1 message")
+    # Esegui l'acquisizione (in background)
+    perform_canalyzer_acquisition(on_done)
 
 
 
@@ -3725,12 +6512,13 @@ def extract_numbers_from_paddle_result(result):
     
     return numbers
 
-def select_best_paddle_result(results_dict):
+def select_best_paddle_result(results_dict, length_bias=True):
     """
     Seleziona il miglior risultato dalle multiple detection di PaddleOCR.
     
     Args:
         results_dict: Dizionario con i risultati di riconoscimento
+        length_bias: False per non favorire lunghezze tipiche (voto tra frame dello stesso display)
     
     Returns:
         tuple: (numero, confidenza, metodo) o None
@@ -3753,12 +6541,13 @@ def select_best_paddle_result(results_dict):
         
         # Fattore di lunghezza (favorisce numeri di lunghezza ragionevole)
         length_factor = 1.0
-        if len(number) == 1:  # Numeri singoli (come FMI)
-            length_factor = 1.2
-        elif len(number) in [3, 4]:  # Numeri a 3-4 cifre (come SPN)
-            length_factor = 1.5
-        elif len(number) > 6:  # Numeri troppo lunghi, probabilmente errori
-            length_factor = 0.5
+        if length_bias:
+            if len(number) == 1:  # Numeri singoli (come FMI)
+                length_factor = 1.2
+            elif len(number) in [3, 4]:  # Numeri a 3-4 cifre (come SPN)
+                length_factor = 1.5
+            elif len(number) > 6:  # Numeri troppo lunghi, probabilmente errori
+                length_factor = 0.5
         
         # Score finale
         score = (frequency * 0.3 + avg_confidence * 0.4 + max_confidence * 0.3) * length_factor
@@ -3780,16 +6569,22 @@ def select_best_paddle_result(results_dict):
     return None
 
 
-def process_frame(frame, verify_expected=True):
+def process_frame(frame, verify_expected=True, allow_reuse=True):
     """
-    Versione migliorata di process_frame che usa l'OCR avanzato
+    Versione migliorata di process_frame che usa l'OCR avanzato.
+    Con allow_reuse, se le aree numeriche non sono cambiate dall'ultimo riconoscimento
+    l'OCR viene saltato e recognized_values["REUSED"] è True. Senza allow_reuse
+    nessun risultato precedente viene riusato (change gate, cache OCR, fast path).
     """
-    recognized_values = {"SPN": None, "FMI": None}
+    recognized_values = {"SPN": None, "FMI": None, "REUSED": False, "CONFIDENCE": {}}
     lamp_brightness = [False, False]  # Amber, Red
 
     # Memorizza ROI per debug in caso di mismatch
     spn_roi = None
     fmi_roi = None
+    
+    # ROI numeriche raccolte per il riconoscimento in un'unica passata
+    number_rois = {}
 
     for area in app.areas:
         if len(area) < 6:
@@ -3802,29 +6597,45 @@ def process_frame(frame, verify_expected=True):
         roi = frame[y1:y2, x1:x2]
 
         if area_type == "Number":
-            # USA L'OCR MIGLIORATO
-            number = recognize_number_from_roi(roi, app.ocr_threshold, area_type, slot_number)
+            number_rois[slot_number] = roi
 
             if slot_number == 1:
-                recognized_values["SPN"] = number
                 spn_roi = roi.copy()
             elif slot_number == 2:
-                recognized_values["FMI"] = number
                 fmi_roi = roi.copy()
 
-        elif area_type == "Lamp":
-            # Elaborazione lampade rimane invariata
-            avg = np.mean(roi, axis=(0, 1)).astype(int)
-            brightness = 0.299 * avg[2] + 0.587 * avg[1] + 0.114 * avg[0]
-            is_on = brightness > app.lamp_threshold
-            
-            if slot_number == 1:
-                lamp_brightness[0] = is_on
-            elif slot_number == 2:
-                lamp_brightness[1] = is_on
+
+    # Lampade: tutte le aree in un'unica passata (isteresi + lampeggio)
+    for slot_number, (_, is_on, _) in app.lamp_engine.update(frame, app.lamp_threshold).items():
+        if slot_number in (1, 2):
+            lamp_brightness[slot_number - 1] = is_on
+
+    # USA L'OCR MIGLIORATO - SPN e FMI nella stessa chiamata batch
+    if number_rois:
+        if allow_reuse and app.ocr_change_gate_enabled and number_rois_unchanged(number_rois):
+            # Display invariato: riusa l'ultimo risultato senza rifare l'OCR
+            numbers = dict(app.last_number_values)
+            recognized_values["REUSED"] = True
+            log_message("♻️ Number areas unchanged - reusing previous OCR result")
+        else:
+            numbers = recognize_numbers_from_rois(number_rois, app.ocr_threshold, fresh=not allow_reuse)
+            remember_number_rois(number_rois, numbers)
+        recognized_values["SPN"] = numbers.get(1)
+        recognized_values["FMI"] = numbers.get(2)
+        recognized_values["CONFIDENCE"] = {
+            "SPN": app.last_number_confidences.get(1, 0),
+            "FMI": app.last_number_confidences.get(2, 0)
+        }
 
     # Debug: salva ROI in caso di mismatch (invariato)
-    if verify_expected and hasattr(app, "csv_data") and app.current_dtc_index < len(app.csv_data):
+    if verify_expected:
+        save_rois_if_mismatch(recognized_values, spn_roi, fmi_roi)
+
+    return recognized_values, lamp_brightness
+
+def save_rois_if_mismatch(recognized_values, spn_roi, fmi_roi):
+    """Salva le ROI SPN/FMI se i valori riconosciuti non corrispondono al DTC atteso"""
+    if hasattr(app, "csv_data") and app.current_dtc_index < len(app.csv_data):
         current_dtc = app.csv_data[app.current_dtc_index]
         expected_spn = int(current_dtc.get("SPN", 0))
         expected_fmi = int(current_dtc.get("FMI", 0))
@@ -3832,11 +6643,133 @@ def process_frame(frame, verify_expected=True):
         if (recognized_values["SPN"] != expected_spn or recognized_values["FMI"] != expected_fmi):
             save_failed_roi_images(app.current_dtc_index, spn_roi, fmi_roi)
 
-    return recognized_values, lamp_brightness
-
 
+# ====== Burst Recognition ======
+def capture_burst_frames(frame_queue, stop_event, max_frames, trigger_time):
+    """
+    Producer del burst: preleva dal thread di cattura frame successivi al trigger
+    (e ognuno successivo al precedente) mentre il consumer esegue l'OCR.
+    """
+    try:
+        grabber = start_frame_grabber()
+        if grabber is None:
+            log_message("Error: webcam not initialized or closed")
+            return
+        
+        after_time = trigger_time
+        for _ in range(max_frames):
+            if stop_event.is_set():
+                return
+            entry = grabber.wait_for_frame_after(after_time, timeout=1.0)
+            if entry is None:
+                log_message("Error: unable to acquire frame from webcam")
+                return
+            
+            # Il frame successivo deve iniziare dopo l'inizio lettura di questo
+            after_time = entry[1] + 1e-6
+            while not stop_event.is_set():
+                try:
+                    frame_queue.put(entry[2], timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+    except Exception as e:
+        log_message(f"Error during burst capture: {str(e)}")
 
+def burst_consensus_reached(votes):
+    """Consenso: per SPN e FMI il valore in testa ha almeno app.burst_consensus_votes voti e nessun concorrente"""
+    for field_votes in votes.values():
+        if len(field_votes) != 1:
+            return False
+        detections = next(iter(field_votes.values()))
+        if len(detections) < app.burst_consensus_votes:
+            return False
+    return True
 
+def recognize_burst(verify_expected=True, max_frames=None, trigger_time=None):
+    """
+    Riconoscimento su un burst di frame con voto temporale: la cattura del frame
+    successivo avviene mentre si esegue l'OCR del precedente, e il burst si ferma
+    appena i frame concordano (burst_consensus_reached). Senza consenso i voti
+    vengono combinati con select_best_paddle_result (frequenza + confidenza).
+    Vengono usati solo frame catturati dopo trigger_time (default: adesso).
+    
+    Returns:
+        tuple: (recognized_values, lamp_brightness, frame) - frame è l'ultimo frame
+               elaborato; (None, None, None) se non è stato acquisito nessun frame
+    """
+    max_frames = max_frames or app.burst_max_frames
+    trigger_time = trigger_time if trigger_time is not None else time.time()
+    frame_queue = queue.Queue(maxsize=1)
+    stop_event = threading.Event()
+    producer = threading.Thread(target=capture_burst_frames,
+                                args=(frame_queue, stop_event, max_frames, trigger_time),
+                                name="BurstCapture", daemon=True)
+    producer.start()
+    
+    votes = {"SPN": {}, "FMI": {}}
+    lamp_votes = [0, 0]
+    frames_used = 0
+    reused_frames = 0
+    last_frame = None
+    consensus = False
+    
+    try:
+        while frames_used < max_frames:
+            try:
+                frame = frame_queue.get(timeout=0.5)
+            except queue.Empty:
+                if producer.is_alive():
+                    continue
+                break
+            
+            frames_used += 1
+            last_frame = frame
+            # Riuso (change gate, cache, fast path) solo per il primo frame: i successivi
+            # sono letture PaddleOCR nuove, così un errore del primo frame non vince il voto
+            values, lamps = process_frame(frame, verify_expected=False, allow_reuse=(frames_used == 1))
+            reused_frames += int(values.get("REUSED", False))
+            
+            for field in votes:
+                if values.get(field) is not None:
+                    votes[field].setdefault(str(values[field]), []).append({
+                        'confidence': values["CONFIDENCE"].get(field, 0),
+                        'method': f"frame_{frames_used}"
+                    })
+            for idx, is_on in enumerate(lamps[:2]):
+                lamp_votes[idx] += int(bool(is_on))
+            
+            if burst_consensus_reached(votes):
+                consensus = True
+                break
+    finally:
+        stop_event.set()
+        producer.join(timeout=2.0)
+    
+    if frames_used == 0:
+        return None, None, None
+    
+    # REUSED: nessun frame del burst è passato dall'OCR (risultato del change gate)
+    recognized_values = {"SPN": None, "FMI": None, "REUSED": reused_frames == frames_used,
+                         "CONFIDENCE": {}, "FRAMES": frames_used}
+    for field, field_votes in votes.items():
+        best = select_best_paddle_result(field_votes, length_bias=False)
+        if best:
+            recognized_values[field] = best[0]
+            recognized_values["CONFIDENCE"][field] = best[1]
+    
+    # Lampada accesa se accesa nella maggioranza dei frame
+    lamp_brightness = [count > 0 and count * 2 >= frames_used for count in lamp_votes]
+    
+    log_message(f"🎞️ Burst: {frames_used} frame(s), "
+               f"{'consensus' if consensus else 'vote'} → SPN={recognized_values['SPN']}, "
+               f"FMI={recognized_values['FMI']}")
+    
+    if verify_expected:
+        rois = get_number_area_rois(last_frame)
+        save_rois_if_mismatch(recognized_values, rois.get(1), rois.get(2))
+    
+    return recognized_values, lamp_brightness, last_frame
 
 def diagnose_ocr_issues(roi, area_name, threshold_value):
     """
@@ -3883,11 +6816,8 @@ def diagnose_ocr_issues(roi, area_name, threshold_value):
 
 def process_lamp_area(roi, display_frame, x1, y1, x2, y2, threshold):
     """Processa un'area di lampada (rimane uguale alla versione originale)"""
-    # Elabora le aree delle lampade
-    avg_lamp = np.mean(roi, axis=(0,1)).astype(int).tolist()
-    
     # Calcola la luminosità utilizzando la formula standard
-    luminosity = 0.299*avg_lamp[2] + 0.587*avg_lamp[1] + 0.114*avg_lamp[0]
+    luminosity = lamp_luma(roi)
     
     # Determina se la lampada è accesa basandosi sulla soglia
     is_bright = luminosity > threshold
@@ -3940,10 +6870,72 @@ def verify_recognition_results(spn_value, fmi_value, lamp_amber_status, lamp_red
             app.dtc_frame.csv_data[app.dtc_frame.current_dtc_index]["error_found"] = True
 
 # ====== Main Control Functions ======
+def format_can_data(data):
+    """Payload CAN come stringa esadecimale (solo per il log)"""
+    return data.hex(' ').upper() if data is not None else None
+
+class CanalyzerDM1Listener(can.Listener):
+    """
+    Listener DM1 della modalità Canalyzer, eseguito nel thread del can.Notifier.
+    Ignora il source address indicato e avvia il countdown solo per un payload diverso
+    dall'ultimo elaborato; i duplicati sono confrontati sui bytes grezzi del frame.
+    """
+    
+    def __init__(self, wait_pgn, ignore_sa):
+        self.wait_pgn = wait_pgn
+        self.ignore_sa = ignore_sa
+        self.error = threading.Event()
+        self.last_error = None
+    
+    def on_message_received(self, msg):
+        # Il PGN viene ricontrollato nel caso il driver non applichi i filtri
+        if msg.dlc != 8 or ((msg.arbitration_id >> 8) & 0xFFFF) != self.wait_pgn:
+            return
+        
+        # Il source address da ignorare non è esprimibile con una maschera di accettazione
+        source_address = msg.arbitration_id & 0xFF
+        if source_address == self.ignore_sa:
+            return
+        
+        # Se un'acquisizione è già programmata, ignora tutti i messaggi
+        if app.canalyzer_is_acquisition_scheduled:
+            return
+        
+        current_message = bytes(msg.data)
+        
+        # Se è un nuovo messaggio (diverso dall'ultimo elaborato)
+        if current_message != app.canalyzer_last_processed_message:
+            dtc = decode_dm1_payload(current_message)
+            log_message(f"NEW DM1 MESSAGE DETECTED from SA=0x{source_address:02X} "
+                       f"(SPN={dtc['SPN']}, FMI={dtc['FMI']}, Lamp={dtc['LAMP']})")
+            log_message(f"Current: [{format_can_data(current_message)}]")
+            log_message(f"Last processed: [{format_can_data(app.canalyzer_last_processed_message)}]")
+            
+            # Memorizza questo messaggio come "da elaborare"
+            app.message_to_process = current_message
+            
+            # Imposta i flag
+            app.ecff_received = True
+            app.canalyzer_is_acquisition_scheduled = True
+            
+            # Avvia il countdown di 60 secondi
+            root.after(0, lambda: start_recognition_countdown(60))
+            
+            # Programma l'acquisizione dopo 60 secondi
+            root.after(60000, schedule_canalyzer_acquisition)
+        else:
+            log_message(f"Ignoring duplicate DM1 message (same as last processed)")
+    
+    def on_error(self, exc):
+        # Errore del driver: il Notifier si ferma, il riavvio è in wait_for_canalyzer_message
+        self.last_error = exc
+        self.error.set()
+
 def wait_for_canalyzer_message():
     """
     Attende un messaggio DM1 in modalità Canalyzer.
     Ignora messaggi da source address 0x27 e gestisce il countdown di 60 secondi.
+    La ricezione è filtrata sul PGN DM1 e gestita da CanalyzerDM1Listener.
     """
     try:
         # PGN fisso per DM1
@@ -3951,10 +6943,6 @@ def wait_for_canalyzer_message():
         # Source address da ignorare
         ignore_sa = 0x27
         
-        # Ottieni parametri CAN
-        channel = can_channel_var.get()
-        bitrate = int(can_bitrate_var.get())
-        
         # Reset delle variabili di stato
         app.canalyzer_last_processed_message = None
         app.canalyzer_is_acquisition_scheduled = False
@@ -3962,63 +6950,27 @@ def wait_for_canalyzer_message():
         
         log_message(f"Waiting for DM1 message with PGN 0x{wait_pgn:04X} in Canalyzer mode (ignoring SA=0x{ignore_sa:02X})...")
         
-        # Crea il bus CAN
-        bus = None
+        # Bus CAN condiviso (resta aperto per le risposte FF99)
+        listener = CanalyzerDM1Listener(wait_pgn, ignore_sa)
+        receiver = CANReceiver([wait_pgn])
         try:
-            bus = create_can_bus('vector', channel, bitrate)
+            receiver.start([listener], *get_can_params())
             
-            # Loop principale di attesa
+            # I frame arrivano al listener: qui solo supervisione e riconnessione
             while app.running:
-                # Ricezione con timeout
-                msg = bus.recv(timeout=1.0)
+                if not listener.error.wait(timeout=1.0):
+                    continue
                 
-                if not app.running:
-                    break
-                    
-                if msg and msg.dlc == 8:
-                    # Estrai il PGN e il source address
-                    received_pgn = (msg.arbitration_id >> 8) & 0xFFFF
-                    source_address = msg.arbitration_id & 0xFF
-                    
-                    # Se il PGN corrisponde a quello atteso
-                    if received_pgn == wait_pgn:
-                        # Verifica se il source address è quello da ignorare
-                        if source_address == ignore_sa:
-                            # Ignora silenziosamente questo messaggio
-                            continue
-                        
-                        # Converti il messaggio in una stringa per il confronto
-                        current_message = ' '.join(f'{b:02X}' for b in msg.data)
-                        
-                        # Se un'acquisizione è già programmata, ignora tutti i messaggi
-                        if app.canalyzer_is_acquisition_scheduled:
-                            continue
-                            
-                        # Se è un nuovo messaggio (diverso dall'ultimo elaborato)
-                        if current_message != app.canalyzer_last_processed_message:
-                            log_message(f"NEW DM1 MESSAGE DETECTED from SA=0x{source_address:02X}")
-                            log_message(f"Current: [{current_message}]")
-                            log_message(f"Last processed: [{app.canalyzer_last_processed_message}]")
-                            
-                            # Memorizza questo messaggio come "da elaborare"
-                            app.message_to_process = current_message
-                            
-                            # Imposta i flag
-                            app.ecff_received = True
-                            app.canalyzer_is_acquisition_scheduled = True
-                            
-                            # Avvia il countdown di 60 secondi
-                            #log_message(">>> Starting 60 second countdown for recognition")
-                            root.after(0, lambda: start_recognition_countdown(60))
-                            
-                            # Programma l'acquisizione dopo 60 secondi
-                            root.after(60000, schedule_canalyzer_acquisition)
-                        else:
-                            log_message(f"Ignoring duplicate DM1 message (same as last processed)")
-            
-            # Chiudi il bus quando esci dal loop
-            if bus:
-                bus.shutdown()
+                listener.error.clear()
+                log_message(f"CAN receive error ({str(listener.last_error)}), reconnecting bus...")
+                time.sleep(0.5)
+                if app.running:
+                    try:
+                        receiver.restart()
+                    except Exception as e:
+                        # Riprova al giro successivo
+                        listener.last_error = e
+                        listener.error.set()
                 
         except can.CanError as e:
             log_message(f"CAN error during Canalyzer listening: {str(e)}")
@@ -4026,12 +6978,7 @@ def wait_for_canalyzer_message():
             log_message(f"Error during Canalyzer message waiting: {str(e)}")
             log_message(f"Exception details: {type(e)}")
         finally:
-            # Chiudi sempre il bus se è ancora aperto
-            if bus:
-                try:
-                    bus.shutdown()
-                except:
-                    pass
+            receiver.stop()
                     
     except Exception as e:
         log_message(f"Error initializing Canalyzer CAN waiting: {str(e)}")
@@ -4066,9 +7013,7 @@ def stop_recognition():
     # Chiude la webcam solo se non c'è live view attiva
     if not hasattr(app, 'live_view_active') or not app.live_view_active:
         if app.cap is not None and app.cap.isOpened():
-            app.cap.release()
-            app.cap = None
-            log_message("Webcam closed")
+            camera_controller.close(lambda ok: log_message("Webcam closed"))
     
     log_message("Acquisition stopped. CAN counter reset.")
     
@@ -4090,24 +7035,24 @@ def stop_recognition():
 
 def reopen_area_selection():
     """Reopens the area selection window with the current areas"""
-    try:
-        # Se la webcam è già chiusa, riapriamola
-        if app.cap is None or not app.cap.isOpened():
-            app.cap = cv2.VideoCapture(app.selected_camera, cv2.CAP_DSHOW)
-            if not app.cap.isOpened():
+    # Se la webcam è chiusa (o in chiusura), riaprila in background e continua al termine
+    if camera_controller.busy or app.cap is None or not app.cap.isOpened():
+        def on_webcam_ready(success):
+            if app.running:
+                return  # Nel frattempo è ripartito il riconoscimento
+            if success:
+                show_area_selection_window()
+            else:
                 log_message("Error reopening webcam for area selection")
-                return
-                
-            # Imposta la risoluzione
-            set_camera_resolution(app.cap, app.selected_resolution)
-            
-            # Applica i parametri della webcam
-            update_webcam_contrast(webcam_contrast_slider.get())
-            update_webcam_saturation(webcam_saturation_slider.get())
-            update_webcam_exposure(webcam_exposure_slider.get())
-        
-        # Acquisisci un nuovo frame
-        ret, app.frame = app.cap.read()
+        camera_controller.open(on_webcam_ready)
+        return
+    show_area_selection_window()
+
+def show_area_selection_window():
+    """Mostra la finestra di selezione aree con le aree correnti (webcam già aperta)"""
+    try:
+        # Acquisisci un frame catturato dopo l'applicazione dei parametri (anche quelli in debounce)
+        ret, app.frame = read_frame_after(flush_webcam_properties(), timeout=2.0)
         if not ret:
             log_message("Error acquiring frame for area selection")
             return
@@ -4158,18 +7103,32 @@ def reopen_area_selection():
 
 def init_camera_list():
     """Function to call after the interface has been created"""
+    global camera_enumerator
     #log_time("Inizio init_camera_list")
     
-    # Detect available webcams - usa la versione leggera per l'avvio
-    # cameras = list_cameras()  # Versione pesante originale
-    cameras = list_cameras_light()  # Versione leggera per l'avvio rapido
+    # Webcam dalla cache su disco (istantaneo); senza cache usa la versione leggera
+    camera_enumerator = CameraEnumerator()
+    cameras = camera_enumerator.cameras() or list_cameras_light()
+    update_camera_list(cameras)
     
+    # Sonda concorrente in background: aggiorna cache, elenco e risoluzioni
+    # (la webcam aperta nel frattempo dall'applicazione viene riservata e saltata)
+    camera_enumerator.discover(on_done=update_camera_list)
+    
+    #log_time("Fine init_camera_list")
+
+def update_camera_list(cameras):
+    """Aggiorna la combobox delle webcam e le risoluzioni della webcam selezionata"""
     if not cameras:
         log_message("WARNING: No webcams found!")
-    else:
-        log_message(f"Webcams found: {len(cameras)}")
+        return
+    log_message(f"Webcams found: {len(cameras)}")
     
-    #log_time("Fine init_camera_list")
+    camera_listbox['values'] = cameras
+    selected = f"Webcam {app.selected_camera}"
+    if selected in cameras:
+        camera_listbox.set(selected)
+    apply_camera_capabilities(app.selected_camera)
 
 
 def update_channel_options(event=None):
@@ -4188,6 +7147,9 @@ def initialize_application():
     """Initializes the application and sets up the UI components"""
     #log_time("Inizio initialize_application")
     
+    # PaddleOCR (Tesseract removed): import e warm-up in background, in parallelo al resto dell'avvio
+    start_paddle_background_init()
+    
     # Detect available webcams
     #log_time("Prima di init_camera_list")
     init_camera_list()
@@ -4256,15 +7218,7 @@ def initialize_application():
     # Ora che output_text è definito, possiamo visualizzare tutti i log di timing
     #display_time_logs()
 
-    # Inizializza PaddleOCR se richiesto
-    log_message("🚀 Initializing PaddleOCR (Tesseract removed)")
-    if initialize_paddle_ocr():
-        log_message("✅ Application ready with PaddleOCR")
-        # Crea subito una cartella debug di test
-        force_paddle_debug_test()
-    else:
-        log_message("❌ CRITICAL ERROR: Cannot initialize PaddleOCR!")
-        log_message("❌ Application cannot function without OCR engine")
+    log_message("🚀 PaddleOCR is loading in background - camera and CAN controls are already usable")
 
 def display_time_logs():
     """Visualizza tutti i log di timing memorizzati"""
@@ -4401,8 +7355,8 @@ def play_asc_trace(messages, dtc_frame):
     try:
         log_message(f"Starting ASC trace playback with {len(messages)} messages")
         
-        # Apri il bus UNA SOLA VOLTA
-        bus = create_can_bus('vector', channel, bitrate)
+        # Bus condiviso, aperto una sola volta
+        can_bus_manager.get_bus('vector', channel, bitrate)
         app.asc_playback_active = True
         
         # Loop esterno per la riproduzione ciclica
@@ -4426,7 +7380,7 @@ def play_asc_trace(messages, dtc_frame):
                         is_extended_id=msg_data['is_extended_id'],
                         dlc=len(msg_data['data'])
                     )
-                    bus.send(can_msg)
+                    can_bus_manager.send(can_msg, 'vector', channel, bitrate)
                     msg_counter += 1
                 except Exception as e:
                     log_message(f"Error sending CAN message: {str(e)}")
@@ -4448,9 +7402,6 @@ def play_asc_trace(messages, dtc_frame):
         log_message(f"Error in ASC trace playback: {str(e)}")
         app.asc_playback_active = False
         root.after(0, lambda: update_asc_player_ui(dtc_frame, False))
-    finally:
-        if 'bus' in locals() and bus:
-            bus.shutdown()
 
 def stop_asc_playback():
     """Ferma la riproduzione della traccia ASC"""
@@ -4541,9 +7492,10 @@ def stop_asc_file_playback(dtc_frame):
     log_message("ASC playback stopped by user")
 
 
-def verify_ff99_response(sent_dtc, received_values, frame=None):
+def verify_ff99_response(sent_dtc, received_values, frame=None, dtc_index=None):
     """
-    Versione migliorata con tracking delle performance OCR
+    Versione migliorata con tracking delle performance OCR.
+    dtc_index (1-based) serve per i DM1 multi-DTC; default: DTC corrente.
     """
     # Confronta valori (logica invariata)
     spn_match = sent_dtc['SPN'] == received_values['SPN']
@@ -4559,7 +7511,8 @@ def verify_ff99_response(sent_dtc, received_values, frame=None):
     )
     
     # Determina indice DTC corrente
-    dtc_index = app.current_dtc_index + 1
+    if dtc_index is None:
+        dtc_index = app.current_dtc_index + 1
     
     # Log del risultato (logica invariata)
     if not hasattr(app, 'logged_dtc_results'):
@@ -4578,6 +7531,18 @@ def verify_ff99_response(sent_dtc, received_values, frame=None):
                    f"Overall: {stats['overall_success_rate']:.1f}%, "
                    f"SPN: {stats['spn_success_rate']:.1f}%, "
                    f"FMI: {stats['fmi_success_rate']:.1f}%")
+        if app.ocr_cascade_enabled:
+            log_message(f"📊 OCR Cascade: {get_ocr_cascade_stats()}")
+        if app.ocr_cache_enabled:
+            cache_stats = app.ocr_cache.get_stats()
+            log_message(f"📊 OCR Cache: {cache_stats['hit_rate']:.1f}% hits "
+                       f"({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}), "
+                       f"{cache_stats['size']}/{cache_stats['max_size']} entries, "
+                       f"{cache_stats['evictions']} evictions")
+        bus_stats = can_bus_manager.get_stats()
+        log_message(f"📊 CAN Bus: {bus_stats['opened']} opened, {bus_stats['reused']} reused, "
+                   f"{bus_stats['reconnects']} reconnects, {bus_stats['sent']} sent, "
+                   f"{bus_stats['send_errors']} send errors")
     
     # Resto della logica invariata...
     if is_match:
@@ -4829,6 +7794,10 @@ class DTCAutoTestFrame(tk.Frame):
                                 dtc_entry["DESCRIPTION"] = row[col_map["DESCRIPTION"]]
                             else:
                                 dtc_entry["DESCRIPTION"] = f"DTC {dtc_entry['SPN']}-{dtc_entry['FMI']}"
+                            
+                            # Frame DM1 codificato una sola volta (validato contro la replica CAPL)
+                            dtc_entry["DM1"] = build_dm1_frame(dtc_entry["SPN"], dtc_entry["FMI"],
+                                                               lamp_status, sa_value, validate=True)
                                 
                             app.csv_data.append(dtc_entry)
                             
@@ -4853,7 +7822,7 @@ class DTCAutoTestFrame(tk.Frame):
 
         log_message("First 3 DTC entries:")
         for dtc in app.csv_data[:3]:
-            log_message(str(dtc))
+            log_message(str({key: value for key, value in dtc.items() if key != "DM1"}))
 
 
     def dm1_sender_thread(self):
@@ -4887,6 +7856,14 @@ class DTCAutoTestFrame(tk.Frame):
                     time.sleep(0.5)
                     continue
                 
+                # Più DTC nello stesso DM1 (BAM): slot dedicato
+                group = self.next_dtc_group(app.current_dtc_index)
+                if len(group) > 1:
+                    if not self.send_dtc_group(group, total_dtcs):
+                        test_successful = False
+                    time.sleep(1)
+                    continue
+                
                 # Estrai il DTC corrente
                 current_dtc = app.csv_data[app.current_dtc_index]
                 
@@ -4913,7 +7890,10 @@ class DTCAutoTestFrame(tk.Frame):
                 log_message(">>> Starting 60 second countdown for recognition")
                 
                 # Programmiamo l'acquisizione dopo 60 secondi
-                root.after(60000, lambda idx=current_index: execute_dtc_acquisition_with_screenshot(idx))
+                # Il burst OCR gira in un thread di lavoro, non nel thread Tk
+                root.after(60000, lambda idx=current_index: threading.Thread(
+                    target=execute_dtc_acquisition_with_screenshot, args=(idx,),
+                    name="DTCAcquisition", daemon=True).start())
                 
                 # Ciclo di invio del messaggio DM1 
                 start_time = time.time()
@@ -4923,6 +7903,10 @@ class DTCAutoTestFrame(tk.Frame):
                 countdown_points = [60, 20, 10, 5, 4, 3, 2, 1]
                 next_countdown_idx = 0
                 
+                # Invio ciclico a 1 s dal task periodico del bus; fallback sul loop software
+                periodic_active = dm1_periodic_sender.send(current_dtc)
+                periodic_restarts = 0
+                
                 while (app.dm1_thread_running and 
                        app.current_dtc_index == current_index and  # Controlliamo se l'indice è cambiato
                        time.time() - start_time < max_wait_time):
@@ -4938,16 +7922,35 @@ class DTCAutoTestFrame(tk.Frame):
                         next_countdown_idx += 1
                     
                     try:
-                        # Invia messaggio CAN solo in modalità DTC Test
-                        send_can_message(current_dtc)
-                        
-                        # Breve attesa tra gli invii
-                        time.sleep(1)
+                        if periodic_active:
+                            # Il task periodico invia da solo: qui solo supervisione
+                            time.sleep(0.2)
+                            if not dm1_periodic_sender.is_alive():
+                                # Task fermato da un errore di invio o bus riaperto: ricrealo,
+                                # e se continua a fallire passa al loop software
+                                dm1_periodic_sender.stop()
+                                periodic_restarts += 1
+                                if periodic_restarts <= DM1_PERIODIC_MAX_RESTARTS:
+                                    log_message("⚠️ Periodic DM1 task stopped, recreating it")
+                                    periodic_active = dm1_periodic_sender.send(current_dtc)
+                                else:
+                                    log_message("⚠️ Periodic DM1 task keeps failing, using software timing")
+                                    periodic_active = False
+                        else:
+                            # Invia messaggio CAN solo in modalità DTC Test
+                            send_can_message(current_dtc)
+                            
+                            # Breve attesa tra gli invii
+                            time.sleep(1)
                     
                     except Exception as send_error:
                         log_message(f"Error sending DTC: {str(send_error)}")
                         break
                 
+                # Nessun DM1 durante la pausa tra un DTC e il successivo
+                if periodic_active:
+                    dm1_periodic_sender.suspend()
+                
                 # Verifica se siamo ancora allo stesso indice dopo il timeout
                 if app.current_dtc_index == current_index:
                     log_message(f"Timeout waiting for recognition for DTC {current_index + 1}")
@@ -4972,11 +7975,26 @@ class DTCAutoTestFrame(tk.Frame):
             test_successful = False
         
         finally:
+            dm1_periodic_sender.stop()
+            dm1_bam_sender.stop()
+            
             # Fase di chiusura e reporting
             final_status = "Test Completed Successfully" if test_successful else "Test Completed with Errors"
             
             log_message(final_status)
             
+            period_stats = get_dm1_period_stats()
+            if period_stats.get('samples'):
+                log_message(f"📊 DM1 period: mean {period_stats['mean_ms']:.1f} ms, "
+                           f"min {period_stats['min_ms']:.1f} ms, max {period_stats['max_ms']:.1f} ms, "
+                           f"jitter {period_stats['jitter_ms']:.2f} ms ({period_stats['samples']} samples)")
+            
+            bam_stats = dm1_bam_sender.get_stats()
+            if bam_stats.get('samples'):
+                log_message(f"📊 DM1 BAM period: mean {bam_stats['mean_ms']:.1f} ms, "
+                           f"min {bam_stats['min_ms']:.1f} ms, max {bam_stats['max_ms']:.1f} ms, "
+                           f"jitter {bam_stats['jitter_ms']:.2f} ms ({bam_stats['samples']} samples)")
+            
             # Aggiorna display finale in modo thread-safe
             root.after(0, self.update_current_dtc_display, 
                        final_status, 
@@ -4992,6 +8010,97 @@ class DTCAutoTestFrame(tk.Frame):
 
 
 
+    def next_dtc_group(self, start_index):
+        """
+        Indici dei DTC consecutivi da inviare nello stesso DM1 (max app.dm1_group_size).
+        Il gruppo si interrompe al cambio di Source Address (un DM1 per SA) o di lampada
+        (il byte lampade è unico per messaggio, così resta verificabile per ogni DTC).
+        """
+        group_size = max(1, min(app.dm1_group_size, DM1_MAX_GROUP_SIZE))
+        first_dtc = app.csv_data[start_index]
+        group = [start_index]
+        for idx in range(start_index + 1, min(start_index + group_size, len(app.csv_data))):
+            dtc = app.csv_data[idx]
+            if dtc.get('SA') != first_dtc.get('SA') or dtc.get('LAMP') != first_dtc.get('LAMP'):
+                break
+            group.append(idx)
+        return group
+
+    def send_dtc_group(self, group, total_dtcs):
+        """
+        Slot di test per un DM1 multi-DTC: il messaggio BAM resta attivo per 60 secondi
+        più una pagina del cruscotto per DTC, mentre execute_dtc_group_acquisition
+        verifica i DTC man mano che vengono visualizzati.
+        Ritorna False se qualche DTC del gruppo non è stato verificato.
+        """
+        start_index = group[0]
+        group_dtcs = [app.csv_data[idx] for idx in group]
+        
+        root.after(0, self.update_current_dtc_display, 
+                   f"Sending {len(group)} DTCs", 
+                   start_index + 1, 
+                   group_dtcs[0])
+        
+        dtc_codes = ", ".join(f"{dtc['SPN']}/{dtc['FMI']}" for dtc in group_dtcs)
+        log_message(
+            f"Sending DM1 with {len(group)} DTCs: Index={start_index + 1}-{group[-1] + 1}/{total_dtcs}, "
+            f"SPN/FMI={dtc_codes}, Lamp={group_dtcs[0].get('LAMP', 'NONE')}"
+        )
+        
+        try:
+            dm1_bam_sender.send(group_dtcs)
+        except Exception as e:
+            log_message(f"Error sending DTC group: {str(e)}")
+            for dtc in group_dtcs:
+                dtc['error_found'] = True
+            app.current_dtc_index = group[-1] + 1
+            return False
+        
+        # Imposta ecff_received per avviare il processo di acquisizione
+        app.ecff_received = True
+        log_message(">>> Starting 60 second countdown for recognition")
+        
+        verified = set()
+        acquisition_done = threading.Event()
+        root.after(60000, lambda: threading.Thread(
+            target=execute_dtc_group_acquisition, args=(group, verified, acquisition_done),
+            name="DTCGroupAcquisition", daemon=True).start())
+        
+        start_time = time.time()
+        max_wait_time = 61 + len(group) * app.dm1_group_page_time
+        countdown_points = [60, 20, 10, 5, 4, 3, 2, 1]
+        next_countdown_idx = 0
+        
+        while (app.dm1_thread_running and 
+               app.current_dtc_index == start_index and 
+               not acquisition_done.is_set() and 
+               time.time() - start_time < max_wait_time):
+            # Countdown riferito all'inizio dell'acquisizione (60 s)
+            remaining_seconds = int(max(0, 61 - (time.time() - start_time)))
+            if (next_countdown_idx < len(countdown_points) and remaining_seconds > 0 and 
+                    remaining_seconds <= countdown_points[next_countdown_idx]):
+                log_message(f"Recognition countdown: {remaining_seconds} seconds")
+                next_countdown_idx += 1
+            time.sleep(0.2)
+        
+        # Nessun DM1 durante la pausa tra un gruppo e il successivo
+        dm1_bam_sender.suspend()
+        
+        group_successful = True
+        if app.current_dtc_index == start_index:
+            missing = [idx for idx in group if idx not in verified]
+            if missing:
+                log_message(f"Timeout waiting for recognition for DTC(s) "
+                           f"{', '.join(str(idx + 1) for idx in missing)}")
+                for idx in missing:
+                    app.csv_data[idx]['error_found'] = True
+                group_successful = False
+            
+            app.current_dtc_index = group[-1] + 1
+            log_message(f"Advancing to next DTC index: {app.current_dtc_index}")
+        
+        return group_successful
+
     def update_current_dtc_display(self, status_text, current_index, current_dtc):
         """Aggiorna l'interfaccia con i dettagli del DTC corrente"""
         self.test_status_label.config(text=status_text)
@@ -5147,6 +8256,14 @@ class DTCAutoTestFrame(tk.Frame):
         app.dm1_paused = False
         app.errors_found = 0
         
+        try:
+            app.dm1_group_size = max(1, min(int(self.dm1_group_var.get()), DM1_MAX_GROUP_SIZE))
+        except (tk.TclError, ValueError):
+            app.dm1_group_size = 1
+        self.dm1_group_var.set(app.dm1_group_size)
+        if app.dm1_group_size > 1:
+            log_message(f"Multi-DTC DM1: up to {app.dm1_group_size} DTCs per message (J1939 BAM)")
+        
         # *** AGGIUNTA: Reset del set di log per il nuovo test ***
         app.logged_dtc_results = set()
         
@@ -5266,6 +8383,14 @@ class DTCAutoTestFrame(tk.Frame):
                                        bg="#ff8c8c")  # Rosso chiaro
         self.stop_dtc_button.pack(side=tk.LEFT, padx=5)
         
+        # DTC per messaggio DM1: oltre 1 il DM1 viene segmentato con J1939 BAM
+        self.dm1_group_var = tk.IntVar(value=app.dm1_group_size)
+        self.dm1_group_spinbox = tk.Spinbox(dtc_controls_frame, from_=1, to=DM1_MAX_GROUP_SIZE,
+                                            textvariable=self.dm1_group_var, width=4,
+                                            font=("Arial", 9))
+        self.dm1_group_spinbox.pack(side=tk.RIGHT, padx=5)
+        tk.Label(dtc_controls_frame, text="DTCs per DM1:", font=("Arial", 9)).pack(side=tk.RIGHT)
+        
         # Frame per il lettore ASC - più ampio e ben evidenziato
         asc_player_frame = tk.LabelFrame(top_controls_frame, text="ASC Trace Player", font=("Arial", 9, "bold"))
         asc_player_frame.pack(fill="x", padx=5, pady=5)
@@ -5665,6 +8790,9 @@ ocr_tracker = OCRPerformanceTracker()
 
 # ====== Main Application UI Setup ======
 if __name__ == "__main__":
+    # Necessario per i worker OCR (spawn) nell'eseguibile PyInstaller
+    multiprocessing.freeze_support()
+    
     # --- Tkinter Interface ---
     root = tk.Tk()
     root.title("Cluster DTC Recognition")
@@ -5875,6 +9003,8 @@ if __name__ == "__main__":
     # Pannello per OCR threshold
     app.threshold_preview_panel = tk.Label(threshold_preview_frame, bd=1, relief=tk.SUNKEN, bg="black")
     app.threshold_preview_panel.pack(fill="both", expand=True, padx=5, pady=5)
+    app.threshold_surface = DisplaySurface(app.threshold_preview_panel, default_size=(640, 240))
+    app.threshold_preview_panel.bind("<Configure>", app.threshold_surface.on_configure)
 
     # Frame for recognized preview (pannello principale)
     preview_frame = tk.LabelFrame(preview_paned, text="Recognition Preview", font=("Arial", 9, "bold"))
@@ -5882,6 +9012,7 @@ if __name__ == "__main__":
     # Pannello immagine principale
     recognized_frame_panel = tk.Label(preview_frame, bd=1, relief=tk.SUNKEN, bg="black")
     recognized_frame_panel.pack(fill="both", expand=True, padx=5, pady=5)
+    app.preview_surface = DisplaySurface(recognized_frame_panel)
 
     # Add the resize event binding
     recognized_frame_panel.bind("<Configure>", on_preview_panel_resize)
@@ -0,0 +1,123 @@
+"""
+Processo worker OCR per il pool di FinalDTC_PaddleOCR.
+
+Modulo separato e senza effetti collaterali all'import (niente Tk, CAN, AppState o
+chdir): con il metodo "spawn" ogni worker importa solo questo file invece di
+rieseguire tutto lo script principale.
+"""
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+
+def create_simple_test_image():
+    """Crea immagine di test ottimale"""
+    # Immagine bianca 200x80
+    img = np.ones((80, 200, 3), dtype=np.uint8) * 255
+
+    # Testo nero grande e chiaro
+    cv2.putText(img, "12345", (30, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+
+    return img
+
+def create_paddle_engine():
+    """Istanza PaddleOCR del worker (show_log non è supportato da tutte le versioni)"""
+    from paddleocr import PaddleOCR
+    try:
+        return PaddleOCR(use_angle_cls=False, lang='en', show_log=False)
+    except Exception:
+        return PaddleOCR(use_angle_cls=False, lang='en')
+
+def paddle_rec_batch(engine, images):
+    """
+    Recognition-only su una lista di immagini con un'istanza PaddleOCR qualsiasi
+    (quella dell'applicazione o quella di un worker). Solleva eccezione in caso di errore.
+
+    Returns:
+        list: un risultato per immagine nel formato standard di .ocr() ([[bbox, (text, conf)]])
+              con bbox None
+    """
+    # engine.ocr(lista, det=False) esegue il recognizer una volta per immagine: il batch
+    # vero è una sola chiamata a text_recognizer (PaddleOCR 2.x), che vuole immagini BGR
+    recognizer = getattr(engine, 'text_recognizer', None)
+    if recognizer is not None:
+        batch = [cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if image.ndim == 2 else image
+                 for image in images]
+        rec_res, _ = recognizer(batch)
+        if len(rec_res) != len(images):
+            raise ValueError(f"PaddleOCR recognizer returned {len(rec_res)} results for {len(images)} images")
+    else:
+        rec_res = []
+        for image in images:
+            single = engine.ocr(image, det=False, cls=False)
+            rec_res.append(single[0][0] if single and single[0] else ('', 0.0))
+
+    formatted = []
+    for text_info in rec_res:
+        text, confidence = text_info[0], text_info[1]
+        formatted.append([[[None, (text, confidence)]]] if text else [None])
+    return formatted
+
+def pack_images_to_shared_memory(images):
+    """
+    Copia una lista di immagini uint8 in un unico blocco SharedMemory.
+
+    Returns:
+        tuple: (shm, specs) con specs = [(shape, offset), ...]
+    """
+    total_size = sum(img.nbytes for img in images)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, total_size))
+    specs = []
+    offset = 0
+    for img in images:
+        img = np.ascontiguousarray(img, dtype=np.uint8)
+        view = np.ndarray(img.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+        view[...] = img
+        specs.append((img.shape, offset))
+        offset += img.nbytes
+    return shm, specs
+
+def unpack_images_from_shared_memory(shm_name, specs):
+    """Legge (copiandole) le immagini da un blocco SharedMemory creato da pack_images_to_shared_memory"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return [np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset).copy()
+                for shape, offset in specs]
+    finally:
+        shm.close()
+
+def ocr_worker_main(worker_id, task_queue, result_queue):
+    """
+    Loop di un processo worker OCR: crea la propria istanza PaddleOCR, la scalda
+    e poi serve i task (task_id, shm_name, specs, rec_only) fino al sentinel None.
+    Gira in un processo separato: niente Tk e niente log_message qui.
+    """
+    try:
+        engine = create_paddle_engine()
+
+        # Warm-up: la prima inferenza alloca i buffer del predictor
+        warmup = create_simple_test_image()
+        engine.ocr(warmup)
+        paddle_rec_batch(engine, [warmup])
+    except Exception as e:
+        result_queue.put(('ready', worker_id, f"{type(e).__name__}: {e}"))
+        return
+
+    result_queue.put(('ready', worker_id, None))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        task_id, shm_name, specs, rec_only = task
+        try:
+            images = unpack_images_from_shared_memory(shm_name, specs)
+            if rec_only:
+                results = paddle_rec_batch(engine, images)
+            else:
+                results = [engine.ocr(img) for img in images]
+            result_queue.put(('result', task_id, results, None))
+        except Exception as e:
+            result_queue.put(('result', task_id, None, f"{type(e).__name__}: {e}"))